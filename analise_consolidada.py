@@ -3,221 +3,460 @@ Análise Consolidada - Municípios Afetados por Linhas de Transmissão
 Origem: Usina de Foz do Iguaçu - Região Sul do Brasil
 """
 
+import argparse
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import os
 
+from cache_artefatos import CacheArtefatos, adicionar_argumento_force, hash_valor
+import cubo_estatisticas
+import modelo_dados
+import municipios_ibge
+
 # Configurações de estilo
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
+# SVG reprodutível: ids internos fixos (sem data nos metadados, ver salvar_visualizacao)
+plt.rcParams['svg.hashsalt'] = 'analise_consolidada'
 
 # Diretório base
 base_dir = Path(__file__).parent
 per_layer_dir = base_dir / 'per_layer'
 
-# Dicionário para armazenar todos os dados
-dados_consolidados = []
-
-# Ler todos os arquivos CSV da pasta per_layer
-print("=" * 80)
-print("ANÁLISE CONSOLIDADA - LINHAS DE TRANSMISSÃO FOZ DO IGUAÇU")
-print("=" * 80)
-print()
-
-# Listar todos os arquivos CSV
-csv_files = list(per_layer_dir.glob('*.csv'))
-print(f"📁 Arquivos encontrados: {len(csv_files)}\n")
-
-# Processar cada arquivo
-for csv_file in csv_files:
-    filename = csv_file.stem
-    
-    # Extrair informações do nome do arquivo
-    if 'base' in filename.lower():
-        # Arquivo base (todas as linhas)
-        estado = filename.split('_')[-1]
-        voltagem = 'BASE'
-        tipo = 'base'
-    else:
-        # Arquivo específico de voltagem
-        parts = filename.split('_')
-        voltagem = parts[3]  # ex: 230, 525, etc
-        estado = parts[4].replace('.csv', '')  # PR, RS, SC
-        tipo = 'especifica'
-    
-    # Ler o CSV
-    df = pd.read_csv(csv_file)
-    # Assegurar nomes limpos e únicos por arquivo
-    if 'NM_MUN' in df.columns:
-        df['NM_MUN'] = df['NM_MUN'].astype(str).str.strip()
-        df = df.drop_duplicates(subset=['NM_MUN'])
-    
-    # Adicionar informações extras
-    df['Voltagem'] = voltagem
-    df['Estado'] = estado
-    df['Tipo'] = tipo
-    df['Linha'] = f"{voltagem} kV" if voltagem != 'BASE' else 'BASE'
-    
-    dados_consolidados.append(df)
-    
-    print(f"✓ {filename}")
-    print(f"  └─ {voltagem} kV - {estado} - {len(df)} municípios")
-
-# Consolidar tudo em um único DataFrame
-df_completo = pd.concat(dados_consolidados, ignore_index=True)
-df_completo['NM_MUN'] = df_completo['NM_MUN'].astype(str).str.strip()
-df_completo['Estado'] = df_completo['Estado'].astype(str).str.strip().str.upper()
-df_completo['Voltagem'] = df_completo['Voltagem'].astype(str).str.strip()
-df_completo = df_completo.drop_duplicates()
-
-print("\n" + "=" * 80)
-print("RESUMO GERAL")
-print("=" * 80)
-
-# Estatísticas gerais
-total_municipios_unicos = df_completo['NM_MUN'].nunique()
-total_registros = len(df_completo)
-
-print(f"\n📊 Total de registros: {total_registros}")
-print(f"🏘️  Municípios únicos afetados: {total_municipios_unicos}")
-print(f"⚡ Linhas de transmissão diferentes: {df_completo['Linha'].nunique()}")
-print(f"🗺️  Estados cobertos: {', '.join(sorted(df_completo['Estado'].unique()))}")
-
-# Análise por voltagem
-print("\n" + "-" * 80)
-print("MUNICÍPIOS POR VOLTAGEM")
-print("-" * 80)
-
-df_especificas = df_completo[df_completo['Tipo'] == 'especifica']
-municipios_por_voltagem = df_especificas.groupby('Voltagem')['NM_MUN'].nunique().sort_values(ascending=False)
-
-for voltagem, count in municipios_por_voltagem.items():
-    print(f"  {voltagem} kV: {count} municípios")
-
-# Análise por estado
-print("\n" + "-" * 80)
-print("MUNICÍPIOS POR ESTADO")
-print("-" * 80)
-
-municipios_por_estado = df_completo.groupby('Estado')['NM_MUN'].nunique().sort_values(ascending=False)
-
-for estado, count in municipios_por_estado.items():
-    print(f"  {estado}: {count} municípios")
-
-# Municípios com múltiplas linhas
-print("\n" + "-" * 80)
-print("MUNICÍPIOS ATRAVESSADOS POR MÚLTIPLAS LINHAS")
-print("-" * 80)
-
-municipios_multiplas = df_especificas.groupby('NM_MUN')['Linha'].nunique().sort_values(ascending=False)
-municipios_com_multiplas = municipios_multiplas[municipios_multiplas > 1]
-
-print(f"\n🔄 {len(municipios_com_multiplas)} municípios são atravessados por mais de uma linha\n")
-print("Top 10 municípios com mais linhas:")
-for municipio, num_linhas in municipios_com_multiplas.head(10).items():
-    linhas = df_especificas[df_especificas['NM_MUN'] == municipio]['Linha'].unique()
-    print(f"  {municipio}: {int(num_linhas)} linhas - {', '.join(sorted(linhas))}")
-
-# ============================================================================
-# VISUALIZAÇÕES
-# ============================================================================
-
-print("\n" + "=" * 80)
-print("GERANDO VISUALIZAÇÕES...")
-print("=" * 80)
-
-# Criar figura com múltiplos subplots
-fig = plt.figure(figsize=(16, 12))
-
-# 1. Municípios por Voltagem
-ax1 = plt.subplot(2, 2, 1)
-municipios_por_voltagem.plot(kind='barh', ax=ax1, color='steelblue')
-ax1.set_xlabel('Número de Municípios')
-ax1.set_ylabel('Voltagem (kV)')
-ax1.set_title('Municípios Afetados por Voltagem da Linha', fontsize=12, fontweight='bold')
-ax1.grid(axis='x', alpha=0.3)
-
-# Adicionar valores nas barras
-for i, v in enumerate(municipios_por_voltagem.values):
-    ax1.text(v + 0.5, i, str(v), va='center')
-
-# 2. Municípios por Estado
-ax2 = plt.subplot(2, 2, 2)
-cores_estados = {'PR': '#1f77b4', 'SC': '#ff7f0e', 'RS': '#2ca02c'}
-colors = [cores_estados.get(estado, 'gray') for estado in municipios_por_estado.index]
-municipios_por_estado.plot(kind='bar', ax=ax2, color=colors)
-ax2.set_xlabel('Estado')
-ax2.set_ylabel('Número de Municípios')
-ax2.set_title('Municípios Afetados por Estado', fontsize=12, fontweight='bold')
-ax2.tick_params(axis='x', rotation=0)
-ax2.grid(axis='y', alpha=0.3)
-
-# Adicionar valores nas barras
-for i, v in enumerate(municipios_por_estado.values):
-    ax2.text(i, v + 1, str(v), ha='center', va='bottom')
-
-# 3. Distribuição de linhas por município
-ax3 = plt.subplot(2, 2, 3)
-dist_linhas = municipios_multiplas.value_counts().sort_index()
-dist_linhas.plot(kind='bar', ax=ax3, color='coral')
-ax3.set_xlabel('Número de Linhas')
-ax3.set_ylabel('Quantidade de Municípios')
-ax3.set_title('Distribuição: Quantas Linhas Atravessam Cada Município', fontsize=12, fontweight='bold')
-ax3.tick_params(axis='x', rotation=0)
-ax3.grid(axis='y', alpha=0.3)
-
-# Adicionar valores nas barras
-for i, v in enumerate(dist_linhas.values):
-    ax3.text(i, v + 0.5, str(v), ha='center', va='bottom')
-
-# 4. Matriz de linhas por estado
-ax4 = plt.subplot(2, 2, 4)
-matriz_estado_voltagem = df_especificas.groupby(['Estado', 'Voltagem'])['NM_MUN'].nunique().unstack(fill_value=0)
-sns.heatmap(matriz_estado_voltagem, annot=True, fmt='d', cmap='YlOrRd', ax=ax4, cbar_kws={'label': 'Municípios'})
-ax4.set_xlabel('Voltagem (kV)')
-ax4.set_ylabel('Estado')
-ax4.set_title('Matriz: Municípios por Estado e Voltagem', fontsize=12, fontweight='bold')
-
-plt.suptitle('Análise Consolidada - Linhas de Transmissão de Foz do Iguaçu', 
-             fontsize=16, fontweight='bold', y=0.995)
-
-plt.tight_layout()
-
-# Salvar figura
+# Saídas
 output_path = base_dir / 'analise_consolidada_visualizacao.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight')
-print(f"\n✓ Visualização salva em: {output_path}")
-
-# Salvar DataFrame consolidado
+FORMATOS_FIGURA = ('png', 'svg')  # SVG para a web, PNG para impressão
+DPI_PADRAO = 300
 csv_output_path = base_dir / 'dados_consolidados.csv'
-df_completo.to_csv(csv_output_path, index=False, encoding='utf-8-sig')
-print(f"✓ Dados consolidados salvos em: {csv_output_path}")
-
-# Salvar relatório de municípios com múltiplas linhas
-if len(municipios_com_multiplas) > 0:
-    relatorio_multiplas = []
-    for municipio in municipios_com_multiplas.index:
-        linhas = df_especificas[df_especificas['NM_MUN'] == municipio]
-        estado = linhas['Estado'].iloc[0]
-        voltagens = ', '.join(sorted(linhas['Voltagem'].unique()))
-        num_linhas = len(linhas['Linha'].unique())
-        
-        relatorio_multiplas.append({
-            'Municipio': municipio,
-            'Estado': estado,
-            'Num_Linhas': num_linhas,
-            'Voltagens': voltagens
-        })
-    
-    df_multiplas = pd.DataFrame(relatorio_multiplas).sort_values('Num_Linhas', ascending=False)
-    multiplas_output_path = base_dir / 'municipios_multiplas_linhas.csv'
-    df_multiplas.to_csv(multiplas_output_path, index=False, encoding='utf-8-sig')
-    print(f"✓ Relatório de múltiplas linhas salvo em: {multiplas_output_path}")
-
-print("\n" + "=" * 80)
-print("✅ ANÁLISE CONCLUÍDA COM SUCESSO!")
-print("=" * 80)
-
-plt.show()
+multiplas_output_path = base_dir / 'municipios_multiplas_linhas.csv'
+
+# Padrões de nome aceitos em per_layer/ (o nome define Voltagem/Estado/Tipo)
+PADRAO_ESPECIFICA = re.compile(r'^municipios_linha_trans_(?P<voltagem>\d{2,4})_(?P<estado>[A-Za-z]{2})$')
+PADRAO_BASE = re.compile(r'^municipios_linhas_de_transmissao_base_(?P<estado>[A-Za-z]{2})$')
+
+# Esquema explícito dos CSVs de entrada e das colunas categóricas
+ESQUEMA_CSV = pa.schema([('NM_MUN', pa.string())])
+TIPOS = ['base', 'especifica']
+
+
+@dataclass(frozen=True)
+class Camada:
+    arquivo: Path
+    voltagem: str  # '230', '525', ... ou 'BASE'
+    estado: str    # UF
+    tipo: str      # 'especifica' ou 'base'
+
+    @property
+    def linha(self):
+        return f"{self.voltagem} kV" if self.voltagem != 'BASE' else 'BASE'
+
+
+def listar_camadas():
+    """Lista os CSVs de per_layer (ordem estável para saídas reprodutíveis)."""
+    return sorted(per_layer_dir.glob('*.csv'))
+
+
+def _chave_voltagem(voltagem):
+    """Ordena voltagens numericamente, com 'BASE' por último."""
+    return (1, 0) if voltagem == 'BASE' else (0, int(voltagem))
+
+
+def montar_manifesto(csv_files):
+    """Valida os nomes dos arquivos e monta o manifesto de camadas.
+
+    Nomes aceitos:
+        municipios_linha_trans_<kV>_<UF>.csv          -> camada específica
+        municipios_linhas_de_transmissao_base_<UF>.csv -> camada base (todas as linhas)
+    Arquivos fora do padrão são rejeitados (listados no console) em vez de gerarem
+    Voltagem/Estado inválidos.
+    """
+    camadas = []
+    for csv_file in csv_files:
+        filename = Path(csv_file).stem
+        m = PADRAO_ESPECIFICA.match(filename)
+        if m:
+            voltagem, estado, tipo = str(int(m['voltagem'])), m['estado'].upper(), 'especifica'
+        else:
+            m = PADRAO_BASE.match(filename)
+            if not m:
+                print(f"⚠️  Ignorado (nome fora do padrão): {Path(csv_file).name}")
+                continue
+            voltagem, estado, tipo = 'BASE', m['estado'].upper(), 'base'
+        camadas.append(Camada(Path(csv_file), voltagem, estado, tipo))
+    return camadas
+
+
+def tipos_categoricos(camadas):
+    """Esquema explícito das colunas categóricas, comum a todas as camadas.
+    Categorias idênticas em todos os frames fazem o concat preservar o dtype.
+    """
+    return {
+        'Voltagem': pd.CategoricalDtype(sorted({c.voltagem for c in camadas}, key=_chave_voltagem), ordered=True),
+        'Estado': pd.CategoricalDtype(sorted({c.estado for c in camadas})),
+        'Tipo': pd.CategoricalDtype(TIPOS),
+    }
+
+
+def _ler_camada(camada):
+    """Lê um CSV com o leitor do pyarrow (esquema fixo: NM_MUN texto) e anota o CD_MUN."""
+    tabela = pacsv.read_csv(
+        camada.arquivo,
+        convert_options=pacsv.ConvertOptions(column_types=ESQUEMA_CSV, include_columns=list(ESQUEMA_CSV.names)),
+    )
+    nomes = pc.utf8_trim_whitespace(tabela.column('NM_MUN'))
+    # Assegurar nomes limpos e únicos por arquivo
+    df = pd.DataFrame({'NM_MUN': nomes.to_pandas()}).drop_duplicates(subset=['NM_MUN'])
+    # Os CSVs de per_layer não trazem o código IBGE: resolve (nome, UF) → CD_MUN só aqui
+    df.insert(0, 'CD_MUN', municipios_ibge.resolver_codigos(df['NM_MUN'], camada.estado).array)
+    return df
+
+
+def ler_camadas(camadas, max_workers=None):
+    """Lê as camadas do manifesto em paralelo e anota Voltagem/Estado/Tipo/Linha tipados."""
+    tipos = tipos_categoricos(camadas)
+    municipios_ibge.tabela_municipios()  # carrega a referência uma vez, antes das threads
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(_ler_camada, camadas))
+
+    dados_consolidados = []
+    for camada, df in zip(camadas, frames):
+        df['Voltagem'] = pd.Categorical([camada.voltagem] * len(df), dtype=tipos['Voltagem'])
+        df['Estado'] = pd.Categorical([camada.estado] * len(df), dtype=tipos['Estado'])
+        df['Tipo'] = pd.Categorical([camada.tipo] * len(df), dtype=tipos['Tipo'])
+        df['Linha'] = camada.linha
+        dados_consolidados.append(df)
+
+        print(f"✓ {camada.arquivo.stem}")
+        print(f"  └─ {camada.voltagem} kV - {camada.estado} - {len(df)} municípios")
+        sem_codigo = df.loc[df['CD_MUN'].isna(), 'NM_MUN'].tolist()
+        if sem_codigo:
+            print(f"  ⚠️  Sem código IBGE (fora das contagens por município): {', '.join(sem_codigo)}")
+    return dados_consolidados
+
+
+def consolidar(dados_consolidados):
+    """Concatena as camadas em um único DataFrame sem duplicatas (dtypes categóricos preservados)."""
+    df_completo = pd.concat(dados_consolidados, ignore_index=True)
+    df_completo = df_completo.drop_duplicates()
+    return df_completo
+
+
+COLUNAS_MULTIPLAS = ['Municipio', 'Estado', 'Num_Linhas', 'Voltagens']
+
+
+def agregar_por_municipio(df_especificas):
+    """Uma linha por município (CD_MUN): nome, estado, nº de linhas distintas, voltagens e linhas.
+    Um único groupby; ordem determinística (mais linhas primeiro, depois nome e estado).
+    """
+    distintas = (
+        df_especificas[['CD_MUN', 'NM_MUN', 'Estado', 'Voltagem', 'Linha']]
+        .dropna(subset=['CD_MUN'])
+        .astype({'NM_MUN': str, 'Estado': str, 'Voltagem': str, 'Linha': str})
+        .drop_duplicates(subset=['CD_MUN', 'Voltagem', 'Linha'])
+        .sort_values(['CD_MUN', 'Voltagem', 'Linha'])
+    )
+    agg = distintas.groupby('CD_MUN').agg(
+        Municipio=('NM_MUN', 'first'),
+        Estado=('Estado', 'first'),
+        Num_Linhas=('Linha', 'nunique'),
+        Voltagens=('Voltagem', lambda v: ', '.join(v.unique())),
+        Linhas=('Linha', lambda v: ', '.join(v.unique())),
+    )
+    return agg.sort_values(['Num_Linhas', 'Municipio', 'Estado'], ascending=[False, True, True], kind='stable')
+
+
+def calcular_estatisticas(df_completo):
+    """Agregados usados no resumo de console, na figura e no relatório de múltiplas linhas.
+    As contagens são fatias do cubo Estado × Voltagem × Município (cubo_estatisticas).
+    """
+    df_especificas = df_completo[df_completo['Tipo'] == 'especifica']
+    cubo = cubo_estatisticas.construir(df_completo)
+    # Municípios identificados pelo CD_MUN (nomes se repetem entre UFs, ex.: Turvo/PR e Turvo/SC)
+    municipios_multiplas = cubo.linhas_por_municipio().sort_values(ascending=False)
+    por_municipio = agregar_por_municipio(df_especificas)
+    return {
+        'cubo': cubo,
+        'df_especificas': df_especificas,
+        'por_municipio': por_municipio,
+        'multiplas': por_municipio[por_municipio['Num_Linhas'] > 1],
+        'municipios_por_voltagem': cubo.por_voltagem().sort_values(ascending=False),
+        'municipios_por_estado': cubo.por_estado(base=True).sort_values(ascending=False),
+        'municipios_multiplas': municipios_multiplas,
+    }
+
+
+def imprimir_resumo(df_completo, stats):
+    print("\n" + "=" * 80)
+    print("RESUMO GERAL")
+    print("=" * 80)
+
+    # Estatísticas gerais
+    total_municipios_unicos = df_completo['NM_MUN'].nunique()
+    total_registros = len(df_completo)
+
+    print(f"\n📊 Total de registros: {total_registros}")
+    print(f"🏘️  Municípios únicos afetados: {total_municipios_unicos}")
+    print(f"⚡ Linhas de transmissão diferentes: {df_completo['Linha'].nunique()}")
+    print(f"🗺️  Estados cobertos: {', '.join(sorted(df_completo['Estado'].unique()))}")
+
+    # Análise por voltagem
+    print("\n" + "-" * 80)
+    print("MUNICÍPIOS POR VOLTAGEM")
+    print("-" * 80)
+
+    for voltagem, count in stats['municipios_por_voltagem'].items():
+        print(f"  {voltagem} kV: {count} municípios")
+
+    # Análise por estado
+    print("\n" + "-" * 80)
+    print("MUNICÍPIOS POR ESTADO")
+    print("-" * 80)
+
+    for estado, count in stats['municipios_por_estado'].items():
+        print(f"  {estado}: {count} municípios")
+
+    # Municípios com múltiplas linhas
+    print("\n" + "-" * 80)
+    print("MUNICÍPIOS ATRAVESSADOS POR MÚLTIPLAS LINHAS")
+    print("-" * 80)
+
+    multiplas = stats['multiplas']
+    print(f"\n🔄 {len(multiplas)} municípios são atravessados por mais de uma linha\n")
+    print("Top 10 municípios com mais linhas:")
+    for row in multiplas.head(10).itertuples():
+        print(f"  {row.Municipio}: {row.Num_Linhas} linhas - {row.Linhas}")
+
+
+def caminho_figura(formato='png'):
+    return output_path.with_suffix(f'.{formato}')
+
+
+def hash_agregados(stats):
+    """Hash dos agregados desenhados na figura (não dos CSVs de origem)."""
+    def _dict(serie):
+        return {str(k): int(v) for k, v in serie.items()}
+    matriz = stats['cubo'].matriz()
+    return hash_valor({
+        'por_voltagem': _dict(stats['municipios_por_voltagem']),
+        'por_estado': _dict(stats['municipios_por_estado']),
+        'distribuicao': _dict(stats['municipios_multiplas'].value_counts().sort_index()),
+        'matriz': {str(e): _dict(linha) for e, linha in matriz.iterrows()},
+    })
+
+
+def gerar_visualizacao(stats, output_path=output_path, dpi=DPI_PADRAO):
+    """Renderiza a figura 2x2 da análise consolidada e salva em output_path (formato pela extensão)."""
+    print("\n" + "=" * 80)
+    print("GERANDO VISUALIZAÇÕES...")
+    print("=" * 80)
+
+    municipios_por_voltagem = stats['municipios_por_voltagem']
+    municipios_por_estado = stats['municipios_por_estado']
+    municipios_multiplas = stats['municipios_multiplas']
+
+    # Criar figura com múltiplos subplots
+    fig = plt.figure(figsize=(16, 12))
+
+    # 1. Municípios por Voltagem
+    ax1 = plt.subplot(2, 2, 1)
+    municipios_por_voltagem.plot(kind='barh', ax=ax1, color='steelblue')
+    ax1.set_xlabel('Número de Municípios')
+    ax1.set_ylabel('Voltagem (kV)')
+    ax1.set_title('Municípios Afetados por Voltagem da Linha', fontsize=12, fontweight='bold')
+    ax1.grid(axis='x', alpha=0.3)
+
+    # Adicionar valores nas barras
+    for i, v in enumerate(municipios_por_voltagem.values):
+        ax1.text(v + 0.5, i, str(v), va='center')
+
+    # 2. Municípios por Estado
+    ax2 = plt.subplot(2, 2, 2)
+    cores_estados = {'PR': '#1f77b4', 'SC': '#ff7f0e', 'RS': '#2ca02c'}
+    colors = [cores_estados.get(estado, 'gray') for estado in municipios_por_estado.index]
+    municipios_por_estado.plot(kind='bar', ax=ax2, color=colors)
+    ax2.set_xlabel('Estado')
+    ax2.set_ylabel('Número de Municípios')
+    ax2.set_title('Municípios Afetados por Estado', fontsize=12, fontweight='bold')
+    ax2.tick_params(axis='x', rotation=0)
+    ax2.grid(axis='y', alpha=0.3)
+
+    # Adicionar valores nas barras
+    for i, v in enumerate(municipios_por_estado.values):
+        ax2.text(i, v + 1, str(v), ha='center', va='bottom')
+
+    # 3. Distribuição de linhas por município
+    ax3 = plt.subplot(2, 2, 3)
+    dist_linhas = municipios_multiplas.value_counts().sort_index()
+    dist_linhas.plot(kind='bar', ax=ax3, color='coral')
+    ax3.set_xlabel('Número de Linhas')
+    ax3.set_ylabel('Quantidade de Municípios')
+    ax3.set_title('Distribuição: Quantas Linhas Atravessam Cada Município', fontsize=12, fontweight='bold')
+    ax3.tick_params(axis='x', rotation=0)
+    ax3.grid(axis='y', alpha=0.3)
+
+    # Adicionar valores nas barras
+    for i, v in enumerate(dist_linhas.values):
+        ax3.text(i, v + 0.5, str(v), ha='center', va='bottom')
+
+    # 4. Matriz de linhas por estado
+    ax4 = plt.subplot(2, 2, 4)
+    matriz_estado_voltagem = stats['cubo'].matriz()
+    sns.heatmap(matriz_estado_voltagem, annot=True, fmt='d', cmap='YlOrRd', ax=ax4, cbar_kws={'label': 'Municípios'})
+    ax4.set_xlabel('Voltagem (kV)')
+    ax4.set_ylabel('Estado')
+    ax4.set_title('Matriz: Municípios por Estado e Voltagem', fontsize=12, fontweight='bold')
+
+    plt.suptitle('Análise Consolidada - Linhas de Transmissão de Foz do Iguaçu',
+                 fontsize=16, fontweight='bold', y=0.995)
+
+    plt.tight_layout()
+
+    # Salvar figura
+    # sem data nos metadados: mesmos agregados -> mesmo arquivo
+    metadata = {'Date': None} if Path(output_path).suffix == '.svg' else None
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight', metadata=metadata)
+    print(f"\n✓ Visualização salva em: {output_path}")
+    return fig
+
+
+def montar_relatorio_multiplas(stats):
+    """Tabela de municípios atravessados por mais de uma linha (municipios_multiplas_linhas.csv)."""
+    return stats['multiplas'][COLUNAS_MULTIPLAS].reset_index(drop=True)
+
+
+def salvar_consolidado(df_completo, cache, csv_files):
+    codigo = [Path(__file__), Path(modelo_dados.__file__)]
+    if cache.verificar(csv_output_path, csv_files, codigo=codigo):
+        modelo_dados.gravar_atomico(
+            csv_output_path, lambda tmp: df_completo.to_csv(tmp, index=False, encoding='utf-8-sig'))
+        cache.registrar(csv_output_path)
+        print(f"✓ Dados consolidados salvos em: {csv_output_path}")
+    parquet = modelo_dados.caminho_parquet(csv_output_path)
+    if cache.verificar(parquet, csv_files, codigo=codigo):
+        modelo_dados.salvar_parquet(df_completo, csv_output_path, modelo_dados.ESQUEMA_CONSOLIDADO)
+        cache.registrar(parquet)
+        print(f"✓ Dados consolidados salvos em: {parquet}")
+
+
+def salvar_multiplas(df_multiplas, cache, csv_files):
+    if len(df_multiplas) == 0:
+        return
+    codigo = [Path(__file__), Path(modelo_dados.__file__)]
+    if cache.verificar(multiplas_output_path, csv_files, codigo=codigo):
+        modelo_dados.gravar_atomico(
+            multiplas_output_path, lambda tmp: df_multiplas.to_csv(tmp, index=False, encoding='utf-8-sig'))
+        cache.registrar(multiplas_output_path)
+        print(f"✓ Relatório de múltiplas linhas salvo em: {multiplas_output_path}")
+    parquet = modelo_dados.caminho_parquet(multiplas_output_path)
+    if cache.verificar(parquet, csv_files, codigo=codigo):
+        modelo_dados.salvar_parquet(df_multiplas, multiplas_output_path, modelo_dados.ESQUEMA_MULTIPLAS)
+        cache.registrar(parquet)
+        print(f"✓ Relatório de múltiplas linhas salvo em: {parquet}")
+
+
+def salvar_snapshot(df_completo, df_multiplas):
+    """Snapshot tipado (Arrow IPC) lido pelos geradores de relatório; sempre regravado
+    para nunca ficar mais antigo que os CSVs/Parquet acabados de salvar.
+    """
+    modelo_dados.salvar_snapshot(df_completo, df_multiplas, csv_output_path, multiplas_output_path)
+    print(f"✓ Snapshot dos dados salvo em: {modelo_dados.SNAPSHOT_DIR}")
+
+
+def salvar_cubo(cubo, cache, csv_files):
+    """Serializa o cubo de estatísticas (lido pelos relatórios, dashboard e estatísticas detalhadas)."""
+    destino = cubo_estatisticas.CUBO_PARQUET
+    if cache.verificar(destino, csv_files, codigo=[Path(__file__), Path(cubo_estatisticas.__file__)]):
+        cubo.salvar(destino)
+        cache.registrar(destino)
+        print(f"✓ Cubo de estatísticas salvo em: {destino}")
+
+
+def salvar_visualizacao(stats, cache, formato='png', dpi=DPI_PADRAO, fechar=False):
+    """Renderiza a figura apenas se o hash dos agregados (ou formato/DPI) mudou.
+    Retorna True se renderizou; fechar=True libera a figura (modo headless).
+    """
+    destino = caminho_figura(formato)
+    parametros = {'agregados': hash_agregados(stats), 'dpi': dpi}
+    if not cache.verificar(destino, parametros=parametros, codigo=[Path(__file__)]):
+        return False
+    fig = gerar_visualizacao(stats, destino, dpi)
+    cache.registrar(destino)
+    if fechar:
+        plt.close(fig)
+    return True
+
+
+def executar(cache=None, mostrar=False, formato='png', dpi=DPI_PADRAO, progresso=None):
+    """Executa a análise completa e retorna (df_completo, df_multiplas).
+    Usado pelo script, pelo pipeline e pelo reprocessamento do dashboard (sem subprocesso).
+    mostrar=False não abre janela (a figura é apenas gravada).
+    progresso(fracao, etapa), se informado, é chamado no início de cada etapa.
+    """
+    cache = cache or CacheArtefatos()
+    progresso = progresso or (lambda fracao, etapa: None)
+
+    # Ler todos os arquivos CSV da pasta per_layer
+    print("=" * 80)
+    print("ANÁLISE CONSOLIDADA - LINHAS DE TRANSMISSÃO FOZ DO IGUAÇU")
+    print("=" * 80)
+    print()
+
+    progresso(0.05, 'Lendo as camadas de per_layer/')
+    csv_files = listar_camadas()
+    print(f"📁 Arquivos encontrados: {len(csv_files)}\n")
+
+    df_completo = consolidar(ler_camadas(montar_manifesto(csv_files)))
+    progresso(0.45, 'Calculando estatísticas')
+    stats = calcular_estatisticas(df_completo)
+    imprimir_resumo(df_completo, stats)
+
+    # ============================================================================
+    # VISUALIZAÇÕES
+    # ============================================================================
+    progresso(0.6, 'Gerando a figura consolidada')
+    renderizou = salvar_visualizacao(stats, cache, formato, dpi, fechar=not mostrar)
+
+    # Salvar DataFrame consolidado e relatório de municípios com múltiplas linhas
+    progresso(0.8, 'Gravando tabelas, snapshot e cubo')
+    df_multiplas = montar_relatorio_multiplas(stats)
+    salvar_consolidado(df_completo, cache, csv_files)
+    salvar_multiplas(df_multiplas, cache, csv_files)
+    salvar_snapshot(df_completo, df_multiplas)
+    salvar_cubo(stats['cubo'], cache, csv_files)
+
+    cache.imprimir_resumo()
+    progresso(1.0, 'Análise concluída')
+
+    print("\n" + "=" * 80)
+    print("✅ ANÁLISE CONCLUÍDA COM SUCESSO!")
+    print("=" * 80)
+
+    if mostrar and renderizou:
+        plt.show()
+    return df_completo, df_multiplas
+
+
+def main(argv=None):
+    parser = adicionar_argumento_force(argparse.ArgumentParser(description='Consolida os CSVs de per_layer/'))
+    parser.add_argument('--headless', action='store_true',
+                        help='Modo batch: backend não interativo, sem plt.show()')
+    parser.add_argument('--formato', choices=FORMATOS_FIGURA, default='png',
+                        help='Formato da figura (svg para a web, png para impressão)')
+    parser.add_argument('--dpi', type=int, default=DPI_PADRAO, help=f'Resolução do PNG (padrão: {DPI_PADRAO})')
+    args = parser.parse_args(argv)
+    if args.headless:
+        matplotlib.use('Agg')
+    executar(CacheArtefatos(force=args.force), mostrar=not args.headless, formato=args.formato, dpi=args.dpi)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,410 @@
+"""
+API local de consulta - municípios afetados por linhas de transmissão
+Servidor HTTP (biblioteca padrão, sem dependências extras) para outras
+ferramentas consultarem os resultados sem passar pelo Streamlit ou pelos HTML.
+
+Os dados consolidados, o cubo e as geometrias dos municípios são carregados uma
+vez e organizados em índices em memória (por estado × voltagem, por código, por
+nome e o ranking já ordenado): cada consulta só percorre o próprio resultado.
+Quando os CSVs são reprocessados (versão nova publicada), os índices são
+refeitos na próxima consulta.
+
+Respostas em JSON, com ETag (hash do conteúdo; If-None-Match -> 304)
+e gzip quando o cliente aceita.
+
+Rotas:
+    GET /                                               índice de rotas e versão dos dados
+    GET /municipios?estado=PR,SC&voltagem=230,525       municípios por estado/voltagem
+    GET /linhas?municipio=Cascavel&estado=PR            linhas no município (nome ou CD_MUN)
+        &geometria=1                                    (opcional) polígono em GeoJSON (409 se a malha faltar)
+    GET /ranking?estado=PR&minimo=2&limite=20           ranking de multiplicidade
+    GET /faixa?lat=-25.43&lon=-49.27                     ponto dentro de faixa de servidão? (consulta_faixa.py)
+    POST /faixa/lote[?somente_dentro=1]                  idem em lote: corpo CSV com colunas lat/lon -> CSV
+
+Uso:
+    python api_consulta.py                    # http://127.0.0.1:8600
+    python api_consulta.py --host 0.0.0.0 --porta 8080
+"""
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import gzip
+import io
+import json
+import math
+import threading
+
+import consulta_faixa
+import cubo_estatisticas
+import modelo_dados
+import municipios_ibge
+import reprocessamento
+from cache_artefatos import hash_bytes
+
+BASE_DIR = Path(__file__).parent
+
+HOST = '127.0.0.1'
+PORTA = 8600
+GZIP_MINIMO = 1024       # bytes; respostas menores vão sem compressão
+LIMITE_PADRAO = 20
+RESPOSTAS_EM_CACHE = 512  # corpos JSON já serializados (por versão + consulta)
+LOTE_MAXIMO = 256 * 1024 * 1024  # bytes aceitos no corpo de POST /faixa/lote
+
+CAMPOS_MUNICIPIO = ['CD_MUN', 'NM_MUN', 'Estado', 'Num_Linhas', 'Voltagens', 'Exclusivo']
+
+
+class ErroConsulta(Exception):
+    """Parâmetro inválido ou recurso inexistente (vira uma resposta JSON com o status)."""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _lista(params, nome):
+    """'PR,SC' ou ?estado=PR&estado=SC -> ['PR', 'SC'] (vazio = sem filtro)."""
+    return [v.strip() for valor in params.get(nome, []) for v in valor.split(',') if v.strip()]
+
+
+def _inteiro(params, nome, padrao):
+    valores = params.get(nome)
+    if not valores:
+        return padrao
+    try:
+        return int(valores[-1])
+    except ValueError:
+        raise ErroConsulta(f"Parâmetro '{nome}' deve ser inteiro")
+
+
+def _real(params, nome):
+    valores = params.get(nome)
+    if not valores:
+        raise ErroConsulta(f"Informe o parâmetro '{nome}'")
+    try:
+        valor = float(valores[-1])
+    except ValueError:
+        raise ErroConsulta(f"Parâmetro '{nome}' deve ser numérico")
+    if not math.isfinite(valor):
+        raise ErroConsulta(f"Parâmetro '{nome}' deve ser um número finito")
+    return valor
+
+
+@lru_cache(maxsize=1)
+def indice_faixa() -> consulta_faixa.IndiceFaixa:
+    """Índice das faixas de servidão (carregado na primeira consulta de /faixa)."""
+    return consulta_faixa.IndiceFaixa.carregar()
+
+
+class Indice:
+    """Índices em memória de uma versão dos dados."""
+
+    def __init__(self, versao, df, cubo):
+        self.versao = versao
+        self.estados = cubo.estados()
+        self.voltagens = cubo.voltagens()
+
+        mun = cubo.municipios()
+        mun['Estado'] = mun['Estado'].astype(str)
+        mun['NM_MUN'] = mun['NM_MUN'].astype(str)
+        mun['CD_MUN'] = mun['CD_MUN'].astype(int)
+        # registro de cada município (na ordem alfabética do cubo)
+        self.municipios = {int(r['CD_MUN']): r for r in mun[CAMPOS_MUNICIPIO].to_dict('records')}
+        self.ordem = {cd: i for i, cd in enumerate(self.municipios)}
+
+        # (estado, voltagem) -> códigos em ordem alfabética
+        esp = cubo.especificas
+        self.por_filtro = {
+            (str(uf), str(v)): sorted(grupo['CD_MUN'].astype(int).unique(), key=self.ordem.__getitem__)
+            for (uf, v), grupo in esp.groupby(['Estado', 'Voltagem'], observed=True)
+        }
+
+        # município -> linhas que o atravessam (ordem numérica das voltagens)
+        espec = modelo_dados.especificas(df).dropna(subset=['CD_MUN']).sort_values('Voltagem_kV')
+        self.linhas = {int(cd): [{'linha': str(l), 'voltagem': str(v)}
+                                 for l, v in zip(grupo['Linha'], grupo['Voltagem'])]
+                       for cd, grupo in espec.groupby('CD_MUN', sort=False)}
+
+        # nome normalizado -> códigos (nomes se repetem entre UFs)
+        self.por_nome = {}
+        for cd, registro in self.municipios.items():
+            self.por_nome.setdefault(municipios_ibge.normalizar_nome(registro['NM_MUN']), []).append(cd)
+
+        # ranking de multiplicidade: geral e por estado, já ordenados
+        ordenados = sorted(self.municipios.values(), key=lambda r: (-r['Num_Linhas'], r['NM_MUN'], r['Estado']))
+        self.ranking = {None: ordenados}
+        for uf in self.estados:
+            self.ranking[uf] = [r for r in ordenados if r['Estado'] == uf]
+
+        self._geometrias = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def carregar(cls, versao):
+        df, _, _ = modelo_dados.carregar()
+        return cls(versao, df, cubo_estatisticas.carregar())
+
+    def geometria(self, cd_mun):
+        """GeoJSON do polígono do município (malhas do IBGE); None se a malha da UF faltar."""
+        with self._lock:
+            if self._geometrias is None:
+                gdf = municipios_ibge.geometrias_municipios()
+                self._geometrias = dict(zip(gdf['CD_MUN'].astype(int), gdf.geometry))
+        geom = self._geometrias.get(cd_mun)
+        return None if geom is None else geom.__geo_interface__
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _validar(self, valores, conhecidos, nome):
+        desconhecidos = [v for v in valores if v not in conhecidos]
+        if desconhecidos:
+            raise ErroConsulta(f"{nome} desconhecido(s): {', '.join(desconhecidos)} "
+                               f"(disponíveis: {', '.join(conhecidos)})")
+
+    def consultar_municipios(self, params):
+        estados = [e.upper() for e in _lista(params, 'estado')] or self.estados
+        voltagens = _lista(params, 'voltagem') or self.voltagens
+        self._validar(estados, self.estados, 'Estado')
+        self._validar(voltagens, self.voltagens, 'Voltagem')
+        # forma canônica: a ordem dos parâmetros não muda a resposta (nem o ETag)
+        estados = [uf for uf in self.estados if uf in estados]
+        voltagens = [v for v in self.voltagens if v in voltagens]
+        codigos = set()
+        for uf in estados:
+            for v in voltagens:
+                codigos.update(self.por_filtro.get((uf, v), ()))
+        municipios = [self.municipios[cd] for cd in sorted(codigos, key=self.ordem.__getitem__)]
+        return {'estados': estados, 'voltagens': voltagens, 'total': len(municipios), 'municipios': municipios}
+
+    def consultar_linhas(self, params):
+        termo = (params.get('municipio') or [''])[-1].strip()
+        if not termo:
+            raise ErroConsulta("Informe ?municipio=<nome ou CD_MUN>")
+        estados = [e.upper() for e in _lista(params, 'estado')]
+        if termo.isdigit():
+            codigos = [int(termo)] if int(termo) in self.municipios else []
+        else:
+            codigos = self.por_nome.get(municipios_ibge.normalizar_nome(termo), [])
+        if estados:
+            codigos = [cd for cd in codigos if self.municipios[cd]['Estado'] in estados]
+        if not codigos:
+            raise ErroConsulta(f"Município não afetado ou inexistente: {termo}", status=404)
+        com_geometria = (params.get('geometria') or ['0'])[-1] in ('1', 'true', 'sim')
+        resultado = []
+        for cd in codigos:
+            item = {**self.municipios[cd], 'linhas': self.linhas.get(cd, [])}
+            if com_geometria:
+                item['geometria'] = self.geometria(cd)
+            resultado.append(item)
+        sem_poligono = [item for item in resultado if item.get('geometria', True) is None]
+        if sem_poligono:
+            ufs = sorted({str(item['Estado']) for item in sem_poligono})
+            raise ErroConsulta(f"Polígono indisponível para CD_MUN {', '.join(str(i['CD_MUN']) for i in sem_poligono)} "
+                               f"(malha municipal sem .shp: {', '.join(ufs)}); repita sem geometria=1", status=409)
+        return {'total': len(resultado), 'municipios': resultado}
+
+    def consultar_ranking(self, params):
+        estados = [e.upper() for e in _lista(params, 'estado')]
+        if len(estados) > 1:
+            raise ErroConsulta("Informe no máximo um estado no ranking")
+        uf = estados[0] if estados else None
+        if uf is not None:
+            self._validar([uf], self.estados, 'Estado')
+        minimo = _inteiro(params, 'minimo', 1)
+        limite = _inteiro(params, 'limite', LIMITE_PADRAO)
+        if limite < 1:
+            raise ErroConsulta("Parâmetro 'limite' deve ser positivo")
+        ranking = []
+        for registro in self.ranking[uf]:   # ordem decrescente: para no primeiro abaixo do mínimo
+            if registro['Num_Linhas'] < minimo or len(ranking) == limite:
+                break
+            ranking.append({'posicao': len(ranking) + 1, **registro})
+        return {'estado': uf, 'minimo': minimo, 'total': len(ranking), 'ranking': ranking}
+
+
+def consultar_faixa(indice, params):
+    lat, lon = _real(params, 'lat'), _real(params, 'lon')
+    faixas = indice_faixa().consultar(lat, lon)
+    for f in faixas:
+        del f['lat'], f['lon']
+    resposta = {'lat': lat, 'lon': lon, 'dentro': bool(faixas), 'faixas': faixas}
+    if indice_faixa().ufs_sem_malha:
+        resposta['aviso'] = (f"Sem polígonos de municípios para {', '.join(indice_faixa().ufs_sem_malha)}: "
+                             f"CD_MUN/NM_MUN/UF vazios para pontos nessas UFs")
+    return resposta
+
+
+ROTAS = {
+    '/municipios': Indice.consultar_municipios,
+    '/linhas': Indice.consultar_linhas,
+    '/ranking': Indice.consultar_ranking,
+    '/faixa': consultar_faixa,
+}
+
+
+class Servico:
+    """Índice da versão publicada dos dados, refeito quando a versão muda."""
+
+    def __init__(self, arquivos=reprocessamento.ARQUIVOS_DADOS):
+        self.arquivos = arquivos
+        self._indice = None
+        self._lock = threading.Lock()
+
+    def indice(self) -> Indice:
+        versao = reprocessamento.versao_dados(self.arquivos)
+        atual = self._indice
+        if atual is not None and atual.versao == versao:
+            return atual
+        with self._lock:
+            if self._indice is None or self._indice.versao != versao:
+                print(f"🔨 Carregando índices (versão dos dados {versao:.0f})")
+                self._indice = Indice.carregar(versao)
+                _responder.cache_clear()
+            return self._indice
+
+    def responder(self, caminho, consulta):
+        """(status, etag, corpo JSON, corpo gzip ou None) de uma requisição GET."""
+        indice = self.indice()
+        rota = caminho.rstrip('/') or '/'
+        params = parse_qs(consulta, keep_blank_values=False)
+        chave = tuple(sorted((k, tuple(v)) for k, v in params.items()))
+        return _responder(indice, rota, chave)
+
+
+@lru_cache(maxsize=RESPOSTAS_EM_CACHE)
+def _responder(indice, rota, chave):
+    params = {k: list(v) for k, v in chave}
+    try:
+        if rota == '/':
+            dados = {'versao': indice.versao, 'rotas': sorted(ROTAS),
+                     'estados': indice.estados, 'voltagens': indice.voltagens}
+        elif rota in ROTAS:
+            dados = ROTAS[rota](indice, params)
+        else:
+            raise ErroConsulta(f"Rota inexistente: {rota} (disponíveis: {', '.join(sorted(ROTAS))})", status=404)
+        status = 200
+    except ErroConsulta as e:
+        dados, status = {'erro': str(e)}, e.status
+    corpo = json.dumps(dados, ensure_ascii=False, default=str).encode('utf-8')
+    etag = f'"{hash_bytes(corpo)[:20]}"'  # pelo conteúdo: consultas equivalentes compartilham o ETag
+    return status, etag, corpo, _comprimir(corpo)
+
+
+def _comprimir(corpo):
+    return gzip.compress(corpo, compresslevel=6) if len(corpo) >= GZIP_MINIMO else None
+
+
+def consultar_faixa_lote(csv: bytes, params) -> bytes:
+    """POST /faixa/lote: CSV de pontos -> CSV com uma linha por (ponto, faixa); consulta vetorizada."""
+    try:
+        pontos = consulta_faixa.ler_pontos_csv(io.BytesIO(csv), (params.get('lat') or [None])[-1],
+                                               (params.get('lon') or [None])[-1])
+    except Exception as e:
+        raise ErroConsulta(f"CSV de pontos inválido: {e}")
+    somente_dentro = (params.get('somente_dentro') or ['0'])[-1] in ('1', 'true', 'sim')
+    resultado = indice_faixa().consultar_lote(pontos['lat'], pontos['lon'], somente_dentro=somente_dentro)
+    return resultado.to_csv(index=False).encode('utf-8')
+
+
+class Handler(BaseHTTPRequestHandler):
+    servico: Servico = None
+    server_version = 'LinhasTransmissaoAPI/1.0'
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        try:
+            status, etag, corpo, comprimido = self.servico.responder(partes.path, partes.query)
+        except Exception as e:
+            print(f"⚠️  Falha ao responder {self.path}: {e}")
+            status, etag, corpo, comprimido = 500, None, _erro_interno(), None
+
+        if etag and status == 200 and etag in _etags(self.headers.get('If-None-Match', '')):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+        self._enviar(status, corpo, comprimido, etag=etag if status == 200 else None)
+
+    def do_POST(self):
+        partes = urlsplit(self.path)
+        tipo = 'application/json; charset=utf-8'
+        try:
+            if partes.path.rstrip('/') != '/faixa/lote':
+                raise ErroConsulta(f"Rota inexistente para POST: {partes.path} (disponível: /faixa/lote)", status=404)
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            if tamanho > LOTE_MAXIMO:
+                raise ErroConsulta(f"Lote acima de {LOTE_MAXIMO // 2**20} MB", status=413)
+            if tamanho <= 0:
+                raise ErroConsulta("Envie o CSV de pontos no corpo da requisição")
+            corpo = self.rfile.read(tamanho)
+            if self.headers.get('Content-Encoding') == 'gzip':
+                corpo = gzip.decompress(corpo)
+            corpo = consultar_faixa_lote(corpo, parse_qs(partes.query))
+            status, tipo = 200, 'text/csv; charset=utf-8'
+        except ErroConsulta as e:
+            status, corpo = e.status, json.dumps({'erro': str(e)}, ensure_ascii=False).encode('utf-8')
+        except Exception as e:
+            print(f"⚠️  Falha ao responder {self.path}: {e}")
+            status, corpo = 500, _erro_interno()
+        self._enviar(status, corpo, _comprimir(corpo) if status == 200 else None, tipo=tipo)
+
+    def _enviar(self, status, corpo, comprimido=None, etag=None, tipo='application/json; charset=utf-8'):
+        usar_gzip = comprimido is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        enviado = comprimido if usar_gzip else corpo
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(enviado)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if usar_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')  # revalida: muda quando os dados são reprocessados
+        self.end_headers()
+        self.wfile.write(enviado)
+
+    def log_message(self, formato, *args):
+        print(f"  {self.address_string()} {formato % args}")
+
+
+def _erro_interno():
+    return json.dumps({'erro': 'Falha interna ao consultar os dados'}, ensure_ascii=False).encode('utf-8')
+
+
+def _etags(cabecalho):
+    return {e.strip().removeprefix('W/') for e in cabecalho.split(',') if e.strip()}
+
+
+def criar_servidor(host=HOST, porta=PORTA, servico=None):
+    handler = type('HandlerConsulta', (Handler,), {'servico': servico or Servico()})
+    return ThreadingHTTPServer((host, porta), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='API local de consulta dos municípios afetados')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--porta', type=int, default=PORTA)
+    args = parser.parse_args(argv)
+
+    servidor = criar_servidor(args.host, args.porta)
+    try:
+        servidor.RequestHandlerClass.servico.indice()  # carrega os índices antes da primeira consulta
+    except FileNotFoundError:
+        print("⚠️  Dados consolidados não encontrados. Execute primeiro analise_consolidada.py")
+        return 1
+    print(f"✓ API em http://{args.host}:{args.porta}/ (Ctrl+C para encerrar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
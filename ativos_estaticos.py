@@ -0,0 +1,249 @@
+"""
+Ativos estáticos compartilhados (uso offline) - outputs/static/
+As bibliotecas JS/CSS que os relatórios e os mapas buscavam em CDNs (Plotly,
+Leaflet, Bootstrap, jQuery, Font Awesome...) são baixadas uma única vez e
+gravadas com o hash do conteúdo no nome (ex.: plotly-2.35.2.min.3f2a9c1e0b.js).
+As páginas passam a apontar para esses arquivos: abrem sem internet e o
+navegador reaproveita o cache entre todas as páginas (nome imutável).
+
+Fontes e imagens referenciadas pelas folhas de estilo (url(...)) também são
+copiadas. Se o download falhar (máquina sem acesso à CDN), a página mantém o
+endereço original, e a URL só é tentada de novo depois de FALHA_ESPERA (as
+falhas ficam em .cache/ativos_falhas.json, valendo entre execuções).
+
+Manifesto URL → arquivo: outputs/static/manifest.json
+
+Uso:
+    python ativos_estaticos.py            # baixa/atualiza os ativos e reescreve as páginas de outputs/
+    python ativos_estaticos.py --listar   # mostra o manifesto
+    python ativos_estaticos.py --repetir  # tenta de novo também as URLs que falharam há pouco
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import threading
+import time
+import urllib.request
+
+BASE_DIR = Path(__file__).parent
+OUT_DIR = BASE_DIR / 'outputs'
+STATIC_DIR = OUT_DIR / 'static'
+MANIFESTO = STATIC_DIR / 'manifest.json'
+FALHAS = BASE_DIR / '.cache' / 'ativos_falhas.json'
+
+PLOTLY_JS = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+TIMEOUT = 30
+DOWNLOADS_SIMULTANEOS = 8
+FALHA_ESPERA = 6 * 3600  # s até tentar de novo uma URL que falhou
+
+# <script src="https://..."> e <link href="https://....css">
+PADRAO_URL = re.compile(r'''(?P<attr>src|href)=(?P<q>["'])(?P<url>https?://[^"']+?\.(?:js|css))(?P=q)''')
+PADRAO_CSS_URL = re.compile(r'''url\(\s*(?P<q>["']?)(?P<url>[^"')]+)(?P=q)\s*\)''')
+
+_lock = threading.Lock()  # só para ler/gravar manifesto e falhas; os downloads correm fora dele
+_travas_url = {}  # url -> Lock: a mesma URL não é baixada por duas threads ao mesmo tempo
+
+
+def _ler_manifesto() -> dict:
+    try:
+        return json.loads(MANIFESTO.read_text(encoding='utf-8'))
+    except Exception:
+        return {}
+
+
+def _gravar_manifesto(manifesto: dict):
+    STATIC_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFESTO.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp.write_text(json.dumps(manifesto, ensure_ascii=False, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, MANIFESTO)
+
+
+def _ler_falhas() -> dict:
+    try:
+        return json.loads(FALHAS.read_text(encoding='utf-8'))
+    except Exception:
+        return {}
+
+
+def _falhou_recentemente(url: str) -> bool:
+    with _lock:
+        return time.time() - _ler_falhas().get(url, 0) < FALHA_ESPERA
+
+
+def _anotar_falha(url: str, falhou=True):
+    """Registra (ou, depois de um download bem-sucedido, apaga) a falha da URL em .cache/ativos_falhas.json."""
+    with _lock:
+        falhas = _ler_falhas()
+        if falhou:
+            falhas[url] = time.time()
+        elif falhas.pop(url, None) is None:
+            return
+        FALHAS.parent.mkdir(parents=True, exist_ok=True)
+        tmp = FALHAS.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_text(json.dumps(falhas, indent=1, sort_keys=True), encoding='utf-8')
+        os.replace(tmp, FALHAS)
+
+
+def _baixar(url: str) -> bytes:
+    req = urllib.request.Request(url, headers={'User-Agent': 'linhas-transmissao/ativos'})
+    with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+        return resp.read()
+
+
+def _nome_com_hash(url: str, conteudo: bytes) -> str:
+    """'leaflet.css' + conteúdo -> 'leaflet.<hash10>.css'."""
+    nome = posixpath.basename(urlsplit(url).path) or 'ativo'
+    raiz, ext = posixpath.splitext(nome)
+    return f"{raiz}.{hashlib.sha256(conteudo).hexdigest()[:10]}{ext}"
+
+
+def _gravar(url: str, conteudo: bytes, manifesto: dict) -> str:
+    nome = _nome_com_hash(url, conteudo)
+    destino = STATIC_DIR / nome
+    if not destino.exists():
+        STATIC_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_suffix(f'{destino.suffix}.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_bytes(conteudo)
+        os.replace(tmp, destino)
+    manifesto[url] = nome
+    return nome
+
+
+def _copiar_referencias_css(url_css: str, conteudo: bytes, manifesto: dict) -> bytes:
+    """Baixa fontes/imagens de url(...) e reescreve as referências para os arquivos locais."""
+    texto = conteudo.decode('utf-8')
+
+    def trocar(m):
+        ref = m.group('url').strip()
+        if ref.startswith(('data:', '#')):
+            return m.group(0)
+        absoluta = urljoin(url_css, ref)
+        sem_fragmento = absoluta.split('#')[0].split('?')[0]
+        nome = manifesto.get(sem_fragmento)
+        if nome is None:
+            try:
+                nome = _gravar(sem_fragmento, _baixar(absoluta), manifesto)
+            except Exception:
+                return f"url({m.group('q')}{absoluta}{m.group('q')})"
+        sufixo = absoluta[len(sem_fragmento):]
+        return f"url({m.group('q')}{nome}{sufixo}{m.group('q')})"
+
+    return PADRAO_CSS_URL.sub(trocar, texto).encode('utf-8')
+
+
+def vendorizar(url: str, manifesto: dict | None = None) -> str | None:
+    """Nome do arquivo local (em outputs/static/) para a URL; baixa na primeira vez.
+    Retorna None se não foi possível obter o ativo (ou se ele falhou há menos de FALHA_ESPERA).
+    """
+    with _lock:
+        trava_url = _travas_url.setdefault(url, threading.Lock())
+    with trava_url:
+        with _lock:
+            conhecidos = dict(_ler_manifesto() if manifesto is None else manifesto)
+        nome = conhecidos.get(url)
+        if nome and (STATIC_DIR / nome).exists():
+            return nome
+        if _falhou_recentemente(url):
+            return None
+        try:
+            conteudo = _baixar(url)
+            if url.endswith('.css'):
+                conteudo = _copiar_referencias_css(url, conteudo, conhecidos)
+            nome = _gravar(url, conteudo, conhecidos)
+        except Exception as e:
+            _anotar_falha(url)
+            print(f"⚠️  Ativo não baixado ({url}): {e}; mantendo a CDN")
+            return None
+        _anotar_falha(url, falhou=False)
+        with _lock:  # mescla com o que outras threads/processos gravaram enquanto baixávamos
+            atual = _ler_manifesto()
+            atual.update({u: n for u, n in conhecidos.items() if u not in atual})
+            atual[url] = nome
+            _gravar_manifesto(atual)
+            if manifesto is not None:
+                manifesto.update(atual)
+        return nome
+
+
+def reescrever(html: str, destino) -> str:
+    """Troca os endereços de CDN da página pelos arquivos de outputs/static/ (caminho relativo a destino)."""
+    base = Path(destino).resolve().parent
+    rel_static = Path(os.path.relpath(STATIC_DIR.resolve(), base)).as_posix()
+    locais = {}
+
+    def trocar(m):
+        url = m.group('url')
+        if url not in locais:
+            locais[url] = vendorizar(url)
+        nome = locais[url]
+        if nome is None:
+            return m.group(0)
+        return f"{m.group('attr')}={m.group('q')}{rel_static}/{nome}{m.group('q')}"
+
+    return PADRAO_URL.sub(trocar, html)
+
+
+def reescrever_arquivo(caminho) -> bool:
+    """Aplica reescrever() a uma página já gravada (ex.: mapas salvos pelo folium).
+    Retorna True se a página mudou."""
+    caminho = Path(caminho)
+    html = caminho.read_text(encoding='utf-8')
+    novo = reescrever(html, caminho)
+    if novo != html:
+        caminho.write_text(novo, encoding='utf-8')
+    return novo != html
+
+
+def urls_em_uso(paginas) -> list:
+    """URLs de CDN referenciadas pelas páginas (para pré-baixar os ativos)."""
+    urls = {PLOTLY_JS} | set(_ler_manifesto())
+    for pagina in paginas:
+        try:
+            urls.update(m.group('url') for m in PADRAO_URL.finditer(Path(pagina).read_text(encoding='utf-8')))
+        except OSError:
+            continue
+    return sorted(urls)
+
+
+def vendorizar_todos(urls) -> dict:
+    """{url: nome local ou None}, baixando as URLs em paralelo."""
+    urls = list(urls)
+    with ThreadPoolExecutor(max_workers=DOWNLOADS_SIMULTANEOS) as executor:
+        return dict(zip(urls, executor.map(vendorizar, urls)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Baixa os ativos JS/CSS das CDNs para outputs/static/')
+    parser.add_argument('--listar', action='store_true', help='Mostra o manifesto e sai')
+    parser.add_argument('--repetir', action='store_true',
+                        help=f'Tenta de novo as URLs que falharam há menos de {FALHA_ESPERA // 3600} h')
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        for url, nome in sorted(_ler_manifesto().items()):
+            print(f"  • {nome:<50} ← {url}")
+        return 0
+
+    if args.repetir:
+        FALHAS.unlink(missing_ok=True)
+    paginas = sorted(OUT_DIR.glob('*.html')) + sorted((OUT_DIR / 'mapas').glob('*.html'))
+    urls = urls_em_uso(paginas)
+    print(f"📦 {len(urls)} ativos referenciados por {len(paginas)} páginas")
+    faltando = [url for url, nome in vendorizar_todos(urls).items() if nome is None]
+    print(f"✓ Ativos em: {STATIC_DIR}")
+    # páginas já geradas passam a apontar para os arquivos locais
+    reescritas = sum(reescrever_arquivo(pagina) for pagina in paginas)
+    print(f"✓ {reescritas} de {len(paginas)} páginas reescritas para usar outputs/static/")
+    if faltando:
+        print(f"⚠️  {len(faltando)} ativos continuam na CDN")
+    return 1 if faltando else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
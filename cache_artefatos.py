@@ -0,0 +1,211 @@
+"""
+Cache de artefatos endereçado por conteúdo
+Cada saída é marcada com o hash das suas entradas (arquivos-fonte, parâmetros e versão do código).
+Se o hash não mudou desde a última geração, a saída não é regenerada.
+Manifesto: .cache/artefatos.json (gravado sob trava entre processos: .cache/artefatos.lock)
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+import time
+
+from reprocessamento import TravaArquivo
+
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = BASE_DIR / '.cache'
+MANIFESTO = CACHE_DIR / 'artefatos.json'
+TRAVA_MANIFESTO = CACHE_DIR / 'artefatos.lock'
+TRAVA_EXPIRA = 60  # s; a trava só cobre ler-mesclar-gravar o manifesto
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def _manifesto_travado():
+    """Exclusão na atualização do manifesto: entre threads (_lock) e entre processos (arquivo de trava),
+    para que geradores rodando em paralelo (ex.: um script avulso ao lado do pipeline) não percam registros."""
+    trava = TravaArquivo(TRAVA_MANIFESTO, expira=TRAVA_EXPIRA)
+    with _lock:
+        while not trava.tentar():
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            trava.liberar()
+
+
+def _rel(path) -> str:
+    """Caminho relativo ao projeto (chave estável no manifesto)."""
+    p = Path(path).resolve()
+    try:
+        return p.relative_to(BASE_DIR.resolve()).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+
+def _ler_manifesto() -> dict:
+    try:
+        return json.loads(MANIFESTO.read_text(encoding='utf-8'))
+    except Exception:
+        return {'arquivos': {}, 'artefatos': {}}
+
+
+def _gravar_manifesto(manifesto: dict):
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp = MANIFESTO.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp.write_text(json.dumps(manifesto, ensure_ascii=False, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, MANIFESTO)
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_valor(valor) -> str:
+    """Hash estável de parâmetros (dict/list/str/números) serializados em JSON ordenado."""
+    return hash_bytes(json.dumps(valor, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+
+
+def hash_arquivo(path, stat_cache: dict | None = None) -> str | None:
+    """SHA-256 do conteúdo do arquivo (None se não existir).
+    Reaproveita o hash anterior quando tamanho e mtime não mudaram (como o índice do git).
+    """
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    chave = _rel(path)
+    if stat_cache is not None:
+        anterior = stat_cache.get(chave)
+        if anterior and anterior.get('size') == st.st_size and anterior.get('mtime_ns') == st.st_mtime_ns:
+            return anterior['sha256']
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    digest = h.hexdigest()
+    if stat_cache is not None:
+        stat_cache[chave] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+    return digest
+
+
+class CacheArtefatos:
+    """Decide se cada saída precisa ser regenerada e registra o motivo.
+
+    Uso típico:
+        cache = CacheArtefatos(force=args.force)
+        if cache.verificar(saida, entradas=[...], parametros={...}, codigo=[__file__]):
+            ... gera a saída ...
+            cache.registrar(saida)
+        cache.imprimir_resumo()
+    """
+
+    def __init__(self, force: bool = False):
+        self.force = force
+        self.reconstruidos = []  # (saida, motivo)
+        self.ignorados = []      # saida
+        self.registrados = []    # saida efetivamente gerada e registrada (reconstruída com sucesso)
+        self._pendentes = {}     # saida -> assinatura calculada em verificar()
+        with _lock:
+            self._stat_cache = _ler_manifesto().get('arquivos', {})
+
+    def assinatura(self, entradas=(), parametros=None, codigo=()) -> dict:
+        """Calcula os hashes das componentes que determinam uma saída."""
+        ent = {}
+        for p in entradas:
+            ent[_rel(p)] = hash_arquivo(p, self._stat_cache)
+        cod = {}
+        for p in codigo:
+            cod[_rel(p)] = hash_arquivo(p, self._stat_cache)
+        assin = {
+            'entradas': ent,
+            'parametros': hash_valor(parametros) if parametros is not None else None,
+            'codigo': hash_valor(cod),
+        }
+        assin['chave'] = hash_valor(assin)
+        return assin
+
+    def _motivo(self, saida: Path, anterior: dict | None, atual: dict) -> str | None:
+        if self.force:
+            return 'forçado (--force)'
+        if not saida.exists():
+            return 'saída ausente'
+        if anterior is None:
+            return 'sem registro no cache'
+        if anterior.get('saida') != hash_arquivo(saida, self._stat_cache):
+            return 'saída modificada fora do pipeline'
+        if anterior.get('chave') == atual['chave']:
+            return None
+        ent_ant = anterior.get('entradas', {})
+        alteradas = [p for p, h in atual['entradas'].items() if ent_ant.get(p) != h]
+        removidas = [p for p in ent_ant if p not in atual['entradas']]
+        motivos = []
+        if alteradas:
+            motivos.append('entrada alterada: ' + ', '.join(alteradas))
+        if removidas:
+            motivos.append('entrada removida: ' + ', '.join(removidas))
+        if anterior.get('parametros') != atual['parametros']:
+            motivos.append('parâmetros alterados')
+        if anterior.get('codigo') != atual['codigo']:
+            motivos.append('código alterado')
+        return '; '.join(motivos) or 'assinatura alterada'
+
+    def verificar(self, saida, entradas=(), parametros=None, codigo=()) -> bool:
+        """Retorna True se a saída precisa ser (re)gerada; False se pode ser reaproveitada."""
+        saida = Path(saida)
+        atual = self.assinatura(entradas, parametros, codigo)
+        with _lock:
+            anterior = _ler_manifesto().get('artefatos', {}).get(_rel(saida))
+        motivo = self._motivo(saida, anterior, atual)
+        if motivo is None:
+            self.ignorados.append(_rel(saida))
+            return False
+        self._pendentes[_rel(saida)] = atual
+        self.reconstruidos.append((_rel(saida), motivo))
+        return True
+
+    def verificado(self, saida) -> bool:
+        """True se a saída já passou por verificar() nesta execução (evita checá-la de novo)."""
+        chave = _rel(saida)
+        return chave in self.ignorados or any(s == chave for s, _ in self.reconstruidos)
+
+    def registrar(self, saida):
+        """Grava no manifesto a assinatura da saída recém-gerada."""
+        chave = _rel(saida)
+        assin = self._pendentes.pop(chave, None)
+        if assin is None:
+            return
+        self.registrados.append(chave)
+        with _manifesto_travado():
+            manifesto = _ler_manifesto()
+            manifesto.setdefault('arquivos', {}).update(self._stat_cache)
+            assin = dict(assin, saida=hash_arquivo(saida, manifesto['arquivos']))
+            manifesto.setdefault('artefatos', {})[chave] = assin
+            self._stat_cache.update(manifesto['arquivos'])
+            _gravar_manifesto(manifesto)
+
+    def imprimir_resumo(self):
+        print("\n" + "-" * 60)
+        print("CACHE DE ARTEFATOS")
+        print("-" * 60)
+        if self.reconstruidos:
+            print(f"🔨 Regenerados: {len(self.reconstruidos)}")
+            for saida, motivo in self.reconstruidos:
+                print(f"  • {saida} — {motivo}")
+        if self.ignorados:
+            print(f"♻️  Sem alterações (reaproveitados): {len(self.ignorados)}")
+            for saida in self.ignorados:
+                print(f"  • {saida}")
+        if not self.reconstruidos and not self.ignorados:
+            print("  (nenhuma saída verificada)")
+
+
+def adicionar_argumento_force(parser):
+    """Acrescenta a opção --force comum a todos os geradores."""
+    parser.add_argument('--force', action='store_true',
+                        help='Regenera todas as saídas, ignorando o cache de artefatos')
+    return parser
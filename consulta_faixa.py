@@ -0,0 +1,285 @@
+"""
+Consulta ponto × faixa de servidão
+"Esta coordenada está dentro da faixa de servidão de alguma linha de 230/500/
+525/600/765 kV? De qual linha?"
+
+A faixa de cada linha (faixa_servidao.gpkg, camadas linha_transmissao_{voltagem})
+é o entorno do eixo com a largura de FAIXA_METROS: um ponto está na faixa
+quando a distância ao eixo é no máximo a largura (o mesmo que estar dentro do
+buffer, sem guardar os polígonos). Os eixos ficam projetados em SIRGAS 2000 /
+Brazil Polyconic (metros) em .cache/faixa/, refeitos só quando o GPKG, as
+larguras ou este código mudam.
+
+Em memória ficam duas STRtree: trechos curtos dos eixos (TRECHO_VERTICES
+vértices cada; o retângulo envolvente de uma linha inteira de centenas de km
+casaria com quase todos os pontos) e polígonos dos municípios (malhas do IBGE
+das UFs do projeto; UF sem polígonos é avisada e fica sem município no resultado).
+As consultas em lote são vetorizadas (STRtree.query 'dwithin' com todos os
+pontos de uma vez e distâncias calculadas em arrays), sem laço por ponto.
+
+Resultado por (ponto, linha): Nome, Voltagem, distância ao eixo da linha (m),
+CD_MUN/NM_MUN/UF do município que contém o ponto.
+
+Uso:
+    python consulta_faixa.py --ponto -25.4284 -49.2733          # lat lon
+    python consulta_faixa.py --csv pontos.csv --saida resultado.csv [--lat lat --lon lon]
+"""
+from functools import cached_property
+from pathlib import Path
+import argparse
+import sys
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+
+from cache_artefatos import CacheArtefatos
+import municipios_ibge
+
+BASE_DIR = Path(__file__).parent
+FAIXA_SERVIDAO_GPKG = BASE_DIR / 'faixa_servidao.gpkg'
+CACHE_DIR = BASE_DIR / '.cache' / 'faixa'
+CORREDORES_PARQUET = CACHE_DIR / 'corredores.parquet'
+
+# Largura da faixa de servidão aproximada (metros para cada lado do eixo), por voltagem
+FAIXA_METROS = {'230': 60, '500': 80, '525': 80, '600': 90, '765': 100}
+CRS_METRICO = 'EPSG:5880'  # SIRGAS 2000 / Brazil Polyconic: distâncias em metros em toda a Região Sul
+TRECHO_VERTICES = 16       # vértices por trecho de eixo indexado na STRtree
+
+COLUNAS_RESULTADO = ['ponto', 'lat', 'lon', 'Dentro', 'Nome', 'Voltagem', 'Distancia_m', 'CD_MUN', 'NM_MUN', 'UF']
+
+
+def _ler_linhas(voltagem) -> gpd.GeoDataFrame:
+    gdf = gpd.read_file(FAIXA_SERVIDAO_GPKG, layer=f'linha_transmissao_{voltagem}', engine='pyogrio')
+    nome = gdf['Nome'] if 'Nome' in gdf.columns else pd.Series(f'{voltagem} kV', index=gdf.index)
+    gdf = gpd.GeoDataFrame({'Nome': nome.fillna(f'{voltagem} kV').astype(str), 'Voltagem': voltagem},
+                           geometry=gdf.geometry, crs=gdf.crs)
+    return gdf[~gdf.geometry.is_empty & gdf.geometry.notna()].to_crs(CRS_METRICO)
+
+
+def construir_corredores() -> gpd.GeoDataFrame:
+    """Um registro por linha (sem dissolver, para manter o nome): Nome, Voltagem, Largura_m e o eixo (metros)."""
+    partes = []
+    for voltagem, largura in FAIXA_METROS.items():
+        try:
+            linhas = _ler_linhas(voltagem)
+        except Exception as e:
+            print(f"⚠️  Camada linha_transmissao_{voltagem} indisponível: {e}")
+            continue
+        linhas['Largura_m'] = largura
+        partes.append(linhas)
+    if not partes:
+        raise FileNotFoundError(f"Nenhuma camada de linhas em {FAIXA_SERVIDAO_GPKG}")
+    corredores = pd.concat(partes, ignore_index=True)
+    corredores['Voltagem'] = pd.Categorical(corredores['Voltagem'], categories=list(FAIXA_METROS))
+    return gpd.GeoDataFrame(corredores, geometry='geometry', crs=CRS_METRICO)
+
+
+def carregar_corredores(cache=None) -> gpd.GeoDataFrame:
+    """Eixos do cache (.cache/faixa/corredores.parquet); refeitos se o GPKG ou as larguras mudarem."""
+    cache = cache or CacheArtefatos()
+    if cache.verificar(CORREDORES_PARQUET, entradas=[FAIXA_SERVIDAO_GPKG],
+                       parametros={'faixa_metros': FAIXA_METROS, 'crs': CRS_METRICO}, codigo=[Path(__file__)]):
+        print("🔨 Projetando os eixos das linhas...")
+        corredores = construir_corredores()
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = CORREDORES_PARQUET.with_suffix('.tmp')
+        corredores.to_parquet(tmp, index=False)
+        tmp.replace(CORREDORES_PARQUET)
+        cache.registrar(CORREDORES_PARQUET)
+        return corredores
+    return gpd.read_parquet(CORREDORES_PARQUET)
+
+
+def _trechos(eixos, vertices=TRECHO_VERTICES):
+    """Divide os eixos em trechos de até `vertices` vértices -> (trechos, índice da linha de cada trecho)."""
+    partes, linha = shapely.get_parts(eixos, return_index=True)
+    coords, parte = shapely.get_coordinates(partes, return_index=True)
+    inicio = np.r_[0, np.flatnonzero(np.diff(parte)) + 1]
+    fim = np.r_[inicio[1:], len(coords)]
+    pedacos, origem = [], []
+    for a, b, i in zip(inicio, fim, linha):
+        for ini in range(a, max(b - 1, a + 1), vertices - 1):  # trechos vizinhos compartilham um vértice
+            pedacos.append(coords[ini:min(ini + vertices, b)])
+            origem.append(i)
+    tamanhos = np.array([len(c) for c in pedacos])
+    trechos = shapely.linestrings(np.concatenate(pedacos), indices=np.repeat(np.arange(len(pedacos)), tamanhos))
+    return trechos, np.array(origem)
+
+
+class IndiceFaixa:
+    """STRtree dos eixos (em trechos) e dos municípios para consultas ponto-em-faixa."""
+
+    def __init__(self, corredores: gpd.GeoDataFrame, municipios: gpd.GeoDataFrame | None = None):
+        self.nomes = corredores['Nome'].to_numpy()
+        self.voltagens = corredores['Voltagem'].astype(str).to_numpy()
+        self.larguras = corredores['Largura_m'].to_numpy(dtype=float)
+        self.eixos = corredores.geometry.to_numpy()
+        self.trechos, self.trecho_linha = _trechos(self.eixos)
+        self.arvore = STRtree(self.trechos)
+
+        if municipios is None:
+            municipios = municipios_ibge.geometrias_municipios()
+        municipios = municipios.to_crs(CRS_METRICO)
+        ref = municipios_ibge.tabela_municipios().set_index('CD_MUN')
+        codigos = municipios['CD_MUN'].astype('Int32')
+        # atributos por posição na árvore; a última linha (nula) é a de "nenhum município"
+        self.municipios = pd.DataFrame({'CD_MUN': pd.concat([codigos, pd.Series([pd.NA], dtype='Int32')],
+                                                            ignore_index=True)})
+        self.municipios['NM_MUN'] = self.municipios['CD_MUN'].map(ref['NM_MUN'])
+        self.municipios['UF'] = self.municipios['CD_MUN'].map(ref['UF'])
+        self.arvore_mun = STRtree(municipios.geometry.to_numpy())
+
+        # UFs da tabela de referência sem nenhum polígono: pontos nelas sairiam sem município
+        cobertas = set(self.municipios['UF'].dropna())
+        self.ufs_sem_malha = tuple(uf for uf in municipios_ibge.UFS if uf in set(ref['UF']) and uf not in cobertas)
+        if self.ufs_sem_malha:
+            print(f"⚠️  Sem polígonos de municípios para {', '.join(self.ufs_sem_malha)} (malha municipal sem .shp): "
+                  f"CD_MUN/NM_MUN/UF ficam vazios para pontos nessas UFs")
+
+    @classmethod
+    def carregar(cls, cache=None) -> 'IndiceFaixa':
+        return cls(carregar_corredores(cache))
+
+    @cached_property
+    def faixas(self):
+        """Polígono da faixa de cada linha (buffer do eixo), para medir áreas atingidas."""
+        faixas = shapely.buffer(self.eixos, self.larguras)
+        shapely.prepare(faixas)
+        return faixas
+
+    def extensao(self):
+        """(xmin, ymin, xmax, ymax) de todas as faixas, em CRS_METRICO."""
+        xmin, ymin, xmax, ymax = shapely.total_bounds(self.eixos)
+        m = self.larguras.max()
+        return xmin - m, ymin - m, xmax + m, ymax + m
+
+    def pares(self, geometrias):
+        """Geometrias em CRS_METRICO -> (índice da geometria, índice da linha, distância ao eixo em m)
+        para cada linha cuja faixa a geometria toca (menor distância entre os trechos do eixo).
+        """
+        # candidatos: trechos a até a maior largura; depois cada linha com a sua largura
+        i_geom, i_trecho = self.arvore.query(geometrias, predicate='dwithin', distance=self.larguras.max())
+        distancias = shapely.distance(geometrias[i_geom], self.trechos[i_trecho])
+        i_linha = self.trecho_linha[i_trecho]
+        na_faixa = distancias <= self.larguras[i_linha]
+        pares = (pd.DataFrame({'geom': i_geom[na_faixa], 'linha': i_linha[na_faixa], 'dist': distancias[na_faixa]})
+                 .groupby(['geom', 'linha'], as_index=False, sort=False)['dist'].min())
+        return pares['geom'].to_numpy(), pares['linha'].to_numpy(), pares['dist'].to_numpy()
+
+    def _projetar(self, lats, lons):
+        pontos = gpd.GeoSeries(shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)),
+                               crs='EPSG:4326')
+        return pontos.to_crs(CRS_METRICO).to_numpy()
+
+    def consultar_lote(self, lats, lons, somente_dentro=False) -> pd.DataFrame:
+        """Uma linha por (ponto, faixa que o contém), ordenada por ponto e distância ao eixo.
+        Pontos fora de qualquer faixa aparecem uma vez com Dentro=False (salvo somente_dentro);
+        pontos sem coordenada válida (vazia, não numérica, NaN/inf) são tratados como fora.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        # só coordenadas finitas vão para as árvores (NaN faz a consulta do GEOS falhar)
+        validos = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        pontos = self._projetar(lats[validos], lons[validos])
+        projetados = np.isfinite(shapely.get_x(pontos)) & np.isfinite(shapely.get_y(pontos))
+        validos, pontos = validos[projetados], pontos[projetados]
+
+        i_valido, linha, distancias = self.pares(pontos)
+        i_ponto = validos[i_valido]
+
+        # município que contém o ponto (primeiro polígono encontrado; malhas não se sobrepõem)
+        mun = np.full(len(lats), -1)
+        j_ponto, j_mun = self.arvore_mun.query(pontos, predicate='within')
+        mun[validos[j_ponto[::-1]]] = j_mun[::-1]
+
+        dentro = pd.DataFrame({'ponto': i_ponto, 'Dentro': True, 'Nome': self.nomes[linha],
+                               'Voltagem': self.voltagens[linha], 'Distancia_m': np.round(distancias, 1)})
+        if not somente_dentro:
+            fora = np.setdiff1d(np.arange(len(lats)), dentro['ponto'].to_numpy())
+            dentro = pd.concat([dentro, pd.DataFrame({'ponto': fora, 'Dentro': False})], ignore_index=True)
+        res = dentro.sort_values(['ponto', 'Distancia_m'], kind='stable', na_position='last').reset_index(drop=True)
+
+        p = res['ponto'].to_numpy()
+        res.insert(1, 'lat', lats[p])
+        res.insert(2, 'lon', lons[p])
+        res[['CD_MUN', 'NM_MUN', 'UF']] = self.municipios.iloc[mun[p]].reset_index(drop=True)
+        return res[COLUNAS_RESULTADO]
+
+    def consultar(self, lat, lon) -> list[dict]:
+        """Faixas que contêm o ponto (lista vazia se nenhuma), da mais próxima do eixo para a mais distante."""
+        res = self.consultar_lote([lat], [lon], somente_dentro=True)
+        return res.drop(columns=['ponto', 'Dentro']).astype(object).where(res.notna(), None).to_dict('records')
+
+
+def ler_pontos_csv(caminho, col_lat=None, col_lon=None) -> pd.DataFrame:
+    """CSV com colunas de latitude/longitude (nomes detectados: lat/latitude, lon/lng/longitude)."""
+    df = pd.read_csv(caminho, sep=None, engine='python', encoding='utf-8-sig')
+    colunas = {c.lower(): c for c in df.columns}
+
+    def achar(explicita, candidatas):
+        if explicita:
+            if explicita not in df.columns:
+                raise ValueError(f"Coluna '{explicita}' não encontrada no CSV")
+            return explicita
+        for c in candidatas:
+            if c in colunas:
+                return colunas[c]
+        raise ValueError(f"CSV sem coluna de coordenada ({'/'.join(candidatas)})")
+
+    lat = achar(col_lat, ['lat', 'latitude', 'y'])
+    lon = achar(col_lon, ['lon', 'lng', 'long', 'longitude', 'x'])
+    return pd.DataFrame({'lat': pd.to_numeric(df[lat], errors='coerce'),
+                         'lon': pd.to_numeric(df[lon], errors='coerce')})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verifica se pontos estão na faixa de servidão das linhas')
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--ponto', nargs=2, type=float, metavar=('LAT', 'LON'), help='Consulta um único ponto')
+    grupo.add_argument('--csv', type=Path, help='CSV com os pontos (colunas lat/lon)')
+    parser.add_argument('--saida', type=Path, help='CSV de resultado do lote (padrão: <csv>_faixa.csv)')
+    parser.add_argument('--lat', help='Nome da coluna de latitude no CSV')
+    parser.add_argument('--lon', help='Nome da coluna de longitude no CSV')
+    parser.add_argument('--somente-dentro', action='store_true', help='No lote, omite pontos fora das faixas')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    indice = IndiceFaixa.carregar()
+    cobertas = ', '.join(uf for uf in municipios_ibge.UFS if uf not in indice.ufs_sem_malha) or 'nenhuma UF'
+    print(f"✓ Índice com {len(indice.nomes)} linhas e {len(indice.municipios) - 1} municípios ({cobertas}) "
+          f"({time.perf_counter() - inicio:.1f}s)")
+
+    if args.ponto:
+        lat, lon = args.ponto
+        resultado = indice.consultar(lat, lon)
+        if not resultado:
+            print(f"Ponto ({lat}, {lon}) fora das faixas de servidão")
+        for r in resultado:
+            local = f"{r['NM_MUN']}/{r['UF']}" if r['NM_MUN'] else 'município não identificado'
+            print(f"  ⚡ {r['Nome']} ({r['Voltagem']} kV) — {r['Distancia_m']:.0f} m do eixo — {local}")
+        return 0
+
+    try:
+        pontos = ler_pontos_csv(args.csv, args.lat, args.lon)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  {e}")
+        return 1
+    invalidos = int(pontos.isna().any(axis=1).sum())
+    if invalidos:
+        print(f"⚠️  {invalidos} pontos sem coordenada válida (ficam fora das faixas)")
+    inicio = time.perf_counter()
+    resultado = indice.consultar_lote(pontos['lat'], pontos['lon'], somente_dentro=args.somente_dentro)
+    saida = args.saida or args.csv.with_name(f"{args.csv.stem}_faixa.csv")
+    resultado.to_csv(saida, index=False, encoding='utf-8-sig')
+    n_dentro = resultado.loc[resultado['Dentro'], 'ponto'].nunique()
+    print(f"✓ {len(pontos)} pontos em {time.perf_counter() - inicio:.2f}s: {n_dentro} dentro de alguma faixa")
+    print(f"✓ Resultado: {saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
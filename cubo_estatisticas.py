@@ -0,0 +1,184 @@
+"""
+Cubo de estatísticas (Estado × Voltagem × Município)
+Construído uma única vez a partir dos dados consolidados e serializado em
+cubo_estatisticas.parquet. Cada célula é um município (CD_MUN) presente em uma
+combinação Estado × Voltagem e carrega os atributos do município inteiro:
+  - Num_Linhas: quantas linhas distintas atravessam o município (multiplicidade)
+  - Voltagens: conjunto de voltagens do município ('230, 525')
+  - Exclusivo: o município é atravessado por uma única voltagem
+Contagens, distribuições, matrizes e listas de exclusivos usadas pelo console,
+pelos relatórios HTML e pelo dashboard são fatias deste cubo.
+"""
+from pathlib import Path
+
+import pandas as pd
+
+import modelo_dados
+
+BASE_DIR = Path(__file__).parent
+CUBO_PARQUET = BASE_DIR / 'cubo_estatisticas.parquet'
+
+COLUNAS = ['Estado', 'Voltagem', 'Voltagem_kV', 'CD_MUN', 'NM_MUN', 'Num_Linhas', 'Voltagens', 'Exclusivo']
+
+
+class Cubo:
+    """Células (Estado, Voltagem, CD_MUN) e as fatias derivadas delas.
+
+    As fatias consideram apenas as camadas por voltagem; as células 'BASE'
+    (todas as linhas) só entram em por_estado(base=True).
+    """
+
+    def __init__(self, celulas: pd.DataFrame):
+        self.celulas = celulas
+
+    # ------------------------------------------------------------------
+    # Construção e serialização
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def construir(cls, df) -> 'Cubo':
+        """Monta o cubo a partir de dados_consolidados (qualquer formato)."""
+        df = modelo_dados.tipar_consolidado(df).dropna(subset=['CD_MUN'])
+        celulas = df.drop_duplicates(subset=['Estado', 'Voltagem', 'CD_MUN'])[
+            ['Estado', 'Voltagem', 'Voltagem_kV', 'CD_MUN', 'NM_MUN', 'Tipo']].copy()
+        espec = celulas[celulas['Tipo'] == 'especifica'].sort_values(['CD_MUN', 'Voltagem_kV'])
+        por_mun = espec.groupby('CD_MUN').agg(
+            Num_Linhas=('Voltagem', 'size'),
+            Voltagens=('Voltagem_kV', lambda v: ', '.join(str(x) for x in v)),
+        )
+        celulas = celulas.drop(columns='Tipo').join(por_mun, on='CD_MUN')
+        celulas['Num_Linhas'] = celulas['Num_Linhas'].fillna(0).astype('int16')
+        celulas['Voltagens'] = celulas['Voltagens'].fillna('')
+        celulas['Exclusivo'] = celulas['Num_Linhas'] == 1
+        celulas['CD_MUN'] = celulas['CD_MUN'].astype('int32')
+        for col in ['Estado', 'Voltagem', 'NM_MUN']:
+            celulas[col] = celulas[col].cat.remove_unused_categories()
+        celulas = celulas.sort_values(['Estado', 'Voltagem', 'NM_MUN']).reset_index(drop=True)
+        return cls(celulas[COLUNAS])
+
+    def salvar(self, caminho=CUBO_PARQUET):
+        return modelo_dados.gravar_atomico(
+            caminho, lambda tmp: self.celulas.to_parquet(tmp, index=False, compression='zstd'))
+
+    @classmethod
+    def ler(cls, caminho=CUBO_PARQUET) -> 'Cubo':
+        celulas = pd.read_parquet(caminho)
+        # a ordem numérica das voltagens vem de Voltagem_kV ('BASE' por último)
+        ordem = (celulas[['Voltagem', 'Voltagem_kV']].drop_duplicates()
+                 .sort_values('Voltagem_kV', na_position='last')['Voltagem'].astype(str).tolist())
+        celulas['Voltagem'] = pd.Categorical(celulas['Voltagem'].astype(str), categories=ordem, ordered=True)
+        return cls(celulas)
+
+    # ------------------------------------------------------------------
+    # Seleção
+    # ------------------------------------------------------------------
+
+    def filtrar(self, estados=None, voltagens=None) -> 'Cubo':
+        """Sub-cubo com os estados/voltagens escolhidos (a BASE só é filtrada por estado).
+        Num_Linhas/Voltagens/Exclusivo continuam descrevendo o município inteiro.
+        """
+        mask = pd.Series(True, index=self.celulas.index)
+        if estados is not None:
+            mask &= self.celulas['Estado'].isin(list(estados))
+        if voltagens is not None:
+            mask &= self.celulas['Voltagem'].isin(list(voltagens) + ['BASE'])
+        return Cubo(self.celulas[mask])
+
+    @property
+    def especificas(self) -> pd.DataFrame:
+        return self.celulas[self.celulas['Voltagem'] != 'BASE']
+
+    def estados(self):
+        return sorted(self.especificas['Estado'].astype(str).unique())
+
+    def voltagens(self):
+        """Voltagens presentes, em ordem numérica crescente (rótulos em texto)."""
+        presentes = set(self.especificas['Voltagem'].astype(str))
+        return [v for v in self.celulas['Voltagem'].cat.categories if v in presentes]
+
+    # ------------------------------------------------------------------
+    # Fatias
+    # ------------------------------------------------------------------
+
+    def total_municipios(self, base=False) -> int:
+        return (self.celulas if base else self.especificas)['CD_MUN'].nunique()
+
+    def por_voltagem(self) -> pd.Series:
+        """Municípios por voltagem (ordem numérica)."""
+        s = self.especificas.groupby('Voltagem', observed=True).size()
+        return s.rename('NM_MUN')
+
+    def por_estado(self, base=False) -> pd.Series:
+        """Municípios por estado; base=True inclui as camadas BASE (todas as linhas)."""
+        dados = self.celulas if base else self.especificas
+        return dados.groupby('Estado', observed=True)['CD_MUN'].nunique().rename('NM_MUN')
+
+    def matriz(self) -> pd.DataFrame:
+        """Estado × Voltagem com o número de municípios."""
+        return self.especificas.groupby(['Estado', 'Voltagem'], observed=True).size().unstack(fill_value=0)
+
+    def resumo_estados(self) -> pd.DataFrame:
+        """Estado, Municipios, Tipos_Voltagem."""
+        g = self.especificas.groupby('Estado', observed=True)
+        return pd.DataFrame({'Municipios': g['CD_MUN'].nunique(),
+                             'Tipos_Voltagem': g['Voltagem'].nunique()}).reset_index()
+
+    def resumo_voltagens(self) -> pd.DataFrame:
+        """Voltagem, Municipios, Estados (ordem numérica)."""
+        g = self.especificas.groupby('Voltagem', observed=True)
+        return pd.DataFrame({'Municipios': g.size(), 'Estados': g['Estado'].nunique()}).reset_index()
+
+    def linhas_por_municipio(self) -> pd.Series:
+        """Linhas distintas por município (CD_MUN) dentro da seleção atual."""
+        return self.especificas.groupby('CD_MUN').size()
+
+    def distribuicao(self) -> pd.Series:
+        """Quantos municípios têm 1, 2, 3... linhas (dentro da seleção atual)."""
+        return self.linhas_por_municipio().value_counts().sort_index()
+
+    def municipios(self) -> pd.DataFrame:
+        """Uma linha por município: CD_MUN, NM_MUN, Estado, Num_Linhas, Voltagens, Exclusivo."""
+        mun = self.especificas.drop_duplicates('CD_MUN')[['CD_MUN', 'NM_MUN', 'Estado', 'Num_Linhas', 'Voltagens', 'Exclusivo']]
+        return mun.sort_values(['NM_MUN', 'Estado']).reset_index(drop=True)
+
+    def exclusivos(self, voltagem) -> pd.DataFrame:
+        """Células dos municípios atravessados apenas pela voltagem informada."""
+        esp = self.especificas
+        return esp[(esp['Voltagem'] == str(voltagem)) & esp['Exclusivo']]
+
+    def painel(self, estados, voltagens) -> dict:
+        """Todos os agregados do dashboard para uma combinação de filtros.
+        KPIs e a contagem por estado consideram só os estados (incluem a BASE);
+        as demais fatias consideram estados e voltagens. Fatias vazias -> None.
+        """
+        cubo_estado = self.filtrar(estados=estados)
+        cubo_sel = cubo_estado.filtrar(voltagens=voltagens)
+        vazio = not len(cubo_sel.especificas)
+        return {
+            'municipios': cubo_estado.total_municipios(base=True),
+            'linhas': len(cubo_sel.voltagens()),
+            'multiplas': int((cubo_sel.linhas_por_municipio() > 1).sum()),
+            'por_estado': cubo_estado.por_estado(base=True).sort_values(ascending=False),
+            'por_voltagem': None if vazio else cubo_sel.por_voltagem(),
+            'distribuicao': None if vazio else cubo_sel.distribuicao(),
+            'matriz': None if vazio else cubo_sel.matriz(),
+        }
+
+
+def construir(df) -> Cubo:
+    return Cubo.construir(df)
+
+
+def carregar(caminho=CUBO_PARQUET, consolidado=modelo_dados.CONSOLIDADO_CSV) -> Cubo:
+    """Lê o cubo serializado; reconstrói a partir dos dados consolidados se faltar ou estiver defasado."""
+    caminho = Path(caminho)
+    try:
+        fontes = [p for p in (Path(consolidado), modelo_dados.caminho_parquet(consolidado)) if p.exists()]
+        if caminho.exists() and all(caminho.stat().st_mtime >= p.stat().st_mtime for p in fontes):
+            return Cubo.ler(caminho)
+    except Exception as e:
+        print(f"⚠️  Falha ao ler {caminho.name} ({e}); reconstruindo o cubo")
+    snapshot = modelo_dados.ler_snapshot(consolidado)
+    if snapshot is not None:
+        return Cubo.construir(snapshot[0])
+    return Cubo.construir(modelo_dados.ler_tabela(consolidado, dtype={'Voltagem': str}))
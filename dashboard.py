@@ -6,32 +6,64 @@ import pandas as pd
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-import subprocess
-import sys
+
+import cubo_estatisticas
+import exportacao
+import modelo_dados
+import reprocessamento
 
 BASE_DIR = Path(__file__).parent
 
-@st.cache_data
+@st.cache_data(max_entries=2)
 def load_data(cache_key: float):
-    df = pd.read_csv(BASE_DIR / 'dados_consolidados.csv')
-    df_mult = pd.read_csv(BASE_DIR / 'municipios_multiplas_linhas.csv')
-    # Tipos e normalizações
-    df['Voltagem'] = df['Voltagem'].astype(str)
-    df['Estado'] = df['Estado'].astype(str)
-    # Filtrar apenas específicas para algumas análises
-    df_especificas = df[df['Tipo'] == 'especifica'].copy()
-    # Normalização e deduplicação para evitar contagens infladas
-    df_especificas['NM_MUN'] = df_especificas['NM_MUN'].astype(str).str.strip()
-    df_especificas['Estado'] = df_especificas['Estado'].astype(str).str.strip().str.upper()
-    df_especificas['Voltagem'] = df_especificas['Voltagem'].astype(str).str.strip()
-    df_especificas = df_especificas.drop_duplicates(subset=['NM_MUN','Estado','Voltagem'])
-    # Normaliza df_mult também
-    if 'Municipio' in df_mult.columns:
-        df_mult['Municipio'] = df_mult['Municipio'].astype(str).str.strip()
-    if 'Estado' in df_mult.columns:
-        df_mult['Estado'] = df_mult['Estado'].astype(str).str.strip().str.upper()
-    df_mult = df_mult.drop_duplicates()
-    return df, df_especificas, df_mult
+    # Modelo tipado compartilhado (categóricas + Voltagem_kV inteira, sem duplicatas)
+    return modelo_dados.carregar(BASE_DIR / 'dados_consolidados.csv', BASE_DIR / 'municipios_multiplas_linhas.csv')
+
+@st.cache_data(max_entries=2)
+def load_cubo(cache_key: float):
+    # Cubo Estado × Voltagem × Município: KPIs e gráficos são fatias dele
+    return cubo_estatisticas.carregar()
+
+@st.cache_resource(max_entries=2)
+def load_exportador(cache_key: float):
+    # Exportações (CSV, Parquet, GeoPackage, XLSX) geradas sob demanda e guardadas em .cache/exportacoes/
+    df, _, df_mult = load_data(cache_key)
+    return exportacao.Exportador(cache_key, df, df_mult, load_cubo(cache_key))
+
+@st.cache_data(max_entries=8)
+def arquivo_download(caminho: str) -> bytes:
+    # O nome do arquivo exportado já inclui a versão, o filtro e o formato: o conteúdo nunca muda
+    return Path(caminho).read_bytes()
+
+def assinatura_filtro(estados_sel, voltagens_sel):
+    # Conjuntos em forma canônica: a ordem de seleção nos widgets não gera uma nova entrada no cache
+    return tuple(sorted(estados_sel)), tuple(sorted(voltagens_sel))
+
+@st.cache_data(max_entries=256)
+def painel(cache_key: float, estados: tuple, voltagens: tuple):
+    # Agregados e gráficos de uma combinação de filtros (estados, voltagens): calculados uma única vez;
+    # as interações seguintes com a mesma combinação só leem o cache
+    _, _, df_mult = load_data(cache_key)
+    ag = load_cubo(cache_key).painel(estados, voltagens)
+    figs = {}
+    if ag['por_voltagem'] is not None:
+        fig = px.bar(ag['por_voltagem'], orientation='h', labels={'value':'Municípios','Voltagem':'kV'}, text_auto=True, height=420)
+        fig.update_layout(yaxis_title='Voltagem (kV)', xaxis_title='Número de Municípios')
+        figs['por_voltagem'] = fig
+
+        fig = px.bar(ag['distribuicao'], labels={'index':'Nº de Linhas', 'value':'Qtd de Municípios'}, text_auto=True, height=420)
+        fig.update_layout(xaxis=dict(type='category'))
+        figs['distribuicao'] = fig
+
+        fig = px.imshow(ag['matriz'], text_auto=True, color_continuous_scale='YlOrRd', aspect='auto', height=420)
+        fig.update_layout(xaxis_title='Voltagem (kV)', yaxis_title='Estado')
+        figs['matriz'] = fig
+    fig = px.bar(ag['por_estado'], text_auto=True, labels={'value':'Municípios','Estado':'Estado'}, height=420)
+    fig.update_layout(xaxis_title='Estado', yaxis_title='Número de Municípios')
+    figs['por_estado'] = fig
+    ag['figs'] = figs
+    ag['top'] = df_mult[df_mult['Estado'].isin(list(estados))].sort_values('Num_Linhas', ascending=False)
+    return ag
 
 st.set_page_config(
     page_title='Linhas de Transmissão - Foz do Iguaçu',
@@ -42,13 +74,12 @@ st.set_page_config(
 st.title('⚡ Linhas de Transmissão de Foz do Iguaçu — Região Sul')
 st.caption('Municípios afetados por linha de transmissão | Fonte: arquivos do projeto')
 
-# Carregar dados com cache atrelado à última modificação dos CSVs
+# Carregar dados com cache atrelado à versão publicada dos CSVs
+# (congelada enquanto um reprocessamento em segundo plano está gravando)
 try:
-    csv1 = BASE_DIR / 'dados_consolidados.csv'
-    csv2 = BASE_DIR / 'municipios_multiplas_linhas.csv'
-    cache_key = max(csv1.stat().st_mtime if csv1.exists() else 0,
-                    csv2.stat().st_mtime if csv2.exists() else 0)
+    cache_key = reprocessamento.versao_dados(reprocessamento.ARQUIVOS_DADOS)
     df, df_especificas, df_mult = load_data(cache_key)
+    cubo = load_cubo(cache_key)
 except FileNotFoundError:
     st.error('Arquivos dados_consolidados.csv e/ou municipios_multiplas_linhas.csv não encontrados. Execute primeiro o script analise_consolidada.py.')
     st.stop()
@@ -56,57 +87,79 @@ except FileNotFoundError:
 # Sidebar - filtros
 with st.sidebar:
     st.header('Filtros')
-    estados = sorted(df['Estado'].dropna().unique().tolist())
+    estados = list(df['Estado'].cat.categories)
     estados_sel = st.multiselect('Estados', estados, default=estados)
 
-    voltagens = sorted(df_especificas['Voltagem'].dropna().unique().tolist(), key=lambda x: int(x))
+    voltagens = cubo.voltagens()
     voltagens_sel = st.multiselect('Voltagens (kV)', voltagens, default=voltagens)
 
     st.markdown('---')
     st.subheader('Downloads')
-    st.download_button('Baixar dados consolidados (CSV)', data=df.to_csv(index=False).encode('utf-8-sig'), file_name='dados_consolidados.csv', mime='text/csv')
-    st.download_button('Baixar municípios com múltiplas linhas (CSV)', data=df_mult.to_csv(index=False).encode('utf-8-sig'), file_name='municipios_multiplas_linhas.csv', mime='text/csv')
+    st.caption('Exporta a tabela com os filtros atuais')
+    exportador = load_exportador(cache_key)
+    conjunto = st.selectbox('Tabela', list(exportacao.CONJUNTOS), format_func=exportacao.CONJUNTOS.get)
+    formato = st.selectbox('Formato', exportador.formatos(conjunto), format_func=lambda f: exportacao.FORMATOS[f][0])
+    filtro = assinatura_filtro(estados_sel, voltagens_sel)
+    # Nada é gerado até o pedido; a mesma combinação (versão, filtro, formato) só é exportada uma vez
+    arquivo = exportador.pronto(conjunto, formato, *filtro)
+    if arquivo is None and st.button('📦 Preparar arquivo'):
+        try:
+            with st.spinner('Gerando arquivo...'):
+                arquivo = exportador.exportar(conjunto, formato, *filtro)
+        except (ImportError, exportacao.FormatoIndisponivel) as e:
+            st.warning(f'Formato indisponível: {e}')
+        except Exception as e:
+            st.error(f'Falha ao exportar: {e}')
+    if arquivo is not None:
+        _, extensao, mime = exportacao.FORMATOS[formato]
+        st.download_button(f'⬇️ Baixar {exportacao.FORMATOS[formato][0]}', data=arquivo_download(str(arquivo)),
+                           file_name=f'{conjunto}{extensao}', mime=mime)
 
     st.markdown('---')
     st.subheader('Atualização dos dados')
-    st.caption('Reprocessa os CSVs executando analise_consolidada.py')
+    st.caption('Reprocessa os CSVs em segundo plano (analise_consolidada.py); o painel continua disponível')
     if st.button('🔄 Atualizar dados (reprocessar)'):
-        with st.spinner('Reprocessando dados... isso pode levar alguns segundos.'):
-            try:
-                result = subprocess.run(
-                    [sys.executable, str(BASE_DIR / 'analise_consolidada.py')],
-                    cwd=str(BASE_DIR),
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-                # Limpar cache e recarregar
-                load_data.clear()
-                st.success('Dados atualizados com sucesso! Recarregando dashboard...')
-                st.rerun()
-            except subprocess.CalledProcessError as e:
-                st.error('Falha ao atualizar os dados. Veja os detalhes abaixo:')
-                st.code(e.stderr or str(e), language='bash')
-
-# Aplicar filtros
-mask_estado = df['Estado'].isin(estados_sel)
-mask_estado_espec = df_especificas['Estado'].isin(estados_sel)
-mask_volt = df_especificas['Voltagem'].isin(voltagens_sel)
-
-_df = df[mask_estado].copy()
-_df_espec = df_especificas[mask_estado_espec & mask_volt].copy()
-_df_mult = df_mult[df_mult['Estado'].isin(estados_sel)].copy()
+        # Um único reprocessamento por vez: pedidos simultâneos acompanham a mesma tarefa
+        _, nova = reprocessamento.gerenciador.solicitar()
+        if not nova:
+            st.info('Já existe um reprocessamento em andamento; acompanhando o mesmo.')
+
+    tarefa = reprocessamento.gerenciador.atual
+    # Sessão aberta depois de um reprocessamento já concluído: nada a anunciar
+    st.session_state.setdefault('reprocessamento_visto', tarefa.id if tarefa and not tarefa.em_andamento else None)
+
+    @st.fragment(run_every=1.0 if tarefa is not None and tarefa.em_andamento else None)
+    def acompanhar_reprocessamento():
+        # Atualiza só este trecho a cada segundo enquanto a tarefa roda
+        tarefa = reprocessamento.gerenciador.atual
+        if tarefa is None:
+            return
+        if tarefa.em_andamento:
+            st.progress(tarefa.progresso, text=f'⏳ {tarefa.etapa}')
+        elif tarefa.estado == 'falhou':
+            st.error('Falha ao atualizar os dados. Veja os detalhes abaixo:')
+            st.code(tarefa.erro, language='bash')
+        elif st.session_state['reprocessamento_visto'] != tarefa.id:
+            # Versão nova publicada: o app inteiro é refeito já com o snapshot novo
+            st.session_state['reprocessamento_visto'] = tarefa.id
+            st.success('Dados atualizados com sucesso! Recarregando dashboard...')
+            st.rerun(scope='app')
+
+    acompanhar_reprocessamento()
+
+# Aplicar filtros (fatias do cubo, memoizadas por combinação de filtros)
+ag = painel(cache_key, *assinatura_filtro(estados_sel, voltagens_sel))
 
 # KPIs principais
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric('Municípios únicos (filtrado)', _df['NM_MUN'].nunique())
+    st.metric('Municípios únicos (filtrado)', ag['municipios'])
 with col2:
-    st.metric('Linhas distintas (filtrado)', _df_espec['Linha'].nunique())
+    st.metric('Linhas distintas (filtrado)', ag['linhas'])
 with col3:
     st.metric('Estados selecionados', len(estados_sel))
 with col4:
-    st.metric('Municípios com múltiplas linhas', int((_df_espec.groupby('NM_MUN')['Linha'].nunique() > 1).sum()))
+    st.metric('Municípios com múltiplas linhas', ag['multiplas'])
 
 st.markdown('---')
 
@@ -115,32 +168,22 @@ c1, c2 = st.columns(2)
 
 with c1:
     st.subheader('Municípios afetados por voltagem (kV)')
-    if len(_df_espec):
-        s = _df_espec.groupby('Voltagem')['NM_MUN'].nunique().sort_index(key=lambda x: x.astype(int))
-        fig = px.bar(s, orientation='h', labels={'value':'Municípios','Voltagem':'kV'}, text_auto=True, height=420)
-        fig.update_layout(yaxis_title='Voltagem (kV)', xaxis_title='Número de Municípios')
-        st.plotly_chart(fig, use_container_width=True)
+    if 'por_voltagem' in ag['figs']:
+        st.plotly_chart(ag['figs']['por_voltagem'], use_container_width=True)
     else:
         st.info('Sem dados para os filtros atuais.')
 
 with c2:
     st.subheader('Municípios afetados por estado')
-    s = _df.groupby('Estado')['NM_MUN'].nunique().sort_values(ascending=False)
-    fig = px.bar(s, text_auto=True, labels={'value':'Municípios','Estado':'Estado'}, height=420)
-    fig.update_layout(xaxis_title='Estado', yaxis_title='Número de Municípios')
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(ag['figs']['por_estado'], use_container_width=True)
 
 # Row 2: Distribuição de linhas por município | Matriz estado x voltagem
 c3, c4 = st.columns(2)
 
 with c3:
     st.subheader('Distribuição: quantas linhas atravessam cada município')
-    if len(_df_espec):
-        municipios_multiplas = _df_espec.groupby('NM_MUN')['Linha'].nunique()
-        dist = municipios_multiplas.value_counts().sort_index()
-        fig = px.bar(dist, labels={'index':'Nº de Linhas', 'value':'Qtd de Municípios'}, text_auto=True, height=420)
-        fig.update_layout(xaxis=dict(type='category'))
-        st.plotly_chart(fig, use_container_width=True)
+    if 'distribuicao' in ag['figs']:
+        st.plotly_chart(ag['figs']['distribuicao'], use_container_width=True)
         with st.expander('Como ler este gráfico?'):
             st.write('Cada barra mostra quantos municípios são atravessados por 1, 2, 3, 4, ... linhas. Ex.: barra em 3 = quantidade de municípios com 3 linhas diferentes.')
     else:
@@ -148,19 +191,15 @@ with c3:
 
 with c4:
     st.subheader('Matriz: municípios por estado x voltagem')
-    if len(_df_espec):
-        mat = _df_espec.groupby(['Estado', 'Voltagem'])['NM_MUN'].nunique().unstack(fill_value=0)
-        fig = px.imshow(mat, text_auto=True, color_continuous_scale='YlOrRd', aspect='auto', height=420)
-        fig.update_layout(xaxis_title='Voltagem (kV)', yaxis_title='Estado')
-        st.plotly_chart(fig, use_container_width=True)
+    if 'matriz' in ag['figs']:
+        st.plotly_chart(ag['figs']['matriz'], use_container_width=True)
     else:
         st.info('Sem dados para os filtros atuais.')
 
 # Row 3: Top municípios e tabela
 st.subheader('Municípios com mais linhas')
-if len(_df_mult):
-    df_top = _df_mult.sort_values('Num_Linhas', ascending=False)
-    st.dataframe(df_top, use_container_width=True, hide_index=True)
+if len(ag['top']):
+    st.dataframe(ag['top'], use_container_width=True, hide_index=True)
 else:
     st.info('Sem municípios com múltiplas linhas para os filtros atuais.')
 
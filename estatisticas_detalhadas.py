@@ -6,12 +6,17 @@ Explicação do gráfico "Distribuição de linhas por município"
 import pandas as pd
 from pathlib import Path
 
+import cubo_estatisticas
+import modelo_dados
+
 # Diretório base
 base_dir = Path(__file__).parent
 
-# Carregar dados
-df_consolidado = pd.read_csv(base_dir / 'dados_consolidados.csv')
-df_multiplas = pd.read_csv(base_dir / 'municipios_multiplas_linhas.csv')
+# Carregar dados (modelo tipado: categóricas, sem duplicatas)
+df_consolidado, df_especificas, df_multiplas = modelo_dados.carregar(
+    base_dir / 'dados_consolidados.csv', base_dir / 'municipios_multiplas_linhas.csv')
+# Cubo Estado × Voltagem × Município: contagens e exclusividade já pré-calculadas
+cubo = cubo_estatisticas.carregar(consolidado=base_dir / 'dados_consolidados.csv')
 
 print("=" * 80)
 print("EXPLICAÇÃO: DISTRIBUIÇÃO DE LINHAS POR MUNICÍPIO")
@@ -27,10 +32,7 @@ print("    são atravessados por 3 linhas diferentes")
 print()
 
 # Contar quantas linhas cada município tem
-df_especificas = df_consolidado[df_consolidado['Tipo'] == 'especifica']
-municipios_linhas = df_especificas.groupby('NM_MUN')['Linha'].nunique()
-
-distribuicao = municipios_linhas.value_counts().sort_index()
+distribuicao = cubo.distribuicao()
 
 print("-" * 80)
 print("DISTRIBUIÇÃO COMPLETA:")
@@ -43,21 +45,21 @@ print("=" * 80)
 print("ESTATÍSTICAS DETALHADAS POR ESTADO")
 print("=" * 80)
 
-for estado in sorted(df_especificas['Estado'].unique()):
+for estado in cubo.estados():
     print()
     print(f"{'=' * 80}")
     print(f"ESTADO: {estado}")
     print(f"{'=' * 80}")
     
-    df_estado = df_especificas[df_especificas['Estado'] == estado]
+    cubo_estado = cubo.filtrar(estados=[estado])
     
     # Total de municípios
-    total_municipios = df_estado['NM_MUN'].nunique()
+    total_municipios = cubo_estado.total_municipios()
     print(f"\n📍 Total de municípios afetados: {total_municipios}")
     
     # Por voltagem
     print(f"\n⚡ Municípios por voltagem:")
-    voltagem_estado = df_estado.groupby('Voltagem')['NM_MUN'].nunique().sort_values(ascending=False)
+    voltagem_estado = cubo_estado.por_voltagem().sort_values(ascending=False)
     for voltagem, count in voltagem_estado.items():
         print(f"   • {voltagem} kV: {count} municípios")
     
@@ -70,41 +72,34 @@ for estado in sorted(df_especificas['Estado'].unique()):
             print(f"   {row['Num_Linhas']}x - {row['Municipio']}: {row['Voltagens']} kV")
     
     # Municípios únicos (apenas 1 linha)
-    municipios_1_linha = df_estado.groupby('NM_MUN')['Linha'].nunique()
-    municipios_1_linha = municipios_1_linha[municipios_1_linha == 1]
-    print(f"\n   Municípios com apenas 1 linha: {len(municipios_1_linha)}")
+    municipios_1_linha = cubo_estado.municipios()['Exclusivo'].sum()
+    print(f"\n   Municípios com apenas 1 linha: {municipios_1_linha}")
 
 print()
 print("=" * 80)
 print("ESTATÍSTICAS DETALHADAS POR VOLTAGEM")
 print("=" * 80)
 
-for voltagem in sorted(df_especificas['Voltagem'].unique(), key=lambda x: int(x)):
+for voltagem in cubo.voltagens():
     print()
     print(f"{'=' * 80}")
     print(f"VOLTAGEM: {voltagem} kV")
     print(f"{'=' * 80}")
     
-    df_voltagem = df_especificas[df_especificas['Voltagem'] == voltagem]
+    cubo_voltagem = cubo.filtrar(voltagens=[voltagem])
     
     # Total de municípios
-    total_municipios = df_voltagem['NM_MUN'].nunique()
+    total_municipios = cubo_voltagem.total_municipios()
     print(f"\n⚡ Total de municípios afetados: {total_municipios}")
     
     # Por estado
     print(f"\n🗺️  Distribuição por estado:")
-    estado_voltagem = df_voltagem.groupby('Estado')['NM_MUN'].nunique().sort_values(ascending=False)
+    estado_voltagem = cubo_voltagem.por_estado().sort_values(ascending=False)
     for estado, count in estado_voltagem.items():
         print(f"   • {estado}: {count} municípios")
     
-    # Quantos municípios têm SOMENTE esta voltagem
-    todos_municipios_voltagem = df_voltagem['NM_MUN'].unique()
-    municipios_exclusivos = []
-    
-    for municipio in todos_municipios_voltagem:
-        linhas_municipio = df_especificas[df_especificas['NM_MUN'] == municipio]['Voltagem'].unique()
-        if len(linhas_municipio) == 1:
-            municipios_exclusivos.append(municipio)
+    # Quantos municípios têm SOMENTE esta voltagem (flag Exclusivo do cubo)
+    municipios_exclusivos = cubo.exclusivos(voltagem)['NM_MUN'].astype(str).tolist()
     
     print(f"\n   Municípios afetados APENAS por {voltagem} kV: {len(municipios_exclusivos)}")
     
@@ -0,0 +1,169 @@
+"""
+Exportação dos dados filtrados do dashboard - CSV, Parquet, GeoPackage e XLSX
+Nada é gerado enquanto ninguém pede o download. Ao pedir, o arquivo é escrito
+em blocos (BLOCO linhas por vez, sem montar o arquivo inteiro em memória) e
+guardado em .cache/exportacoes/ pelo hash de (versão dos dados, tabela,
+filtro, formato): o mesmo download pedido de novo, por qualquer sessão, só
+relê o arquivo pronto.
+
+O GeoPackage leva o polígono de cada município (malhas do IBGE, por CD_MUN);
+é recusado (FormatoIndisponivel) se algum município da tabela não tiver polígono.
+"""
+from pathlib import Path
+import os
+import threading
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cache_artefatos import hash_valor
+import municipios_ibge
+
+BASE_DIR = Path(__file__).parent
+EXPORT_DIR = BASE_DIR / '.cache' / 'exportacoes'
+
+BLOCO = 50_000        # linhas escritas por vez
+MAX_ARQUIVOS = 32     # exportações mantidas em cache (as mais recentes)
+
+CONJUNTOS = {
+    'municipios': 'Municípios afetados',
+    'consolidado': 'Dados consolidados',
+    'multiplas': 'Municípios com múltiplas linhas',
+}
+
+# formato: (rótulo, extensão, mime)
+FORMATOS = {
+    'csv': ('CSV', '.csv', 'text/csv'),
+    'parquet': ('Parquet', '.parquet', 'application/vnd.apache.parquet'),
+    'gpkg': ('GeoPackage (com geometria)', '.gpkg', 'application/geopackage+sqlite3'),
+    'xlsx': ('Excel (XLSX)', '.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+class FormatoIndisponivel(Exception):
+    """O formato pedido não pode representar a tabela (ex.: GeoPackage sem os polígonos)."""
+
+
+def _blocos(df):
+    for inicio in range(0, len(df), BLOCO):
+        yield df.iloc[inicio:inicio + BLOCO]
+
+
+def _texto(bloco):
+    """Categóricas como texto (GeoPackage e XLSX não têm tipo categórico)."""
+    bloco = bloco.copy()
+    for col in bloco.select_dtypes('category').columns:
+        bloco[col] = bloco[col].astype(str)
+    return bloco
+
+
+def _escrever_csv(df, destino, camada):
+    with open(destino, 'w', encoding='utf-8-sig', newline='') as f:
+        for i, bloco in enumerate(_blocos(df)):
+            bloco.to_csv(f, index=False, header=(i == 0))
+
+
+def _escrever_parquet(df, destino, camada):
+    esquema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(destino, esquema, compression='zstd') as writer:
+        for bloco in _blocos(df):
+            writer.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+
+
+def _escrever_xlsx(df, destino, camada):
+    from openpyxl import Workbook  # opcional: só necessário para este formato
+
+    wb = Workbook(write_only=True)  # linhas vão direto para o arquivo
+    ws = wb.create_sheet(camada[:31])
+    ws.append(list(df.columns))
+    for bloco in _blocos(df):
+        bloco = _texto(bloco).astype(object)
+        for linha in bloco.where(bloco.notna(), None).itertuples(index=False):
+            ws.append(list(linha))
+    wb.save(destino)
+
+
+def _escrever_gpkg(df, destino, camada):
+    geometrias = municipios_ibge.geometrias_municipios()
+    codigos = municipios_ibge.como_codigo(df['CD_MUN'])
+    sem_geometria = ~codigos.isin(geometrias['CD_MUN']).to_numpy()
+    if sem_geometria.any():
+        ufs = municipios_ibge.tabela_municipios().set_index('CD_MUN')['UF']
+        faltando = sorted(set(codigos[sem_geometria].map(ufs).dropna()))
+        raise FormatoIndisponivel(
+            f"{int(sem_geometria.sum())} de {len(df)} registros sem polígono do município "
+            f"(malha municipal sem .shp: {', '.join(faltando) or 'CD_MUN desconhecido'}); exporte em CSV ou Parquet")
+    geometrias = geometrias.astype({'CD_MUN': 'Int32'})
+    for i, bloco in enumerate(_blocos(df)):
+        bloco = _texto(bloco)
+        bloco['CD_MUN'] = municipios_ibge.como_codigo(bloco['CD_MUN']).array
+        gdf = gpd.GeoDataFrame(bloco.merge(geometrias, on='CD_MUN', how='left'), geometry='geometry', crs='EPSG:4326')
+        gdf.to_file(destino, layer=camada, driver='GPKG', engine='pyogrio', mode='w' if i == 0 else 'a')
+
+
+ESCRITORES = {'csv': _escrever_csv, 'parquet': _escrever_parquet, 'gpkg': _escrever_gpkg, 'xlsx': _escrever_xlsx}
+
+
+class Exportador:
+    """Exportações de uma versão dos dados (df consolidado, df_mult e cubo tipados)."""
+
+    def __init__(self, versao, df, df_mult, cubo):
+        self.versao = versao
+        self.df = df
+        self.df_mult = df_mult
+        self.cubo = cubo
+
+    @staticmethod
+    def formatos(conjunto):
+        """GeoPackage só para tabelas com CD_MUN (a geometria vem da malha municipal)."""
+        return [f for f in FORMATOS if f != 'gpkg' or conjunto != 'multiplas']
+
+    def tabela(self, conjunto, estados, voltagens) -> pd.DataFrame:
+        """Linhas do conjunto para o filtro atual (a BASE acompanha os estados, como no cubo)."""
+        estados, voltagens = list(estados), list(voltagens)
+        if conjunto == 'municipios':
+            return self.cubo.filtrar(estados=estados, voltagens=voltagens).municipios()
+        if conjunto == 'consolidado':
+            df = self.df
+            mask = df['Estado'].isin(estados) & df['Voltagem'].isin(voltagens + ['BASE'])
+            return df.loc[mask].drop(columns='Voltagem_kV', errors='ignore').reset_index(drop=True)
+        if conjunto == 'multiplas':
+            return self.df_mult[self.df_mult['Estado'].isin(estados)].reset_index(drop=True)
+        raise ValueError(f"Tabela desconhecida: {conjunto}")
+
+    def caminho(self, conjunto, formato, estados, voltagens) -> Path:
+        chave = hash_valor({'versao': self.versao, 'conjunto': conjunto, 'formato': formato,
+                            'estados': sorted(estados), 'voltagens': sorted(voltagens)})
+        return EXPORT_DIR / f"{conjunto}.{chave[:16]}{FORMATOS[formato][1]}"
+
+    def pronto(self, conjunto, formato, estados, voltagens) -> Path | None:
+        """Arquivo já exportado para esta combinação (ou None)."""
+        destino = self.caminho(conjunto, formato, estados, voltagens)
+        return destino if destino.exists() else None
+
+    def exportar(self, conjunto, formato, estados, voltagens) -> Path:
+        """Gera (se ainda não existir) e devolve o arquivo da exportação."""
+        destino = self.caminho(conjunto, formato, estados, voltagens)
+        if destino.exists():
+            os.utime(destino)  # mais recente: fica fora da limpeza
+            return destino
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        # pid e thread: sessões do Streamlit são threads do mesmo processo
+        tmp = destino.with_name(f".{destino.stem}.{os.getpid()}.{threading.get_ident()}{destino.suffix}")
+        try:
+            ESCRITORES[formato](self.tabela(conjunto, estados, voltagens), tmp, conjunto)
+            os.replace(tmp, destino)
+        finally:
+            tmp.unlink(missing_ok=True)
+        _limpar()
+        return destino
+
+
+def _limpar(manter=MAX_ARQUIVOS):
+    """Remove as exportações mais antigas além de `manter`."""
+    arquivos = sorted((p for p in EXPORT_DIR.glob('*') if not p.name.startswith('.')),
+                      key=lambda p: p.stat().st_mtime, reverse=True)
+    for antigo in arquivos[manter:]:
+        antigo.unlink(missing_ok=True)
@@ -0,0 +1,188 @@
+"""
+Exposição de imóveis rurais às faixas de servidão - processamento em fluxo
+Cruza polígonos de imóveis (exportações CAR/SIGEF num GPKG local, milhões de
+feições) com as faixas de servidão das linhas (consulta_faixa.IndiceFaixa)
+sem carregar o arquivo inteiro:
+
+  - a leitura é em fluxo (pyogrio.open_arrow, BLOCO feições por vez) e o
+    driver já descarta os imóveis fora do retângulo que envolve as faixas
+    (filtro bbox aplicado no próprio GPKG, pelo índice espacial dele);
+  - cada bloco é testado de forma vetorizada contra o índice das faixas,
+    montado uma única vez;
+  - os imóveis atingidos vão para o Parquet bloco a bloco (um row group por
+    bloco), então a memória depende do tamanho do bloco, não do arquivo.
+
+Saída (uma linha por imóvel × linha de transmissão): fid, identificador do
+imóvel (--id), Nome, Voltagem, Distancia_m (do imóvel ao eixo), Area_imovel_m2,
+Area_faixa_m2 (parte do imóvel dentro da faixa) e Pct_faixa.
+
+Uso:
+    python exposicao_imoveis.py imoveis.gpkg [--camada area_imovel] [--id cod_imovel]
+                                [--bloco 50000] [--voltagens 230,525] [--saida arquivo.parquet]
+"""
+from pathlib import Path
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyogrio
+import shapely
+from pyproj import CRS, Transformer
+
+from consulta_faixa import CRS_METRICO, IndiceFaixa
+
+try:
+    import resource  # só Unix
+except ImportError:
+    resource = None
+
+BASE_DIR = Path(__file__).parent
+OUT_DIR = BASE_DIR / 'outputs'
+
+BLOCO = 50_000   # feições lidas e testadas por vez
+
+ESQUEMA_BASE = [
+    ('fid', pa.int64()),
+    ('Nome', pa.string()),
+    ('Voltagem', pa.string()),
+    ('Distancia_m', pa.float32()),
+    ('Area_imovel_m2', pa.float64()),
+    ('Area_faixa_m2', pa.float64()),
+    ('Pct_faixa', pa.float32()),
+]
+
+
+def _memoria() -> str:
+    """Pico de memória do processo; sem o módulo resource (Windows), o pico do tracemalloc
+    se estiver ativo (python -X tracemalloc), senão 'n/d'."""
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return f"{pico / 2**20 if sys.platform == 'darwin' else pico / 1024:.0f} MB"
+    if tracemalloc.is_tracing():
+        return f"{tracemalloc.get_traced_memory()[1] / 2**20:.0f} MB (Python)"
+    return 'n/d'
+
+
+class ExposicaoImoveis:
+    """Cruza em fluxo um arquivo de imóveis com as faixas de servidão."""
+
+    def __init__(self, indice: IndiceFaixa, voltagens=None):
+        self.indice = indice
+        self.voltagens = set(voltagens) if voltagens else None
+
+    def _bbox(self, crs_imoveis):
+        """Retângulo das faixas no CRS do arquivo de imóveis (filtro empurrado para o driver)."""
+        transformador = Transformer.from_crs(CRS_METRICO, crs_imoveis, always_xy=True)
+        return transformador.transform_bounds(*self.indice.extensao(), densify_pts=21)
+
+    def bloco(self, fids, geometrias):
+        """Testa um bloco (geometrias em CRS_METRICO) -> dict de colunas dos imóveis atingidos."""
+        i_imovel, linha, distancias = self.indice.pares(geometrias)
+        if self.voltagens is not None:
+            manter = np.isin(self.indice.voltagens[linha], list(self.voltagens))
+            i_imovel, linha, distancias = i_imovel[manter], linha[manter], distancias[manter]
+        atingidos = shapely.make_valid(geometrias[i_imovel])  # só os atingidos entram no cálculo de área
+        area = shapely.area(atingidos)
+        area_faixa = shapely.area(shapely.intersection(atingidos, self.indice.faixas[linha]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = np.where(area > 0, 100 * area_faixa / area, 0.0)
+        return i_imovel, {
+            'fid': fids[i_imovel],
+            'Nome': self.indice.nomes[linha],
+            'Voltagem': self.indice.voltagens[linha],
+            'Distancia_m': np.round(distancias, 1),
+            'Area_imovel_m2': np.round(area, 1),
+            'Area_faixa_m2': np.round(area_faixa, 1),
+            'Pct_faixa': np.round(pct, 2),
+        }
+
+    def executar(self, arquivo, saida, camada=None, coluna_id=None, bloco=BLOCO):
+        """Processa o arquivo em blocos e grava saida (Parquet) incrementalmente. Retorna o resumo."""
+        arquivo, saida = Path(arquivo), Path(saida)
+        info = pyogrio.read_info(arquivo, layer=camada)
+        if not info['crs']:
+            raise ValueError(f"{arquivo.name}: camada sem sistema de referência (CRS)")
+        crs = CRS.from_user_input(info['crs'])
+        bbox = self._bbox(crs)
+        colunas = [coluna_id] if coluna_id else []
+        if coluna_id and coluna_id not in info['fields']:
+            raise ValueError(f"Coluna '{coluna_id}' não existe em {arquivo.name} (campos: {', '.join(info['fields'])})")
+        para_metrico = Transformer.from_crs(crs, CRS_METRICO, always_xy=True)
+
+        esquema = pa.schema(ESQUEMA_BASE[:1] + ([(coluna_id, pa.string())] if coluna_id else []) + ESQUEMA_BASE[1:])
+        saida.parent.mkdir(parents=True, exist_ok=True)
+        tmp = saida.with_name(f".{saida.stem}.{os.getpid()}{saida.suffix}")
+        resumo = {'total': info['features'], 'lidos': 0, 'imoveis_atingidos': 0, 'registros': 0, 'blocos': 0}
+        inicio = time.perf_counter()
+        try:
+            with pyogrio.open_arrow(arquivo, layer=camada, columns=colunas, bbox=bbox, batch_size=bloco,
+                                    return_fids=True, use_pyarrow=True) as (meta, leitor), \
+                    pq.ParquetWriter(tmp, esquema, compression='zstd') as escritor:
+                coluna_geom = meta['geometry_name'] or 'wkb_geometry'
+                coluna_fid = meta['fid_column'] or 'OGC_FID'  # o nome depende do driver ('fid' no GPKG)
+                for lote in leitor:
+                    fids = lote.column(coluna_fid).to_numpy(zero_copy_only=False).astype('int64')
+                    geometrias = shapely.from_wkb(lote.column(coluna_geom).to_numpy(zero_copy_only=False))
+                    geometrias = shapely.transform(geometrias, lambda xy: np.column_stack(
+                        para_metrico.transform(xy[:, 0], xy[:, 1])))
+                    i_imovel, dados = self.bloco(fids, geometrias)
+                    if coluna_id:
+                        ids = lote.column(coluna_id).cast(pa.string()).take(pa.array(i_imovel, type=pa.int64()))
+                        dados = {'fid': dados.pop('fid'), coluna_id: ids, **dados}
+                    if len(i_imovel):
+                        escritor.write_table(pa.Table.from_pydict(dados, schema=esquema))
+                    resumo['blocos'] += 1
+                    resumo['lidos'] += lote.num_rows
+                    resumo['imoveis_atingidos'] += len(np.unique(i_imovel))
+                    resumo['registros'] += len(i_imovel)
+                    print(f"  • bloco {resumo['blocos']}: {resumo['lidos']:,} imóveis lidos, "
+                          f"{resumo['imoveis_atingidos']:,} atingidos "
+                          f"({time.perf_counter() - inicio:.1f}s, pico {_memoria()})")
+            os.replace(tmp, saida)
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+        resumo['segundos'] = time.perf_counter() - inicio
+        return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Imóveis rurais atingidos pelas faixas de servidão (em fluxo)')
+    parser.add_argument('arquivo', type=Path, help='GPKG/SHP com os polígonos dos imóveis (CAR/SIGEF)')
+    parser.add_argument('--camada', help='Camada do arquivo (padrão: a primeira)')
+    parser.add_argument('--id', dest='coluna_id', help='Coluna identificadora do imóvel a copiar (ex.: cod_imovel)')
+    parser.add_argument('--bloco', type=int, default=BLOCO, help=f'Feições por bloco (padrão: {BLOCO})')
+    parser.add_argument('--voltagens', default='', help='Voltagens a considerar, ex.: 230,525 (padrão: todas)')
+    parser.add_argument('--saida', type=Path, help='Parquet de saída (padrão: outputs/exposicao_<arquivo>.parquet)')
+    args = parser.parse_args(argv)
+
+    if not args.arquivo.exists():
+        print(f"⚠️  Arquivo não encontrado: {args.arquivo}")
+        return 1
+    voltagens = [v.strip() for v in args.voltagens.split(',') if v.strip()]
+    saida = args.saida or OUT_DIR / f"exposicao_{args.arquivo.stem}.parquet"
+
+    indice = IndiceFaixa.carregar()
+    print(f"✓ Índice das faixas: {len(indice.nomes)} linhas")
+    print(f"📂 Lendo {args.arquivo.name} em blocos de {args.bloco:,} feições (apenas na extensão das faixas)")
+    try:
+        resumo = ExposicaoImoveis(indice, voltagens).executar(args.arquivo, saida, args.camada, args.coluna_id,
+                                                              args.bloco)
+    except (OSError, ValueError, pyogrio.errors.DataSourceError) as e:
+        print(f"⚠️  {e}")
+        return 1
+
+    total = resumo['total'] if resumo['total'] >= 0 else None
+    ignorados = f" ({total - resumo['lidos']:,} descartados pelo filtro espacial)" if total else ''
+    print(f"✓ {resumo['lidos']:,} imóveis lidos{ignorados} em {resumo['segundos']:.1f}s")
+    print(f"✓ {resumo['imoveis_atingidos']:,} imóveis atingidos ({resumo['registros']:,} registros imóvel × linha)")
+    print(f"✓ Resultado: {saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,40 +2,78 @@
 Script para gerar CSV de municípios RS com coluna de Voltagem
 Cruza RS/Municipios_afetas_linhas.csv com linhas do RS/Linha_trans_RS.gpkg
 e detecta quais voltagens afetam cada município via spatial join.
+Os municípios são cruzados pelo código IBGE (CD_MUN).
 """
 from pathlib import Path
+import argparse
 import pandas as pd
 import geopandas as gpd
 import fiona
 
+import municipios_ibge
+
 BASE_DIR = Path(__file__).parent
 RS_DIR = BASE_DIR / 'RS'
 RS_MUNS_CSV = RS_DIR / 'Municipios_afetas_linhas.csv'
 RS_MUNS_GPKG = RS_DIR / 'municipios_afetados_linhas_transmissao.gpkg'
 RS_LINHAS_GPKG = RS_DIR / 'Linha_trans_RS.gpkg'
 OUTPUT_CSV = RS_DIR / 'Municipios_afetas_linhas_por_voltagem.csv'
+SEM_VOLTAGEM = 'NÃO_DETECTADA'
+
+def expandir_por_voltagem(df_muns: pd.DataFrame, join_result: pd.DataFrame) -> pd.DataFrame:
+    """Um registro por (município, voltagem), na ordem de df_muns e com voltagens ordenadas.
+    Municípios sem voltagem detectada recebem Voltagem = 'NÃO_DETECTADA'.
+    Cruzamento pelo CD_MUN inteiro: serve para a tabela do RS ou para uma tabela nacional.
+    """
+    # groupby: voltagens distintas de cada município
+    voltagens = (
+        join_result.assign(CD_MUN=municipios_ibge.como_codigo(join_result['CD_MUN']).array)
+        .dropna(subset=['CD_MUN'])
+        .groupby('CD_MUN')['Voltagem']
+        .agg(lambda v: sorted(set(v)))
+    )
+    # explode: um par (CD_MUN, Voltagem) por linha
+    pares = voltagens.explode().rename('Voltagem').reset_index().rename(columns={'CD_MUN': '_cd_mun'})
+
+    # merge: expande a tabela de municípios preservando a ordem original
+    base = df_muns.assign(_cd_mun=municipios_ibge.como_codigo(df_muns['CD_MUN']).array,
+                          _ordem=range(len(df_muns)))
+    df_final = base.merge(pares, on='_cd_mun', how='left', sort=False)
+    df_final = df_final.sort_values('_ordem', kind='stable')
+    df_final['Voltagem'] = df_final['Voltagem'].astype(object).where(df_final['Voltagem'].notna(), SEM_VOLTAGEM)
+    return df_final.drop(columns=['_cd_mun', '_ordem']).reset_index(drop=True)
+
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera o CSV de municípios com coluna de Voltagem')
+    parser.add_argument('--municipios-csv', type=Path, default=RS_MUNS_CSV,
+                        help='Tabela de municípios com CD_MUN (padrão: RS; aceita tabela nacional)')
+    parser.add_argument('--municipios-malha', type=Path, default=RS_MUNS_GPKG,
+                        help='GeoPackage/shapefile com os polígonos dos municípios')
+    parser.add_argument('--linhas', type=Path, default=RS_LINHAS_GPKG, help='GeoPackage das linhas de transmissão')
+    parser.add_argument('--saida', type=Path, default=OUTPUT_CSV, help='CSV de saída')
+    args = parser.parse_args(argv)
+    
     print("=" * 60)
     print("GERADOR DE CSV COM VOLTAGEM POR MUNICÍPIO - RS")
     print("=" * 60)
     
     # Ler CSV original
     print("\n📂 Lendo CSV original...")
-    df_muns = pd.read_csv(RS_MUNS_CSV)
+    df_muns = pd.read_csv(args.municipios_csv)
     print(f"  ✓ {len(df_muns)} municípios no CSV")
     
     # Ler municípios do GPKG
     print("\n📂 Lendo municípios do GPKG...")
     try:
-        layers = fiona.listlayers(str(RS_MUNS_GPKG))
+        layers = fiona.listlayers(str(args.municipios_malha))
     except Exception:
         layers = []
     
     gdf_muns = None
     for lyr in layers:
         try:
-            tmp = gpd.read_file(RS_MUNS_GPKG, layer=lyr)
+            tmp = gpd.read_file(args.municipios_malha, layer=lyr)
             if not tmp.empty and tmp.geom_type.astype(str).str.contains('Polygon', case=False).any():
                 gdf_muns = tmp
                 break
@@ -43,7 +81,7 @@ def main():
             continue
     
     if gdf_muns is None:
-        gdf_muns = gpd.read_file(RS_MUNS_GPKG)
+        gdf_muns = gpd.read_file(args.municipios_malha)
     
     # Normalizar CRS
     if gdf_muns.crs and gdf_muns.crs.to_epsg() != 4326:
@@ -56,19 +94,24 @@ def main():
                 gdf_muns = gdf_muns.rename(columns={c: 'NM_MUN'})
                 break
     
+    if 'CD_MUN' not in gdf_muns.columns:
+        # fonte sem código IBGE: resolve pelo nome (ingestão)
+        ufs = gdf_muns['SIGLA_UF'] if 'SIGLA_UF' in gdf_muns.columns else 'RS'
+        gdf_muns['CD_MUN'] = municipios_ibge.resolver_codigos(gdf_muns['NM_MUN'], ufs).array
+    
     print(f"  ✓ {len(gdf_muns)} municípios no GPKG")
     
     # Ler linhas do RS
     print("\n📂 Lendo linhas de transmissão...")
     try:
-        layers = fiona.listlayers(str(RS_LINHAS_GPKG))
+        layers = fiona.listlayers(str(args.linhas))
     except Exception:
         layers = []
     
     layer_to_use = None
     for lyr in layers:
         try:
-            tmp = gpd.read_file(RS_LINHAS_GPKG, layer=lyr)
+            tmp = gpd.read_file(args.linhas, layer=lyr)
             if not tmp.empty and tmp.geom_type.astype(str).str.contains('Line', case=False).any():
                 layer_to_use = lyr
                 break
@@ -78,7 +121,7 @@ def main():
     if layer_to_use is None and layers:
         layer_to_use = layers[0]
     
-    gdf_linhas = gpd.read_file(RS_LINHAS_GPKG, layer=layer_to_use)
+    gdf_linhas = gpd.read_file(args.linhas, layer=layer_to_use)
     
     if gdf_linhas.crs and gdf_linhas.crs.to_epsg() != 4326:
         gdf_linhas = gdf_linhas.to_crs(epsg=4326)
@@ -114,52 +157,17 @@ def main():
     print("\n🔍 Detectando voltagens por município (spatial join)...")
     join_result = gpd.sjoin(gdf_muns, gdf_linhas_buf[['Voltagem', 'geometry']], how='inner', predicate='intersects')
     
-    # Agrupar por município e coletar todas as voltagens
-    mun_voltagens = {}
-    for idx, row in join_result.iterrows():
-        mun = row['NM_MUN']
-        volt = row['Voltagem']
-        if mun not in mun_voltagens:
-            mun_voltagens[mun] = set()
-        mun_voltagens[mun].add(volt)
-    
-    print(f"  ✓ {len(mun_voltagens)} municípios com voltagens detectadas")
+    print(f"  ✓ {municipios_ibge.como_codigo(join_result['CD_MUN']).nunique()} municípios com voltagens detectadas")
     
     # Criar registros expandidos (um registro por município-voltagem)
-    registros = []
-    for _, row in df_muns.iterrows():
-        mun = row['NM_MUN']
-        # Normalizar nome para busca
-        mun_upper = str(mun).upper() if pd.notna(mun) else ''
-        
-        # Buscar voltagens detectadas
-        voltagens_detectadas = None
-        for m, volts in mun_voltagens.items():
-            if str(m).upper() == mun_upper:
-                voltagens_detectadas = volts
-                break
-        
-        if voltagens_detectadas:
-            # Criar um registro para cada voltagem
-            for volt in sorted(voltagens_detectadas):
-                registro = row.to_dict()
-                registro['Voltagem'] = volt
-                registros.append(registro)
-        else:
-            # Município sem voltagem detectada (mantém sem voltagem específica)
-            registro = row.to_dict()
-            registro['Voltagem'] = 'NÃO_DETECTADA'
-            registros.append(registro)
-    
-    # Criar DataFrame final
-    df_final = pd.DataFrame(registros)
+    df_final = expandir_por_voltagem(df_muns, join_result)
     
     # Salvar CSV
-    df_final.to_csv(OUTPUT_CSV, index=False, encoding='utf-8-sig')
+    df_final.to_csv(args.saida, index=False, encoding='utf-8-sig')
     
     print("\n" + "=" * 60)
     print(f"✅ CSV gerado com sucesso!")
-    print(f"📄 Arquivo: {OUTPUT_CSV}")
+    print(f"📄 Arquivo: {args.saida}")
     print(f"📊 Total de registros: {len(df_final)}")
     print(f"📊 Municípios únicos: {df_final['NM_MUN'].nunique()}")
     print("\nDistribuição por voltagem:")
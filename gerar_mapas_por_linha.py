@@ -5,6 +5,7 @@ Ignora combinações que não existem nos dados (ex: 230kV em RS, 500kV em RS, e
 Saída: outputs/mapas/
 """
 from pathlib import Path
+import argparse
 import zipfile
 import pandas as pd
 import geopandas as gpd
@@ -14,6 +15,16 @@ from folium import plugins
 import warnings
 warnings.filterwarnings('ignore')
 
+from cache_artefatos import CacheArtefatos, adicionar_argumento_force
+from consulta_faixa import FAIXA_METROS
+import ativos_estaticos
+import consulta_faixa
+import ingestao_epe
+import modelo_dados
+import limites_estaduais
+import municipios_ibge
+import repositorio_linhas
+
 BASE_DIR = Path(__file__).parent
 OUT_DIR = BASE_DIR / 'outputs' / 'mapas'
 OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -43,12 +54,27 @@ CORES_VOLTAGEM = {
     'BASE': '#808080'  # Cinza
 }
 
-def carregar_dados():
-    """Carrega dados CSV e GeoPackages"""
+def _entradas_mapas():
+    """Arquivos de entrada que determinam o conteúdo dos mapas (inclui os ausentes,
+    para que o surgimento de um novo arquivo também invalide o cache)."""
+    entradas = [
+        CONSOLIDADO_CSV, MUNICIPIOS_GPKG, LINHAS_GPKG, FAIXA_SERVIDAO_GPKG, LINHAS_RS_GPKG,
+        RS_MUNS_SHP, RS_LINHAS_GPKG, RS_MUNS_GPKG, RS_MUNS_CSV, RS_MUNS_VOLTAGEM_CSV, RS_MUNS_ZIP,
+        ativos_estaticos.MANIFESTO,
+    ]
+    entradas.extend(limites_estaduais.caminho(uf) for uf in limites_estaduais.UFS_PADRAO)
+    if ESTADOS_DIR.exists():
+        entradas.extend(sorted(p for p in ESTADOS_DIR.rglob('*') if p.is_file()))
+    return entradas
+
+
+def carregar_dados(df=None):
+    """Carrega dados CSV e GeoPackages (df consolidado pode vir em memória do pipeline)"""
     print("📂 Carregando dados...")
     
     # CSV consolidado
-    df = pd.read_csv(CONSOLIDADO_CSV)
+    df = modelo_dados.ler_tabela(CONSOLIDADO_CSV) if df is None else df.copy()
+    df['NM_MUN'] = df['NM_MUN'].astype(str)
     df['Voltagem'] = df['Voltagem'].astype(str)
     df['Estado'] = df['Estado'].astype(str).str.upper()
     
@@ -80,6 +106,25 @@ def carregar_dados():
     return df_espec, municipios_layers, linhas_layers, faixa_layers
 
 
+def _colunas_municipio(gdf):
+    """Colunas mantidas nas camadas de municípios (CD_MUN quando a fonte traz o código)."""
+    return [c for c in ['CD_MUN', 'NM_MUN', 'UF'] if c in gdf.columns] + ['geometry']
+
+
+def _selecionar_municipios(gdf_muns, afetados, manter: bool = True):
+    """Filtra gdf_muns pelos municípios de `afetados` (DataFrame com CD_MUN e/ou NM_MUN).
+    Usa o código IBGE inteiro (nomes se repetem entre UFs); o nome só é usado
+    quando uma das fontes não traz o código.
+    """
+    if 'CD_MUN' in gdf_muns.columns and 'CD_MUN' in afetados.columns:
+        codigos = municipios_ibge.como_codigo(afetados['CD_MUN']).dropna().unique()
+        mask = municipios_ibge.como_codigo(gdf_muns['CD_MUN']).isin(codigos).to_numpy()
+    else:
+        nomes = set(afetados['NM_MUN'].dropna().astype(str).str.upper().unique())
+        mask = gdf_muns['NM_MUN'].astype(str).str.upper().isin(nomes).to_numpy()
+    return gdf_muns[mask if manter else ~mask]
+
+
 def _read_municipios_layer(voltagem: str, estado: str):
     """Lê a camada de municípios para a voltagem e filtra por UF do estado.
     Para RS: usa o shapefile RS de municípios como base e calcula os afetados por interseção com as linhas do RS daquela voltagem (com pequeno buffer).
@@ -124,7 +169,7 @@ def _read_municipios_layer(voltagem: str, estado: str):
             muns_rs = muns_rs.copy()
             muns_rs['UF'] = 'RS'
             try:
-                muns_rs = muns_rs[['NM_MUN', 'UF', 'geometry']]
+                muns_rs = muns_rs[_colunas_municipio(muns_rs)]
             except Exception:
                 muns_rs = gpd.GeoDataFrame(muns_rs[['geometry']]).assign(UF='RS', NM_MUN=[f'MUN_{i}' for i in range(len(muns_rs))])
 
@@ -134,23 +179,18 @@ def _read_municipios_layer(voltagem: str, estado: str):
                 csv_path = RS_MUNS_VOLTAGEM_CSV if RS_MUNS_VOLTAGEM_CSV.exists() else RS_MUNS_CSV
                 if csv_path.exists():
                     dfm = pd.read_csv(csv_path)
-                    if 'NM_MUN' in dfm.columns:
+                    if 'CD_MUN' in dfm.columns or 'NM_MUN' in dfm.columns:
                         # Filtrar por voltagem se coluna existir
                         if 'Voltagem' in dfm.columns and RS_MUNS_VOLTAGEM_CSV.exists():
                             # Normalizar voltagem (remover .0 se for numérico)
                             dfm['Voltagem'] = dfm['Voltagem'].astype(str).str.replace('.0', '', regex=False)
                             # Filtrar pela voltagem pedida
-                            dfm_volt = dfm[dfm['Voltagem'] == str(voltagem)]
-                            if not dfm_volt.empty:
-                                csv_names = set(dfm_volt['NM_MUN'].dropna().astype(str).str.upper().unique().tolist())
-                            else:
-                                csv_names = set()
-                        else:
-                            # CSV sem voltagem: usar todos
-                            csv_names = set(dfm['NM_MUN'].dropna().astype(str).str.upper().unique().tolist())
-                        
-                        if csv_names:
-                            sel = muns_rs[muns_rs['NM_MUN'].astype(str).str.upper().isin(csv_names)][['NM_MUN', 'UF', 'geometry']]
+                            dfm = dfm[dfm['Voltagem'] == str(voltagem)]
+                        # CSV sem voltagem: usar todos
+
+                        if not dfm.empty:
+                            # cruzamento pelo CD_MUN (o CSV do RS traz o código IBGE)
+                            sel = _selecionar_municipios(muns_rs, dfm)[_colunas_municipio(muns_rs)]
                             if sel is not None and not sel.empty:
                                 return sel
             except Exception:
@@ -172,8 +212,7 @@ def _read_municipios_layer(voltagem: str, estado: str):
                 alvo_geo = alvo[['geometry']]
                 join_df = gpd.sjoin(cand, alvo_geo, how='inner', predicate='intersects')
                 if join_df is not None and not join_df.empty:
-                    nomes = set(join_df['NM_MUN'].astype(str).str.upper().unique())
-                    sel = muns_rs[muns_rs['NM_MUN'].astype(str).str.upper().isin(nomes)][['NM_MUN', 'UF', 'geometry']]
+                    sel = _selecionar_municipios(muns_rs, join_df)[_colunas_municipio(muns_rs)]
                     return sel
             except Exception:
                 pass
@@ -204,7 +243,7 @@ def _read_municipios_layer(voltagem: str, estado: str):
         except Exception:
             pass
     # reduzir colunas para minimizar tamanho do GeoJSON
-    cols_keep = [c for c in ['NM_MUN', 'UF'] if c in gdf.columns]
+    cols_keep = [c for c in ['CD_MUN', 'NM_MUN', 'UF'] if c in gdf.columns]
     try:
         gdf = gdf[cols_keep + ['geometry']]
     except Exception:
@@ -216,7 +255,8 @@ def _read_lines_layer(voltagem: str, estado: str):
     """Obtém linhas para a combinação voltagem-estado.
     1) Para RS: usa Linha_trans_RS.gpkg com filtro por voltagem
     2) tenta linhas_recortadas.gpkg layer linha_trans_{voltagem}_{estado}
-    3) fallback: faixa_servidao.gpkg layer linha_transmissao_{voltagem} e recorta pelos municípios do estado
+    3) fallback: faixa_servidao.gpkg já recortada pelo limite da UF (partição tensão/UF em .cache/linhas/)
+    4) sem o repositório: layer linha_transmissao_{voltagem} recortada pelos municípios do estado
     """
     # 1) RS tem arquivo dedicado
     if estado == 'RS':
@@ -277,7 +317,13 @@ def _read_lines_layer(voltagem: str, estado: str):
         return gdf
     except Exception:
         gdf = None
-    # 3) fallback: camada geral por voltagem na faixa de servidão
+    # 3) fallback: camada da faixa de servidão já recortada por UF (repositorio_linhas, .cache/linhas/)
+    if repositorio_linhas.cobre('faixa_servidao', estado):
+        try:
+            return repositorio_linhas.ler('faixa_servidao', voltagem, estado, colunas=['Nome', 'geometry'])
+        except Exception:
+            pass
+    # 4) repositório ausente (ex.: sem o limite da UF): camada geral por voltagem, recortada pelos municípios
     layer_faixa = f"linha_transmissao_{voltagem}"
     try:
         gdf = gpd.read_file(FAIXA_SERVIDAO_GPKG, layer=layer_faixa)
@@ -308,9 +354,8 @@ def _make_buffer(lines_gdf: gpd.GeoDataFrame, voltagem: str):
     """Cria buffer (faixa de servidão aproximada) em metros a partir das linhas."""
     if lines_gdf is None or lines_gdf.empty:
         return None
-    # distâncias aproximadas por voltagem (metros)
-    BUF = {'230': 60, '500': 80, '525': 80, '600': 90, '765': 100}
-    dist = BUF.get(voltagem, 60)
+    # distâncias aproximadas por voltagem (metros), as mesmas da consulta ponto × faixa
+    dist = FAIXA_METROS.get(voltagem, 60)
     g = lines_gdf.copy()
     # projeta para métrica (Web Mercator) para buffer rápido
     try:
@@ -348,29 +393,6 @@ def _unzip_state_shapefiles():
     return shps
 
 
-def _find_state_shapefile(estado: str) -> Path | None:
-    """Procura no workspace um shapefile do estado (PR/SC/RS) por nome do arquivo.
-    Retorna o caminho do .shp se encontrado.
-    """
-    estado = estado.upper()
-    tokens = {
-        'PR': ['pr', 'parana', 'paraná'],
-        'SC': ['sc', 'santa_catarina', 'santa catarina'],
-        'RS': ['rs', 'rio_grande_do_sul', 'rio grande do sul']
-    }.get(estado, [estado.lower()])
-    # 1) prioriza shapefiles extraídos/presentes em Shapefile_Estados
-    for shp in _unzip_state_shapefiles():
-        name = shp.name.lower()
-        if any(tok in name for tok in tokens):
-            return shp
-    # 2) percorre recursivamente no projeto procurando por .shp que contenha o token
-    for shp in BASE_DIR.rglob('*.shp'):
-        name = shp.name.lower()
-        if any(tok in name for tok in tokens):
-            return shp
-    return None
-
-
 def _find_municipios_shapefile_for_state(estado: str) -> Path | None:
     """Procura um shapefile/GeoPackage de MUNICÍPIOS para a UF.
     Heurística: nomes contendo 'munic' e tokens de UF; prioriza dentro de Shapefile_Estados.
@@ -384,6 +406,7 @@ def _find_municipios_shapefile_for_state(estado: str) -> Path | None:
     muni_tokens = ['munic', 'municip', 'municipio', 'município', 'munis']
 
     # 1) procurar em ESTADOS_DIR extraído e raiz
+    _unzip_state_shapefiles()
     candidates = []
     # dentro de zip extraídos
     for shp in ESTADOS_DIR.rglob('*.shp') if ESTADOS_DIR.exists() else []:
@@ -471,7 +494,7 @@ def _read_all_municipios_for_state(estado: str):
         # último recurso: cria nomes sequenciais (não ideal, mas evita falha)
         gdf['NM_MUN'] = [f'MUN_{i}' for i in range(len(gdf))]
     try:
-        gdf = gdf[['NM_MUN', 'UF', 'geometry']]
+        gdf = gdf[_colunas_municipio(gdf)]
     except Exception:
         gdf = gpd.GeoDataFrame(gdf[['geometry']]).assign(UF=estado.upper(), NM_MUN=[f'MUN_{i}' for i in range(len(gdf))])
     return gdf
@@ -505,74 +528,6 @@ def _simplify_geoms(gdf: gpd.GeoDataFrame, tol_m: float, preserve_topology: bool
         return gdf
 
 
-def _read_state_boundary_from_shp(estado: str):
-    """Lê o limite estadual a partir de um shapefile específico do estado, se existir.
-    Caso não encontre ou não seja poligonal, retorna None.
-    """
-    shp = _find_state_shapefile(estado)
-    if shp is None:
-        return None
-    try:
-        gdf = gpd.read_file(shp)
-    except Exception:
-        return None
-    # Verifica se é poligonal
-    try:
-        geom_types = set(gdf.geom_type.str.lower().unique())
-        if not any(t in geom_types for t in ['polygon', 'multipolygon']):
-            return None
-    except Exception:
-        return None
-    # CRS para WGS84
-    if gdf.crs and gdf.crs.to_epsg() != 4326:
-        try:
-            gdf = gdf.to_crs(epsg=4326)
-        except Exception:
-            pass
-    # mantém apenas geometria e UF
-    gdf = gdf.copy()
-    if 'UF' not in gdf.columns:
-        gdf['UF'] = estado.upper()
-    else:
-        gdf['UF'] = gdf['UF'].astype(str).str.upper().fillna(estado.upper())
-    try:
-        gdf = gdf[['UF', 'geometry']]
-    except Exception:
-        gdf = gpd.GeoDataFrame({'UF': [estado.upper()]}, geometry=gdf.geometry, crs=gdf.crs)
-    # Se houver múltiplas feições, optar por dissolver por UF para uma borda única
-    try:
-        gdf = gdf.dissolve(by='UF').reset_index()
-    except Exception:
-        pass
-    return gdf
-
-
-def _read_state_boundaries_from_base(estado: str):
-    """Fallback: cria limite estadual a partir da camada base de municípios (filtra apenas a UF pedida)."""
-    try:
-        gdf = gpd.read_file(MUNICIPIOS_GPKG, layer='municipios_afetados_linhas_de_transmissao_base')
-    except Exception:
-        return None
-    uf_col = 'UF' if 'UF' in gdf.columns else ('SIGLA_UF' if 'SIGLA_UF' in gdf.columns else None)
-    if not uf_col:
-        return None
-    gdf = gdf[gdf[uf_col].astype(str).str.upper() == estado.upper()].copy()
-    if gdf.empty:
-        return None
-    if gdf.crs and gdf.crs.to_epsg() != 4326:
-        try:
-            gdf = gdf.to_crs(epsg=4326)
-        except Exception:
-            pass
-    gdf = gdf.rename(columns={uf_col: 'UF'})
-    try:
-        gdf = gdf[['UF', 'geometry']]
-    except Exception:
-        gdf = gpd.GeoDataFrame({'UF': [estado.upper()]}, geometry=gdf.geometry, crs=gdf.crs)
-    # não fazer dissolve pesado; limites municipais já dão o contorno do estado
-    return gdf
-
-
 def identificar_combinacoes(df):
     """Identifica combinações (voltagem x estado) a partir do CSV e complementa
     com detecção de linhas presentes nas fontes geoespaciais (GPKG/SHAPE).
@@ -584,6 +539,8 @@ def identificar_combinacoes(df):
     csv_combos = csv_combos[csv_combos['Voltagem'] != 'BASE']
 
     # Detecção adicional por presença de linhas (garante RS 500kV, por exemplo)
+    camadas_faixa = {}
+
     def _has_lines_for(voltagem: str, estado: str) -> bool:
         # 1) tentar linhas_recortadas layer específica
         try:
@@ -595,24 +552,25 @@ def identificar_combinacoes(df):
             pass
         # 2) fallback: faixa_serv + interseção com UF
         try:
-            g = gpd.read_file(FAIXA_SERVIDAO_GPKG, layer=f"linha_transmissao_{voltagem}")
+            if voltagem not in camadas_faixa:  # uma leitura por voltagem para as 3 UFs
+                g = gpd.read_file(FAIXA_SERVIDAO_GPKG, layer=f"linha_transmissao_{voltagem}")
+                if g.crs and g.crs.to_epsg() != 4326:
+                    g = g.to_crs(epsg=4326)
+                camadas_faixa[voltagem] = g
+            g = camadas_faixa[voltagem]
             if g is None or g.empty:
                 return False
-            if g.crs and g.crs.to_epsg() != 4326:
-                try:
-                    g = g.to_crs(epsg=4326)
-                except Exception:
-                    pass
-            g_estado = _read_state_boundary_from_shp(estado) or _read_state_boundaries_from_base(estado)
-            if g_estado is None or g_estado.empty:
+            # contorno exato da UF, do cache (.cache/limites/)
+            g_estado = limites_estaduais.geometria(estado)
+            if g_estado is None:
                 return False
             # usar bbox rápida
             try:
-                inter = g.sindex.query(g_estado.geometry.unary_union, predicate='intersects')
+                inter = g.sindex.query(g_estado, predicate='intersects')
                 return len(inter) > 0
             except Exception:
                 # fallback lento: bound box
-                minx, miny, maxx, maxy = g_estado.total_bounds
+                minx, miny, maxx, maxy = g_estado.bounds
                 bbox = g.cx[minx:maxx, miny:maxy]
                 return (bbox is not None) and (not bbox.empty)
         except Exception:
@@ -739,13 +697,11 @@ def adicionar_camadas(mapa, gdf_municipios, gdf_linhas, gdf_buffer, voltagem, es
     
     if (gdf_all_muns is not None) and (not gdf_all_muns.empty):
         try:
-            # alinhar nomes
+            # alinhar pelo código IBGE (nome só se faltar o código)
             if (gdf_mun_filtrado is not None) and (not gdf_mun_filtrado.empty) and ('NM_MUN' in gdf_mun_filtrado.columns):
-                afetados = set(gdf_mun_filtrado['NM_MUN'].astype(str).str.upper().unique())
-                gdf_all_muns['NM_MUN_UP'] = gdf_all_muns['NM_MUN'].astype(str).str.upper()
-                gdf_nao = gdf_all_muns[~gdf_all_muns['NM_MUN_UP'].isin(afetados)][['NM_MUN', 'UF', 'geometry']]
+                gdf_nao = _selecionar_municipios(gdf_all_muns, gdf_mun_filtrado, manter=False)[_colunas_municipio(gdf_all_muns)]
             else:
-                gdf_nao = gdf_all_muns[['NM_MUN', 'UF', 'geometry']]
+                gdf_nao = gdf_all_muns[_colunas_municipio(gdf_all_muns)]
             # simplificação mais forte no fundo
             gdf_nao = _simplify_geoms(gdf_nao, tol_m=100)
             if not gdf_nao.empty:
@@ -829,19 +785,17 @@ def adicionar_camadas(mapa, gdf_municipios, gdf_linhas, gdf_buffer, voltagem, es
                             cand = gdf_all_muns_fb
                         afetados_fb = gpd.overlay(cand, gdf_buf, how='intersection')
                         if (afetados_fb is not None) and (not afetados_fb.empty):
-                            # manter apenas NM_MUN/UF únicos com geometria original dos municípios
-                            nomes = set(afetados_fb['NM_MUN'].astype(str).str.upper().unique())
-                            gdf_mun_filtrado = gdf_all_muns_fb[gdf_all_muns_fb['NM_MUN'].astype(str).str.upper().isin(nomes)][['NM_MUN', 'UF', 'geometry']]
+                            # manter apenas municípios únicos com geometria original dos municípios
+                            gdf_mun_filtrado = _selecionar_municipios(gdf_all_muns_fb, afetados_fb)[_colunas_municipio(gdf_all_muns_fb)]
                 except Exception:
                     pass
 
-    # Limite estadual (por UF via shapefile, com fallback)
-    gdf_estado = _read_state_boundary_from_shp(estado)
-    if (gdf_estado is None) or gdf_estado.empty:
-        gdf_estado = _read_state_boundaries_from_base(estado)
+    # Limite estadual: contorno dissolvido e já simplificado (150 m) do cache .cache/limites/
+    try:
+        gdf_estado = limites_estaduais.contorno(estado, tol_m=150)
+    except Exception:
+        gdf_estado = None
     if gdf_estado is not None and not gdf_estado.empty:
-        # simplificação mais forte no contorno estadual
-        gdf_estado = _simplify_geoms(gdf_estado, tol_m=150)
         nome_fg = f"Limite Estadual ({estado})"
         fg_estados = folium.FeatureGroup(name=nome_fg, show=True)
         folium.GeoJson(
@@ -924,6 +878,8 @@ def gerar_mapa(voltagem, estado, gdf_municipios, gdf_linhas, gdf_buffer, df_filt
     nome_arquivo = f"mapa_{voltagem}kV_{estado}.html"
     caminho_saida = OUT_DIR / nome_arquivo
     mapa.save(str(caminho_saida))
+    # Leaflet/folium servidos por outputs/static/ (compartilhados entre os mapas)
+    ativos_estaticos.reescrever_arquivo(caminho_saida)
     
     print(f"    ✓ Salvo: {caminho_saida}")
     return caminho_saida
@@ -1145,33 +1101,47 @@ def gerar_indice_html(mapas_gerados):
     return indice_path
 
 
-def main():
+def gerar_mapas(cache, df=None):
+    """Gera (ou reaproveita do cache) um mapa por combinação voltagem-estado.
+    Retorna a lista [(voltagem, estado, caminho)] de mapas disponíveis.
+    """
     print("=" * 60)
     print("🗺️  GERADOR DE MAPAS POR LINHA DE TRANSMISSÃO")
     print("=" * 60)
     
     # Carrega dados (camadas disponíveis)
-    df_espec, municipios_layers, linhas_layers, faixa_layers = carregar_dados()
+    df_espec, municipios_layers, linhas_layers, faixa_layers = carregar_dados(df)
     
     if df_espec.empty:
         print("❌ Erro: Nenhum dado encontrado em dados_consolidados.csv")
-        return
+        return []
     
     # Identifica combinações existentes
     combinacoes = identificar_combinacoes(df_espec)
     
     if combinacoes.empty:
         print("❌ Erro: Nenhuma combinação voltagem-estado encontrada")
-        return
+        return []
     
     # Gera mapas
     print(f"\n📍 Gerando {len(combinacoes)} mapas...\n")
     mapas_gerados = []
+    entradas = _entradas_mapas()
+    # módulos de que o conteúdo dos mapas depende (faixa, CD_MUN, contornos estaduais, recorte das linhas)
+    codigo = [Path(__file__), Path(ativos_estaticos.__file__), Path(repositorio_linhas.__file__),
+              Path(ingestao_epe.__file__), Path(limites_estaduais.__file__), Path(municipios_ibge.__file__),
+              Path(consulta_faixa.__file__), Path(modelo_dados.__file__)]
     
     for idx, row in combinacoes.iterrows():
         voltagem = row['Voltagem']
         estado = row['Estado']
         
+        # Reaproveita o mapa se entradas, parâmetros e código não mudaram
+        caminho = OUT_DIR / f"mapa_{voltagem}kV_{estado}.html"
+        if not cache.verificar(caminho, entradas, parametros={'voltagem': voltagem, 'estado': estado, 'faixa_m': FAIXA_METROS.get(voltagem, 60)}, codigo=codigo):
+            mapas_gerados.append((voltagem, estado, caminho))
+            continue
+        
         # Filtra dados para esta combinação
         df_filtrado = df_espec[
             (df_espec['Voltagem'] == voltagem) & 
@@ -1180,16 +1150,44 @@ def main():
         
         try:
             caminho = gerar_mapa(voltagem, estado, None, None, None, df_filtrado)
+            cache.registrar(caminho)
             mapas_gerados.append((voltagem, estado, caminho))
         except Exception as e:
             print(f"    ⚠️  Erro ao gerar mapa {voltagem}kV-{estado}: {e}")
+    return mapas_gerados
+
+
+def gerar_indice(cache, mapas_gerados):
+    """Gera a página índice dos mapas se a lista de mapas mudou."""
+    indice_path = OUT_DIR / 'index.html'
+    params_indice = sorted((v, e, c.name) for v, e, c in mapas_gerados)
+    if cache.verificar(indice_path, parametros=params_indice, codigo=[Path(__file__)]):
+        gerar_indice_html(mapas_gerados)
+        cache.registrar(indice_path)
+    return indice_path
+
+
+def main(argv=None):
+    parser = adicionar_argumento_force(argparse.ArgumentParser(description='Gera mapas interativos por linha/estado'))
+    args = parser.parse_args(argv)
+    cache = CacheArtefatos(force=args.force)
+
+    # Contornos estaduais e linhas da faixa de servidão recortadas por UF (no pipeline: etapas 'limites' e 'linhas')
+    limites_estaduais.atualizar(cache)
+    try:
+        repositorio_linhas.construir_faixa_servidao(cache)
+    except Exception as e:
+        print(f"⚠️  Repositório de linhas indisponível ({e}); recorte feito durante a geração dos mapas")
+
+    mapas_gerados = gerar_mapas(cache)
     
     # Gera página índice
     if mapas_gerados:
-        gerar_indice_html(mapas_gerados)
+        gerar_indice(cache, mapas_gerados)
+        cache.imprimir_resumo()
         
         print("\n" + "=" * 60)
-        print(f"✅ CONCLUÍDO! {len(mapas_gerados)} mapas gerados com sucesso")
+        print(f"✅ CONCLUÍDO! {len(mapas_gerados)} mapas disponíveis")
         print(f"📂 Diretório de saída: {OUT_DIR}")
         print(f"🌐 Abra o arquivo index.html para navegar pelos mapas")
         print("=" * 60)
@@ -1,17 +1,27 @@
 """
 Gera um relatório HTML único (interativo) com Plotly
 Saída: outputs/dashboard.html
+
+A tabela completa é filtrada no navegador: índices por voltagem e estado (gerados aqui)
+e, para a busca por texto (substring no texto da linha), um índice de trigramas montado
+ao abrir a página. Buscas de 3+ caracteres só conferem as linhas do trigrama mais raro;
+as de 1-2 caracteres percorrem as linhas candidatas.
 """
 from pathlib import Path
-import sys
-import subprocess
+import argparse
 from datetime import datetime
+import json
 
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import plotly.io as pio
 
+from cache_artefatos import CacheArtefatos, adicionar_argumento_force
+import ativos_estaticos
+import cubo_estatisticas
+import modelo_dados
+
 BASE_DIR = Path(__file__).parent
 OUT_DIR = BASE_DIR / 'outputs'
 OUT_DIR.mkdir(exist_ok=True)
@@ -23,51 +33,21 @@ MULTIPLAS_CSV = BASE_DIR / 'municipios_multiplas_linhas.csv'
 def ensure_data():
     if CONSOLIDADO_CSV.exists() and MULTIPLAS_CSV.exists():
         return
-    # Se não existir, executa o consolidado
-    print('Dados não encontrados. Executando analise_consolidada.py...')
-    subprocess.run([sys.executable, str(BASE_DIR / 'analise_consolidada.py')], check=True)
+    # Se não existir, executa o consolidado (no mesmo processo)
+    print('Dados não encontrados. Executando analise_consolidada...')
+    import analise_consolidada
+    analise_consolidada.executar()
 
 
 def load():
-    df = pd.read_csv(CONSOLIDADO_CSV)
-    df_mult = pd.read_csv(MULTIPLAS_CSV)
-    df['Voltagem'] = df['Voltagem'].astype(str)
-    df['Estado'] = df['Estado'].astype(str)
-    df_espec = df[df['Tipo'] == 'especifica'].copy()
-    # Normalização e deduplicação para evitar linhas repetidas
-    df_espec['NM_MUN'] = df_espec['NM_MUN'].astype(str).str.strip()
-    df_espec['Estado'] = df_espec['Estado'].astype(str).str.strip().str.upper()
-    df_espec['Voltagem'] = df_espec['Voltagem'].astype(str).str.strip()
-    df_espec = df_espec.drop_duplicates(subset=['NM_MUN', 'Estado', 'Voltagem'])
-
-    # Normaliza e deduplica a tabela de múltiplas linhas também
-    if 'Municipio' in df_mult.columns:
-        df_mult['Municipio'] = df_mult['Municipio'].astype(str).str.strip()
-    if 'Estado' in df_mult.columns:
-        df_mult['Estado'] = df_mult['Estado'].astype(str).str.strip().str.upper()
-    if 'Voltagens' in df_mult.columns:
-        # normaliza espaços e ordem (já vem ordenado do gerador, mas por garantia)
-        df_mult['Voltagens'] = (
-            df_mult['Voltagens']
-            .astype(str)
-            .str.split(',')
-            .apply(lambda xs: ', '.join(sorted(v.strip() for v in xs)))
-        )
-    if 'Num_Linhas' in df_mult.columns:
-        df_mult['Num_Linhas'] = pd.to_numeric(df_mult['Num_Linhas'], errors='coerce').fillna(0).astype(int)
-    df_mult = df_mult.drop_duplicates(subset=['Municipio', 'Estado', 'Num_Linhas', 'Voltagens'])
-    return df, df_espec, df_mult
-
-
-def build_figures(df, df_espec, df_mult):
+    return modelo_dados.carregar(CONSOLIDADO_CSV, MULTIPLAS_CSV)
+
+
+def build_figures(cubo, df_mult):
     figs = []
 
     # 1. Municípios por voltagem
-    s_volt = (
-        df_espec.groupby('Voltagem')['NM_MUN']
-        .nunique()
-        .sort_index(key=lambda x: x.astype(int))
-    )
+    s_volt = cubo.por_voltagem()
     fig1 = px.bar(
         s_volt,
         orientation='h',
@@ -79,7 +59,7 @@ def build_figures(df, df_espec, df_mult):
     figs.append(('Municípios por voltagem', fig1))
 
     # 2. Municípios por estado
-    s_estado = df.groupby('Estado')['NM_MUN'].nunique().sort_values(ascending=False)
+    s_estado = cubo.por_estado(base=True).sort_values(ascending=False)
     fig2 = px.bar(
         s_estado,
         text_auto=True,
@@ -90,8 +70,7 @@ def build_figures(df, df_espec, df_mult):
     figs.append(('Municípios por estado', fig2))
 
     # 3. Distribuição: nº de linhas por município
-    mun_lin = df_espec.groupby('NM_MUN')['Linha'].nunique()
-    dist = mun_lin.value_counts().sort_index()
+    dist = cubo.distribuicao()
     fig3 = px.bar(
         dist,
         labels={'index': 'Nº de Linhas', 'value': 'Qtd de Municípios'},
@@ -102,7 +81,7 @@ def build_figures(df, df_espec, df_mult):
     figs.append(('Distribuição por município', fig3))
 
     # 4. Matriz estado x voltagem
-    mat = df_espec.groupby(['Estado', 'Voltagem'])['NM_MUN'].nunique().unstack(fill_value=0)
+    mat = cubo.matriz()
     fig4 = px.imshow(
         mat,
         text_auto=True,
@@ -145,33 +124,46 @@ def build_figures(df, df_espec, df_mult):
 
     return figs
 
+def montar_indice_tabela(df_all):
+    """Dados da tabela em colunas (JSON compacto) + índices por voltagem e estado.
+    Os índices guardam as posições das linhas em ordem crescente. O índice de trigramas da
+    busca por texto é derivado destes dados no navegador (sem tocar no DOM).
+    """
+    municipios = df_all['Municipio'].astype(str).tolist()
+    estados = sorted(df_all['Estado'].astype(str).unique())
+    pos_estado = {e: i for i, e in enumerate(estados)}
+    voltagens_linha = [[v.strip() for v in str(vs).split(',') if v.strip()] for vs in df_all['Voltagens']]
+    voltagens = sorted({v for vs in voltagens_linha for v in vs}, key=lambda x: int(x) if x.isdigit() else 999)
+
+    por_voltagem = {v: [] for v in voltagens}
+    por_estado = {e: [] for e in estados}
+    for i, (nome, estado, vs) in enumerate(zip(municipios, df_all['Estado'].astype(str), voltagens_linha)):
+        por_estado[estado].append(i)
+        for v in vs:
+            por_voltagem[v].append(i)
+
+    return {
+        'colunas': {
+            'm': municipios,
+            'e': [pos_estado[e] for e in df_all['Estado'].astype(str)],
+            'n': [int(n) for n in df_all['Num_Linhas']],
+            'v': [', '.join(vs) for vs in voltagens_linha],
+        },
+        'estados': estados,
+        'voltagens': voltagens,
+        'indice': {'voltagem': por_voltagem, 'estado': por_estado},
+    }
+
+
 def build_full_table_html(df_all):
-    # Gera uma tabela HTML com busca (client-side), filtros por voltagem/estado e links Google Maps
-    # Coleta valores únicos para os filtros
-    voltagens_unicas = sorted(set(v.strip() for row in df_all['Voltagens'] for v in str(row).split(',')), key=lambda x: int(x) if x.isdigit() else 999)
-    estados_unicos = sorted(df_all['Estado'].unique())
-    
-    # Gera as linhas da tabela com atributos data-* para filtragem e link Google Maps
-    rows_html = []
-    for _, r in df_all.iterrows():
-        municipio = r['Municipio']
-        estado = r['Estado']
-        num_linhas = r['Num_Linhas']
-        voltagens = r['Voltagens']
-        # Link Google Maps usando query
-        maps_link = f"https://www.google.com/maps/search/?api=1&query={municipio}+{estado}+Brasil"
-        rows_html.append(
-            f"<tr data-voltagens='{voltagens}' data-estado='{estado}'>"
-            f"<td><a href='{maps_link}' target='_blank' style='color:var(--primary);text-decoration:none;'>{municipio}</a></td>"
-            f"<td>{estado}</td>"
-            f"<td style='text-align:center'>{num_linhas}</td>"
-            f"<td>{voltagens}</td>"
-            f"</tr>"
-        )
-    
+    # Tabela virtualizada: os dados vão uma única vez como JSON compacto (com índices
+    # por voltagem/estado) e o navegador só desenha as linhas visíveis
+    dados = montar_indice_tabela(df_all)
+    dados_json = json.dumps(dados, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
     # Monta os options dos filtros
-    voltagem_options = ''.join(f"<option value='{v}'>{v} kV</option>" for v in voltagens_unicas)
-    estado_options = ''.join(f"<option value='{e}'>{e}</option>" for e in estados_unicos)
+    voltagem_options = ''.join(f"<option value='{v}'>{v} kV</option>" for v in dados['voltagens'])
+    estado_options = ''.join(f"<option value='{e}'>{e}</option>" for e in dados['estados'])
     
     table_html = f"""
     <section>
@@ -206,7 +198,8 @@ def build_full_table_html(df_all):
             </div>
         </div>
         
-        <div style="overflow:auto;">
+        <p id="fullTableCount" style="margin:4px 0;color:var(--muted);font-size:13px;"></p>
+        <div id="fullTableScroll" style="overflow:auto;max-height:520px;position:relative;">
             <table id="fullTable" style="border-collapse:collapse;width:100%;">
                 <thead>
                     <tr style="background:rgba(0,0,0,0.03);">
@@ -216,42 +209,129 @@ def build_full_table_html(df_all):
                         <th style="text-align:left;border-bottom:1px solid var(--border);padding:8px;">Voltagens (kV)</th>
                     </tr>
                 </thead>
-                <tbody>
-                    {''.join(rows_html)}
-                </tbody>
+                <tbody></tbody>
             </table>
         </div>
     </section>
+    <script type="application/json" id="fullTableData">{dados_json}</script>
     <script>
         (function(){{
+            const dados = JSON.parse(document.getElementById('fullTableData').textContent);
+            const col = dados.colunas, idx = dados.indice;
+            const total = col.m.length;
             const filterVoltagem = document.getElementById('filterVoltagem');
             const filterEstado = document.getElementById('filterEstado');
             const filterMunicipio = document.getElementById('filterMunicipio');
-            const table = document.getElementById('fullTable');
-            
+            const scroller = document.getElementById('fullTableScroll');
+            const tbody = document.querySelector('#fullTable tbody');
+            const contador = document.getElementById('fullTableCount');
+            const ALTURA_LINHA = 37, FOLGA = 10;
+            const normalizar = s => s.normalize('NFD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase();
+            // texto de cada linha (município, UF, nº de linhas, voltagens), como o da linha exibida
+            const chaves = col.m.map((m, i) =>
+                normalizar([m, dados.estados[col.e[i]], col.n[i], col.v[i]].join('\t')));
+            // índice de trigramas: trigrama -> linhas (em ordem crescente) cujo texto o contém
+            const trigramas = new Map();
+            chaves.forEach((c, i) => {{
+                for (let k = 0; k + 3 <= c.length; k++) {{
+                    const t = c.substr(k, 3);
+                    let linhas = trigramas.get(t);
+                    if (!linhas) trigramas.set(t, linhas = []);
+                    if (linhas[linhas.length - 1] !== i) linhas.push(i);
+                }}
+            }});
+            const todas = Array.from({{length: total}}, (_, i) => i);
+            let visiveis = todas;
+
+            // Linhas que contêm todos os trigramas da busca estão na lista do trigrama mais raro
+            function candidatosTexto(q) {{
+                let menor = null;
+                for (let k = 0; k + 3 <= q.length; k++) {{
+                    const linhas = trigramas.get(q.substr(k, 3)) || [];
+                    if (!menor || linhas.length < menor.length) menor = linhas;
+                }}
+                return menor;
+            }}
+
+            // Candidatos = menor lista entre os índices ativos (voltagem, estado, trigrama da busca)
+            // ou todas as linhas; os filtros e a substring são conferidos só nesses candidatos
             function applyFilters() {{
                 const voltagemSel = (filterVoltagem.value || '').trim();
                 const estadoSel = (filterEstado.value || '').trim();
-                const municipioQ = (filterMunicipio.value || '').toLowerCase();
-                
-                const rows = table.querySelectorAll('tbody tr');
-                rows.forEach(function(tr) {{
-                    const voltagens = tr.getAttribute('data-voltagens') || '';
-                    const estado = tr.getAttribute('data-estado') || '';
-                    const texto = tr.innerText.toLowerCase();
-                    
-                    let show = true;
-                    if (voltagemSel && !voltagens.includes(voltagemSel)) show = false;
-                    if (estadoSel && estado !== estadoSel) show = false;
-                    if (municipioQ && !texto.includes(municipioQ)) show = false;
-                    
-                    tr.style.display = show ? '' : 'none';
-                }});
+                const q = normalizar((filterMunicipio.value || '').trim());
+                const listas = [];
+                if (voltagemSel) listas.push(idx.voltagem[voltagemSel] || []);
+                if (estadoSel) listas.push(idx.estado[estadoSel] || []);
+                if (q.length >= 3) listas.push(candidatosTexto(q));
+                if (!listas.length && !q) {{ visiveis = todas; render(true); return; }}
+                listas.sort((a, b) => a.length - b.length);
+                const estadoPos = estadoSel ? dados.estados.indexOf(estadoSel) : -1;
+                visiveis = (listas[0] || todas).filter(i =>
+                    (!voltagemSel || (', ' + col.v[i] + ',').includes(', ' + voltagemSel + ',')) &&
+                    (estadoPos < 0 || col.e[i] === estadoPos) &&
+                    (!q || chaves[i].includes(q)));
+                render(true);
             }}
-            
+
+            function celula(tr, texto, alinhamento) {{
+                const td = document.createElement('td');
+                td.textContent = texto;
+                td.style.padding = '8px';
+                td.style.borderBottom = '1px solid var(--border)';
+                if (alinhamento) td.style.textAlign = alinhamento;
+                tr.appendChild(td);
+            }}
+
+            function espacador(altura) {{
+                const tr = document.createElement('tr');
+                tr.style.height = altura + 'px';
+                return tr;
+            }}
+
+            // Desenha só a janela visível (+ folga) entre dois espaçadores
+            function render(topo) {{
+                if (topo) scroller.scrollTop = 0;
+                const inicio = Math.max(0, Math.floor(scroller.scrollTop / ALTURA_LINHA) - FOLGA);
+                const qtd = Math.ceil((scroller.clientHeight || 520) / ALTURA_LINHA) + 2 * FOLGA;
+                const fim = Math.min(visiveis.length, inicio + qtd);
+                const frag = document.createDocumentFragment();
+                frag.appendChild(espacador(inicio * ALTURA_LINHA));
+                for (let k = inicio; k < fim; k++) {{
+                    const i = visiveis[k];
+                    const estado = dados.estados[col.e[i]];
+                    const tr = document.createElement('tr');
+                    tr.style.height = ALTURA_LINHA + 'px';
+                    const td = document.createElement('td');
+                    td.style.padding = '8px';
+                    td.style.borderBottom = '1px solid var(--border)';
+                    const a = document.createElement('a');
+                    a.href = 'https://www.google.com/maps/search/?api=1&query=' + encodeURIComponent(col.m[i] + ' ' + estado + ' Brasil');
+                    a.target = '_blank';
+                    a.style.color = 'var(--primary)';
+                    a.style.textDecoration = 'none';
+                    a.textContent = col.m[i];
+                    td.appendChild(a);
+                    tr.appendChild(td);
+                    celula(tr, estado);
+                    celula(tr, col.n[i], 'center');
+                    celula(tr, col.v[i]);
+                    frag.appendChild(tr);
+                }}
+                frag.appendChild(espacador((visiveis.length - fim) * ALTURA_LINHA));
+                tbody.replaceChildren(frag);
+                contador.textContent = visiveis.length + ' de ' + total + ' municípios';
+            }}
+
+            let agendado = false;
+            scroller.addEventListener('scroll', function() {{
+                if (agendado) return;
+                agendado = true;
+                requestAnimationFrame(function() {{ agendado = false; render(false); }});
+            }});
             filterVoltagem && filterVoltagem.addEventListener('change', applyFilters);
             filterEstado && filterEstado.addEventListener('change', applyFilters);
-            filterMunicipio && filterMunicipio.addEventListener('keyup', applyFilters);
+            filterMunicipio && filterMunicipio.addEventListener('input', applyFilters);
+            render(true);
         }})();
     </script>
     """
@@ -453,26 +533,60 @@ def build_html(figs, df_all):
     return template
 
 
-def main():
-    ensure_data()
-    df, df_espec, df_mult = load()
-    # Monta tabela completa por município+estado com voltagens agregadas
-    agg = (
-        df_espec.groupby(['NM_MUN', 'Estado'])['Voltagem']
-        .apply(lambda s: sorted(set(s), key=lambda x: int(x)))
-        .reset_index(name='VoltagensList')
-    )
-    agg['Num_Linhas'] = agg['VoltagensList'].apply(len)
-    agg['Voltagens'] = agg['VoltagensList'].apply(lambda vs: ', '.join(vs))
-    df_all = agg.rename(columns={'NM_MUN': 'Municipio'})[['Municipio', 'Estado', 'Num_Linhas', 'Voltagens']]
-    # Salva CSV completo para publicação
+def montar_tabela_completa(cubo):
+    """Tabela completa por município com voltagens agregadas (fatia do cubo, em ordem alfabética de município/UF)."""
+    mun = cubo.municipios()
+    return mun.rename(columns={'NM_MUN': 'Municipio'})[['Municipio', 'Estado', 'Num_Linhas', 'Voltagens']]
+
+
+def gerar(cache, df=None, df_mult=None, cubo=None, carregar=None):
+    """Gera dashboard.html e a tabela completa (CSV + Parquet) se o cache indicar mudança.
+    Aceita os DataFrames consolidados já em memória (pipeline) ou carregar(), que devolve
+    (df, df_mult, cubo) e só é chamada se algo estiver desatualizado; senão lê os CSVs.
+    """
     out_csv = OUT_DIR / 'municipios_afetados_completo.csv'
-    df_all.to_csv(out_csv, index=False, encoding='utf-8-sig')
-    figs = build_figures(df, df_espec, df_mult)
-    html = build_html(figs, df_all)
     out_path = OUT_DIR / 'dashboard.html'
-    out_path.write_text(html, encoding='utf-8')
-    print(f'OK Relatorio gerado: {out_path}')
+    entradas = [CONSOLIDADO_CSV, MULTIPLAS_CSV]
+    codigo = [Path(__file__), Path(cubo_estatisticas.__file__)]
+    entradas_html = entradas + [ativos_estaticos.MANIFESTO]
+    out_parquet = modelo_dados.caminho_parquet(out_csv)
+    gerar_csv = cache.verificar(out_csv, entradas, codigo=codigo)
+    gerar_parquet = cache.verificar(out_parquet, entradas, codigo=codigo + [Path(modelo_dados.__file__)])
+    gerar_html = cache.verificar(out_path, entradas_html, codigo=codigo + [Path(ativos_estaticos.__file__)])
+    if not (gerar_csv or gerar_parquet or gerar_html):
+        return False
+
+    if (df is None or df_mult is None) and carregar is not None:
+        df, df_mult, cubo = carregar()
+    if df is None or df_mult is None:
+        df, df_espec, df_mult = load()
+    else:
+        df, df_espec, df_mult = modelo_dados.preparar(df, df_mult)
+    cubo = cubo or cubo_estatisticas.construir(df)
+    df_all = montar_tabela_completa(cubo)
+    # Salva CSV completo para publicação
+    if gerar_csv:
+        df_all.to_csv(out_csv, index=False, encoding='utf-8-sig')
+        cache.registrar(out_csv)
+    if gerar_parquet:
+        modelo_dados.salvar_parquet(df_all, out_csv, modelo_dados.ESQUEMA_COMPLETO)
+        cache.registrar(out_parquet)
+    if gerar_html:
+        figs = build_figures(cubo, df_mult)
+        html = ativos_estaticos.reescrever(build_html(figs, df_all), out_path)
+        out_path.write_text(html, encoding='utf-8')
+        cache.registrar(out_path)
+        print(f'OK Relatorio gerado: {out_path}')
+    return True
+
+
+def main(argv=None):
+    parser = adicionar_argumento_force(argparse.ArgumentParser(description='Gera outputs/dashboard.html'))
+    args = parser.parse_args(argv)
+    cache = CacheArtefatos(force=args.force)
+    ensure_data()
+    gerar(cache)
+    cache.imprimir_resumo()
 
 
 if __name__ == '__main__':
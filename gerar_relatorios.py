@@ -0,0 +1,75 @@
+"""
+Gera os três relatórios HTML a partir de um único carregamento dos dados
+Saídas: outputs/dashboard.html, outputs/relatorio_tecnico.html, outputs/relatorio_acessivel.html
+
+O snapshot tipado gravado pela consolidação (.cache/snapshot/) é lido uma vez
+(sem reparsear os CSVs), e o mesmo DataFrame e o mesmo cubo de estatísticas são
+repassados aos três geradores. Se todos os relatórios estiverem em dia, nada é lido.
+
+Uso:
+    python gerar_relatorios.py                  # os três relatórios
+    python gerar_relatorios.py -r tecnico       # só alguns (html, tecnico, acessivel)
+    python gerar_relatorios.py --force          # ignora o cache de artefatos
+"""
+from functools import lru_cache
+from pathlib import Path
+import argparse
+import time
+
+from cache_artefatos import CacheArtefatos, adicionar_argumento_force
+import cubo_estatisticas
+import gerar_relatorio_acessivel
+import gerar_relatorio_html
+import gerar_relatorio_tecnico
+import modelo_dados
+
+BASE_DIR = Path(__file__).parent
+
+RELATORIOS = {
+    'html': gerar_relatorio_html,
+    'tecnico': gerar_relatorio_tecnico,
+    'acessivel': gerar_relatorio_acessivel,
+}
+
+
+def _carregar(cubo=None):
+    t0 = time.perf_counter()
+    df, _, df_mult = modelo_dados.carregar()
+    cubo = cubo or cubo_estatisticas.carregar()
+    print(f"📦 Dados carregados em {time.perf_counter() - t0:.2f}s")
+    return df, df_mult, cubo
+
+
+def gerar(cache, relatorios=None, df=None, df_mult=None, cubo=None):
+    """Gera os relatórios selecionados com um único conjunto de dados em memória, carregado
+    só quando o cache indica que algum deles precisa ser refeito. Retorna {nome: True se regenerou}.
+    """
+    relatorios = list(relatorios or RELATORIOS)
+
+    @lru_cache(maxsize=1)
+    def carregar():
+        if df is None or df_mult is None:
+            return _carregar(cubo)
+        return df, df_mult, cubo or cubo_estatisticas.construir(df)
+
+    return {nome: RELATORIOS[nome].gerar(cache, carregar=carregar) for nome in relatorios}
+
+
+def main(argv=None):
+    parser = adicionar_argumento_force(argparse.ArgumentParser(description='Gera os relatórios HTML (dashboard, técnico e acessível)'))
+    parser.add_argument('-r', '--relatorios', default='',
+                        help=f"Relatórios separados por vírgula ({', '.join(RELATORIOS)}); padrão: todos")
+    args = parser.parse_args(argv)
+    relatorios = [r.strip() for r in args.relatorios.split(',') if r.strip()]
+    desconhecidos = [r for r in relatorios if r not in RELATORIOS]
+    if desconhecidos:
+        parser.error(f"relatório desconhecido: {', '.join(desconhecidos)}")
+
+    cache = CacheArtefatos(force=args.force)
+    gerar_relatorio_html.ensure_data()
+    gerar(cache, relatorios)
+    cache.imprimir_resumo()
+
+
+if __name__ == '__main__':
+    main()
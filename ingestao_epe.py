@@ -0,0 +1,196 @@
+"""
+Ingestão da base nacional da EPE (Linhas de Transmissão - Base Existente)
+Lê do shapefile nacional apenas as linhas que tocam as UFs pedidas (padrão:
+PR, SC e RS), sem carregar o Brasil inteiro para depois filtrar:
+
+  - o retângulo de cada UF vem do cabeçalho do shapefile da UF
+    (Shapefile_Estados/<UF>_UF_*), sem ler os polígonos;
+  - o filtro espacial (união dos retângulos) é repassado ao driver OGR, que
+    usa o índice espacial que acompanha o shapefile (.sbn/.sbx ou .qix) e só
+    lê do .shp/.dbf os registros candidatos;
+  - cada linha lida recebe a lista das UFs cujo retângulo ela toca (UFs).
+
+O relatório compara com a leitura completa: feições e bytes de .shp/.dbf
+efetivamente lidos (tamanho de cada registro pelo .shx) e, com --comparar, o
+tempo das duas leituras.
+
+Saída: GeoParquet em .cache/epe/ (refeito só se o shapefile, as UFs ou este
+código mudarem).
+
+Uso:
+    python ingestao_epe.py                     # PR, SC e RS
+    python ingestao_epe.py --ufs PR,SC --comparar
+"""
+from pathlib import Path
+import argparse
+import struct
+import sys
+import time
+
+import geopandas as gpd
+import numpy as np
+import pyogrio
+import shapely
+from pyproj import CRS, Transformer
+
+from cache_artefatos import CacheArtefatos, adicionar_argumento_force
+
+BASE_DIR = Path(__file__).parent
+EPE_SHP = BASE_DIR / '_ags_Download Dados Webmap EPE' / 'zipfolder' / 'Linhas_de_Transmissão_-_Base_Existente.shp'
+ESTADOS_DIR = BASE_DIR / 'Shapefile_Estados'
+EPE_CACHE_DIR = BASE_DIR / '.cache' / 'epe'
+
+UFS_PADRAO = ('PR', 'SC', 'RS')
+COLUNAS_EPE = ['Nome', 'Concession', 'Tensao', 'Extensao', 'Ano_Opera']
+
+
+def arquivo_uf(uf: str):
+    """Shapefile do limite da UF (pasta extraída ou o .zip do IBGE); None se não houver."""
+    for padrao in (f'{uf}_UF_*/{uf}_UF_*.shp', f'{uf}_UF_*.zip'):
+        encontrados = sorted(ESTADOS_DIR.glob(padrao))
+        if encontrados:
+            return encontrados[-1]
+    return None
+
+
+def extensoes_ufs(ufs, crs_destino) -> dict:
+    """{UF: (xmin, ymin, xmax, ymax)} no CRS de destino, a partir do cabeçalho dos shapefiles das UFs."""
+    extensoes = {}
+    for uf in ufs:
+        arquivo = arquivo_uf(uf)
+        if arquivo is None:
+            raise FileNotFoundError(f"Limite da UF {uf} não encontrado em {ESTADOS_DIR} ({uf}_UF_*)")
+        info = pyogrio.read_info(arquivo, force_total_bounds=True)
+        bbox = info['total_bounds']
+        crs_uf = CRS.from_user_input(info['crs']) if info['crs'] else CRS.from_epsg(4674)
+        if crs_uf != crs_destino:
+            bbox = Transformer.from_crs(crs_uf, crs_destino, always_xy=True).transform_bounds(*bbox, densify_pts=21)
+        extensoes[uf] = tuple(float(v) for v in bbox)
+    return extensoes
+
+
+def _bytes_registros(shp: Path, fids=None) -> int:
+    """Bytes de .shp + .dbf ocupados pelos registros (todos, ou só os fids), pelo índice .shx e o cabeçalho do .dbf."""
+    shx = shp.with_suffix('.shx').read_bytes()
+    n = (len(shx) - 100) // 8
+    tamanhos = np.array(struct.unpack(f'>{2 * n}i', shx[100:100 + 8 * n]))[1::2] * 2 + 8  # conteúdo + cabeçalho
+    with open(shp.with_suffix('.dbf'), 'rb') as f:
+        registro_dbf = struct.unpack('<H', f.read(12)[10:12])[0]
+    if fids is None:
+        return int(tamanhos.sum()) + n * registro_dbf
+    fids = np.asarray(fids, dtype=int)
+    return int(tamanhos[fids].sum()) + len(fids) * registro_dbf
+
+
+def ler_epe(ufs=UFS_PADRAO, origem=EPE_SHP, colunas=COLUNAS_EPE):
+    """Linhas da EPE que tocam as UFs (filtro espacial no driver) -> (GeoDataFrame, relatório)."""
+    origem = Path(origem)
+    info = pyogrio.read_info(origem)
+    crs = CRS.from_user_input(info['crs'])
+    extensoes = extensoes_ufs(ufs, crs)
+    mascara = shapely.union_all([shapely.box(*bbox) for bbox in extensoes.values()])
+    colunas = [c for c in colunas if c in info['fields']]
+
+    inicio = time.perf_counter()
+    gdf = pyogrio.read_dataframe(origem, columns=colunas, mask=mascara, fid_as_index=True)
+    segundos = time.perf_counter() - inicio
+
+    caixas = {uf: shapely.box(*bbox) for uf, bbox in extensoes.items()}
+    toca = {uf: shapely.intersects(gdf.geometry.values, caixa) for uf, caixa in caixas.items()}
+    gdf['UFs'] = [','.join(uf for uf in ufs if toca[uf][i]) for i in range(len(gdf))]
+    gdf.index.name = 'fid_epe'
+
+    relatorio = {
+        'ufs': list(ufs),
+        'feicoes_total': info['features'],
+        'feicoes_lidas': len(gdf),
+        'segundos': segundos,
+        'indice_espacial': [s for s in ('.sbn', '.qix') if origem.with_suffix(s).exists()],
+    }
+    if origem.suffix.lower() == '.shp' and origem.with_suffix('.shx').exists():
+        relatorio['bytes_total'] = _bytes_registros(origem)
+        relatorio['bytes_lidos'] = _bytes_registros(origem, gdf.index.to_numpy())
+    return gdf.reset_index(), relatorio
+
+
+def caminho_saida(ufs) -> Path:
+    return EPE_CACHE_DIR / f"linhas_epe_{'-'.join(sorted(ufs))}.parquet"
+
+
+def carregar_epe(ufs=UFS_PADRAO, cache=None, origem=EPE_SHP):
+    """GeoDataFrame das linhas da EPE nas UFs, do GeoParquet em cache (refeito se as entradas mudarem)."""
+    cache = cache or CacheArtefatos()
+    saida = caminho_saida(ufs)
+    entradas = [Path(origem).with_suffix(s) for s in ('.shp', '.shx', '.dbf')] + [arquivo_uf(uf) for uf in ufs]
+    if cache.verificar(saida, [p for p in entradas if p is not None], parametros={'ufs': sorted(ufs)},
+                       codigo=[Path(__file__)]):
+        gdf, relatorio = ler_epe(ufs, origem)
+        EPE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = saida.with_suffix('.tmp')
+        gdf.to_parquet(tmp, index=False)
+        tmp.replace(saida)
+        cache.registrar(saida)
+        return gdf, relatorio
+    return gpd.read_parquet(saida), None
+
+
+def _mb(n):
+    return f"{n / 2**20:.2f} MB"
+
+
+def imprimir_relatorio(relatorio, segundos_completo=None):
+    total, lidas = relatorio['feicoes_total'], relatorio['feicoes_lidas']
+    print(f"✓ {lidas} de {total} feições lidas ({100 * (1 - lidas / total) if total else 0:.1f}% evitadas) "
+          f"para {', '.join(relatorio['ufs'])}")
+    if 'bytes_total' in relatorio:
+        b_total, b_lidos = relatorio['bytes_total'], relatorio['bytes_lidos']
+        print(f"✓ Registros .shp/.dbf: {_mb(b_lidos)} de {_mb(b_total)} "
+              f"({100 * (1 - b_lidos / b_total) if b_total else 0:.1f}% não lidos)")
+    if relatorio['indice_espacial']:
+        print(f"  Índice espacial usado pelo driver: {', '.join(relatorio['indice_espacial'])}")
+    else:
+        print("  ⚠️  Shapefile sem índice espacial (.sbn/.qix): o driver testa todas as feições")
+    if segundos_completo is not None:
+        print(f"⏱️  Leitura filtrada {relatorio['segundos']:.2f}s × completa {segundos_completo:.2f}s")
+
+
+def main(argv=None):
+    parser = adicionar_argumento_force(argparse.ArgumentParser(
+        description='Ingestão das linhas da EPE (Base Existente) apenas nas UFs de interesse'))
+    parser.add_argument('--ufs', default=','.join(UFS_PADRAO), help='UFs separadas por vírgula (padrão: PR,SC,RS)')
+    parser.add_argument('--origem', type=Path, default=EPE_SHP, help='Shapefile nacional da EPE')
+    parser.add_argument('--comparar', action='store_true', help='Mede também o tempo da leitura completa')
+    args = parser.parse_args(argv)
+
+    ufs = [uf.strip().upper() for uf in args.ufs.split(',') if uf.strip()]
+    if not args.origem.exists():
+        print(f"⚠️  Shapefile da EPE não encontrado: {args.origem}")
+        return 1
+    cache = CacheArtefatos(force=args.force)
+    try:
+        gdf, relatorio = carregar_epe(ufs, cache, args.origem)
+    except FileNotFoundError as e:
+        print(f"⚠️  {e}")
+        return 1
+    if relatorio is None:
+        print(f"♻️  {caminho_saida(ufs).name} já está atualizado (use --force para reler o shapefile)")
+        if not args.comparar:
+            return 0
+        _, relatorio = ler_epe(ufs, args.origem)
+
+    segundos_completo = None
+    if args.comparar:
+        inicio = time.perf_counter()
+        pyogrio.read_dataframe(args.origem, columns=[c for c in COLUNAS_EPE
+                                                     if c in pyogrio.read_info(args.origem)['fields']])
+        segundos_completo = time.perf_counter() - inicio
+    imprimir_relatorio(relatorio, segundos_completo)
+    por_tensao = gdf.groupby('Tensao').size() if 'Tensao' in gdf.columns else None
+    if por_tensao is not None and len(por_tensao):
+        print("  Linhas por tensão: " + ', '.join(f"{t:g} kV: {n}" for t, n in por_tensao.items()))
+    print(f"✓ Saída: {caminho_saida(ufs)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,17 +1,18 @@
 """Script temporário para inspecionar dados EPE e comparar com dados atuais do RS"""
-import geopandas as gpd
 import pandas as pd
 from pathlib import Path
 
+import ingestao_epe
+
 BASE_DIR = Path(__file__).parent
 
-# Carregar shapefile EPE
-epe_shp = BASE_DIR / '_ags_Download Dados Webmap EPE' / 'zipfolder' / 'Linhas_de_Transmissão_-_Base_Existente.shp'
-gdf_epe = gpd.read_file(epe_shp)
+# Carregar do shapefile EPE só as linhas da Região Sul (filtro espacial no driver)
+gdf_epe, relatorio = ingestao_epe.ler_epe(ingestao_epe.UFS_PADRAO)
 
 print("="*60)
-print("DADOS EPE - Linhas de Transmissão Base Existente")
+print("DADOS EPE - Linhas de Transmissão Base Existente (PR, SC, RS)")
 print("="*60)
+ingestao_epe.imprimir_relatorio(relatorio)
 print(f"Total de features: {len(gdf_epe)}")
 print(f"\nColunas: {list(gdf_epe.columns)}")
 print(f"\nPrimeiras 5 linhas:")
@@ -0,0 +1,159 @@
+"""
+Limites estaduais (contorno de cada UF) - derivados uma vez e lidos do cache
+Cada UF tem um GeoParquet em .cache/limites/<UF>.parquet com o contorno
+dissolvido num único polígono (EPSG:4326), uma linha por tolerância de
+simplificação (TOLERANCIAS_M, em metros; 0 = contorno exato):
+
+  - fonte: shapefile da UF em Shapefile_Estados/<UF>_UF_* (pasta extraída ou
+    .zip); na falta dele, a camada base de municípios afetados, dissolvida;
+  - refeito só se a fonte ou este código mudarem.
+
+Usos: contorno exato para recortar linhas (repositorio_linhas) e testar a
+presença de linhas por UF; 150 m para o "Limite Estadual" desenhado nos mapas.
+
+Uso:
+    python limites_estaduais.py                # PR, SC e RS
+    python limites_estaduais.py --ufs PR --force
+"""
+from functools import lru_cache
+from pathlib import Path
+import argparse
+import os
+import sys
+
+import geopandas as gpd
+import shapely
+
+from cache_artefatos import CacheArtefatos, adicionar_argumento_force
+import ingestao_epe
+
+BASE_DIR = Path(__file__).parent
+LIMITES_DIR = BASE_DIR / '.cache' / 'limites'
+MUNICIPIOS_GPKG = BASE_DIR / 'municipios_afetados_por_layer.gpkg'
+CAMADA_BASE = 'municipios_afetados_linhas_de_transmissao_base'
+
+TOLERANCIAS_M = (0, 40, 150, 500)  # simplificação em metros (EPSG:3857), preservando a topologia
+UFS_PADRAO = ingestao_epe.UFS_PADRAO
+
+
+def caminho(uf) -> Path:
+    return LIMITES_DIR / f'{uf.upper()}.parquet'
+
+
+def _entradas(uf):
+    """Arquivos de que o contorno da UF depende (inclui a camada base, usada na falta do shapefile)."""
+    arquivo = ingestao_epe.arquivo_uf(uf)
+    entradas = [MUNICIPIOS_GPKG]
+    if arquivo is not None:
+        entradas += sorted(arquivo.parent.glob(f'{arquivo.stem}.*')) if arquivo.suffix == '.shp' else [arquivo]
+    return entradas
+
+
+def _ler_fonte(uf):
+    """Contorno exato da UF (EPSG:4326) e a fonte usada; (None, None) se nenhuma fonte tiver a UF."""
+    arquivo = ingestao_epe.arquivo_uf(uf)
+    if arquivo is not None:
+        try:
+            gdf = gpd.read_file(arquivo, engine='pyogrio')
+            gdf = gdf[gdf.geom_type.isin(['Polygon', 'MultiPolygon'])]
+            if not gdf.empty:
+                return gdf.to_crs(epsg=4326).geometry, arquivo.name
+        except Exception as e:
+            print(f"⚠️  {arquivo.name}: {e}")
+    try:
+        gdf = gpd.read_file(MUNICIPIOS_GPKG, layer=CAMADA_BASE, engine='pyogrio')
+    except Exception:
+        return None, None
+    uf_col = 'UF' if 'UF' in gdf.columns else ('SIGLA_UF' if 'SIGLA_UF' in gdf.columns else None)
+    if not uf_col:
+        return None, None
+    gdf = gdf[gdf[uf_col].astype(str).str.upper() == uf.upper()]
+    if gdf.empty:
+        return None, None
+    return gdf.to_crs(epsg=4326).geometry, f'{MUNICIPIOS_GPKG.name}:{CAMADA_BASE}'
+
+
+def construir(uf) -> gpd.GeoDataFrame | None:
+    """Contorno dissolvido da UF em cada tolerância: colunas UF, tol_m, geometry (EPSG:4326)."""
+    geometrias, fonte = _ler_fonte(uf)
+    if geometrias is None:
+        return None
+    contorno = shapely.union_all(shapely.make_valid(geometrias.values))
+    metrico = gpd.GeoSeries([contorno], crs='EPSG:4326').to_crs(epsg=3857)
+    versoes = [contorno if tol == 0 else
+               metrico.simplify(tol, preserve_topology=True).to_crs(epsg=4326).iloc[0]
+               for tol in TOLERANCIAS_M]
+    return gpd.GeoDataFrame({'UF': uf.upper(), 'tol_m': list(TOLERANCIAS_M), 'fonte': fonte},
+                            geometry=versoes, crs='EPSG:4326')
+
+
+def atualizar(cache=None, ufs=UFS_PADRAO) -> list:
+    """(Re)gera .cache/limites/<UF>.parquet das UFs cujas fontes mudaram. Retorna os arquivos disponíveis."""
+    cache = cache or CacheArtefatos()
+    disponiveis = []
+    for uf in ufs:
+        saida = caminho(uf)
+        if cache.verificado(saida):  # já conferida nesta execução (ex.: etapa 'limites' do pipeline)
+            if saida.exists():
+                disponiveis.append(saida)
+            continue
+        if cache.verificar(saida, _entradas(uf), parametros={'uf': uf.upper(), 'tolerancias': TOLERANCIAS_M},
+                           codigo=[Path(__file__)]):
+            gdf = construir(uf)
+            if gdf is None:
+                print(f"⚠️  Limite da UF {uf} indisponível (sem {uf}_UF_* em {ingestao_epe.ESTADOS_DIR} "
+                      f"nem na camada base)")
+                continue
+            LIMITES_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = saida.with_name(f".{saida.stem}.{os.getpid()}.tmp")
+            gdf.to_parquet(tmp, index=False)
+            os.replace(tmp, saida)
+            cache.registrar(saida)
+            _tabela.cache_clear()
+        disponiveis.append(saida)
+    return disponiveis
+
+
+@lru_cache(maxsize=None)
+def _tabela(uf) -> gpd.GeoDataFrame | None:
+    arquivo = caminho(uf)
+    if not arquivo.exists():
+        atualizar(ufs=[uf])
+    return gpd.read_parquet(arquivo) if arquivo.exists() else None
+
+
+def contorno(uf, tol_m=0) -> gpd.GeoDataFrame | None:
+    """Limite da UF (colunas UF, geometry; EPSG:4326) na tolerância pedida, que deve estar em TOLERANCIAS_M."""
+    if tol_m not in TOLERANCIAS_M:
+        raise ValueError(f"Tolerância {tol_m} m não pré-calculada (disponíveis: {TOLERANCIAS_M})")
+    tabela = _tabela(uf.upper())
+    if tabela is None:
+        return None
+    return tabela.loc[tabela['tol_m'] == tol_m, ['UF', 'geometry']].reset_index(drop=True)
+
+
+def geometria(uf, tol_m=0):
+    """Polígono do limite da UF (shapely) na tolerância pedida; None se indisponível."""
+    gdf = contorno(uf, tol_m)
+    return None if gdf is None or gdf.empty else gdf.geometry.iloc[0]
+
+
+def main(argv=None):
+    parser = adicionar_argumento_force(argparse.ArgumentParser(
+        description='Contornos estaduais dissolvidos e simplificados (.cache/limites/)'))
+    parser.add_argument('--ufs', default=','.join(UFS_PADRAO), help='UFs (padrão: PR,SC,RS)')
+    args = parser.parse_args(argv)
+
+    ufs = [uf.strip().upper() for uf in args.ufs.split(',') if uf.strip()]
+    cache = CacheArtefatos(force=args.force)
+    for arquivo in atualizar(cache, ufs):
+        gdf = gpd.read_parquet(arquivo)
+        vertices = ', '.join(f"{tol} m: {shapely.get_num_coordinates(g):,}"
+                             for tol, g in zip(gdf['tol_m'], gdf.geometry))
+        print(f"✓ {arquivo.stem} ({gdf['fonte'].iloc[0]}) — vértices por tolerância: {vertices}")
+    cache.imprimir_resumo()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Modelo de dados em memória - dados_consolidados.csv e municipios_multiplas_linhas.csv
+Carregador tipado único, usado pelo dashboard, pelos relatórios e pelas estatísticas:
+  - CD_MUN inteiro (código IBGE): chave dos cruzamentos entre tabelas
+  - Estado, Tipo, Linha e NM_MUN categóricos (o município é guardado como código)
+  - Voltagem categórica ordenada numericamente ('230' < '500' < ... < 'BASE')
+  - Voltagem_kV inteira (nula nas camadas BASE), para ordenar e filtrar por faixa
+Agrupamentos sobre colunas categóricas devem usar observed=True.
+
+Cada tabela consolidada também é gravada em Parquet (esquema fixo, textos com
+codificação de dicionário) ao lado do CSV; os leitores preferem o Parquet.
+
+A consolidação grava ainda um snapshot já tipado (Arrow IPC, .cache/snapshot/)
+aberto por memory map pelos geradores de relatório, sem reparsear o CSV nem
+renormalizar os tipos (a conversão para pandas ainda copia os dados). O snapshot
+guarda os caminhos, tamanhos, mtimes e hashes das tabelas de que foi gerado e só
+é usado para essas mesmas tabelas; o hash só é recalculado se tamanho ou mtime mudaram.
+"""
+from pathlib import Path
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cache_artefatos import hash_arquivo
+import municipios_ibge
+
+BASE_DIR = Path(__file__).parent
+CONSOLIDADO_CSV = BASE_DIR / 'dados_consolidados.csv'
+MULTIPLAS_CSV = BASE_DIR / 'municipios_multiplas_linhas.csv'
+
+# Snapshot "quente" (Arrow IPC sem compressão)
+SNAPSHOT_DIR = BASE_DIR / '.cache' / 'snapshot'
+SNAPSHOT_CONSOLIDADO = SNAPSHOT_DIR / 'consolidado.arrow'
+SNAPSHOT_MULTIPLAS = SNAPSHOT_DIR / 'multiplas.arrow'
+
+_TEXTO = pa.dictionary(pa.int32(), pa.string())
+
+# Esquemas fixos das versões Parquet
+ESQUEMA_CONSOLIDADO = pa.schema([
+    ('CD_MUN', pa.int32()),
+    ('NM_MUN', _TEXTO),
+    ('Voltagem', _TEXTO),
+    ('Estado', _TEXTO),
+    ('Tipo', _TEXTO),
+    ('Linha', _TEXTO),
+])
+ESQUEMA_MULTIPLAS = pa.schema([
+    ('Municipio', _TEXTO),
+    ('Estado', _TEXTO),
+    ('Num_Linhas', pa.int16()),
+    ('Voltagens', _TEXTO),
+])
+# outputs/municipios_afetados_completo tem as mesmas colunas
+ESQUEMA_COMPLETO = ESQUEMA_MULTIPLAS
+
+
+def _chave_voltagem(voltagem):
+    return (1, 0) if not str(voltagem).isdigit() else (0, int(voltagem))
+
+
+def _categoria(s, upper=False):
+    """Texto limpo -> categórica (categorias em ordem alfabética)."""
+    s = s.astype(str).str.strip()
+    if upper:
+        s = s.str.upper()
+    return s.astype('category')
+
+
+def _tipado(df):
+    """True se df já está no modelo tipado (ex.: lido do snapshot)."""
+    return ('Voltagem_kV' in df.columns and 'CD_MUN' in df.columns
+            and isinstance(df['Voltagem'].dtype, pd.CategoricalDtype) and df['Voltagem'].cat.ordered)
+
+
+def tipar_consolidado(df):
+    """Converte dados_consolidados para o modelo tipado e remove duplicatas."""
+    if _tipado(df):
+        return df
+    df = df.copy()
+    df['NM_MUN'] = _categoria(df['NM_MUN'])
+    df['Estado'] = _categoria(df['Estado'], upper=True)
+    if 'CD_MUN' in df.columns:
+        df['CD_MUN'] = municipios_ibge.como_codigo(df['CD_MUN']).array
+    else:
+        # arquivo gerado antes da inclusão do código: resolve (nome, UF) uma única vez, na leitura
+        df.insert(0, 'CD_MUN', municipios_ibge.resolver_codigos(df['NM_MUN'].astype(str), df['Estado'].astype(str)).array)
+    df['Tipo'] = _categoria(df['Tipo'])
+    df['Linha'] = _categoria(df['Linha'])
+    voltagem = df['Voltagem'].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    categorias = sorted(voltagem.unique(), key=_chave_voltagem)
+    df['Voltagem'] = pd.Categorical(voltagem, categories=categorias, ordered=True)
+    df['Voltagem_kV'] = pd.to_numeric(voltagem, errors='coerce').astype('Int16')
+    return df.drop_duplicates(subset=['CD_MUN', 'NM_MUN', 'Voltagem', 'Estado', 'Tipo', 'Linha']).reset_index(drop=True)
+
+
+def tipar_multiplas(df_mult):
+    """Normaliza municipios_multiplas_linhas (nomes limpos, UF maiúscula, voltagens ordenadas)."""
+    df_mult = df_mult.copy()
+    if 'Municipio' in df_mult.columns:
+        df_mult['Municipio'] = df_mult['Municipio'].astype(str).str.strip()
+    if 'Estado' in df_mult.columns:
+        df_mult['Estado'] = _categoria(df_mult['Estado'], upper=True)
+    if 'Voltagens' in df_mult.columns:
+        df_mult['Voltagens'] = (
+            df_mult['Voltagens']
+            .astype(str)
+            .str.split(',')
+            .apply(lambda xs: ', '.join(sorted(v.strip() for v in xs)))
+        )
+    if 'Num_Linhas' in df_mult.columns:
+        df_mult['Num_Linhas'] = pd.to_numeric(df_mult['Num_Linhas'], errors='coerce').fillna(0).astype(int)
+    return df_mult.drop_duplicates(subset=['Municipio', 'Estado', 'Num_Linhas', 'Voltagens'])
+
+
+def especificas(df):
+    """Só as camadas por voltagem, uma linha por (município, estado, voltagem).
+    Categorias não observadas (ex.: 'BASE') são descartadas.
+    """
+    df_espec = df[df['Tipo'] == 'especifica'].drop_duplicates(subset=['NM_MUN', 'Estado', 'Voltagem'])
+    df_espec = df_espec.copy()
+    for col in df_espec.select_dtypes('category').columns:
+        df_espec[col] = df_espec[col].cat.remove_unused_categories()
+    df_espec['Voltagem_kV'] = df_espec['Voltagem_kV'].astype('int16')
+    return df_espec
+
+
+def preparar(df, df_mult):
+    """(df, df_mult) em qualquer formato -> (df, df_espec, df_mult) tipados."""
+    df = tipar_consolidado(df)
+    return df, especificas(df), tipar_multiplas(df_mult)
+
+
+def caminho_parquet(caminho_csv):
+    return Path(caminho_csv).with_suffix('.parquet')
+
+
+def gravar_atomico(destino, escrever):
+    """escrever(tmp) grava num temporário ao lado de destino, que é trocado de uma vez (os.replace):
+    quem lê ao mesmo tempo vê o arquivo antigo ou o novo, nunca um arquivo pela metade.
+    """
+    destino = Path(destino)
+    tmp = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    try:
+        escrever(tmp)
+        os.replace(tmp, destino)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return destino
+
+
+def salvar_parquet(df, caminho_csv, esquema):
+    """Grava a versão Parquet de uma tabela (ao lado do CSV) com esquema fixo."""
+    destino = caminho_parquet(caminho_csv)
+    dados = {}
+    for campo in esquema:
+        col = df[campo.name]
+        if pa.types.is_dictionary(campo.type):
+            dados[campo.name] = pa.array(col.astype(str), type=pa.string()).dictionary_encode()
+        else:
+            dados[campo.name] = pa.array(col, type=campo.type)
+    tabela = pa.Table.from_pydict(dados, schema=esquema)
+    return gravar_atomico(destino, lambda tmp: pq.write_table(tabela, tmp, use_dictionary=True, compression='zstd'))
+
+
+def ler_tabela(caminho_csv, **kwargs_csv):
+    """Lê a tabela preferindo o Parquet irmão; usa o CSV se o Parquet faltar ou estiver defasado."""
+    caminho_csv = Path(caminho_csv)
+    parquet = caminho_parquet(caminho_csv)
+    try:
+        if parquet.exists() and (not caminho_csv.exists()
+                                 or parquet.stat().st_mtime >= caminho_csv.stat().st_mtime):
+            return pd.read_parquet(parquet)
+    except Exception as e:
+        print(f"⚠️  Falha ao ler {parquet.name} ({e}); usando o CSV")
+    return pd.read_csv(caminho_csv, **kwargs_csv)
+
+
+def _fontes(consolidado, multiplas) -> list:
+    """Tabelas (CSV e Parquet) que um snapshot representa."""
+    return [p for c in (consolidado, multiplas) for p in (Path(c), caminho_parquet(c))]
+
+
+def _hashes(fontes, stat_cache) -> dict:
+    """{caminho absoluto: sha256 ou None}; só relê os arquivos cujo tamanho/mtime diferem de stat_cache."""
+    return {str(p.resolve()): hash_arquivo(p, stat_cache) for p in fontes}
+
+
+def _gravar_arrow(df, destino, hashes, stat_cache):
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[b'fontes'] = json.dumps(hashes, sort_keys=True).encode('utf-8')
+    metadados[b'arquivos'] = json.dumps(stat_cache, sort_keys=True).encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+    tmp = destino.with_suffix(f'.{os.getpid()}.tmp')
+    with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, tabela.schema) as writer:
+        writer.write_table(tabela)
+    os.replace(tmp, destino)  # troca atômica: leitores nunca veem um snapshot pela metade
+
+
+def _ler_arrow(caminho, fontes):
+    """Tabela do snapshot (memory map) convertida para pandas; None se ele não foi gerado exatamente
+    das `fontes` no estado atual. Tamanho e mtime iguais aos registrados dispensam reler as tabelas."""
+    with pa.memory_map(str(caminho), 'r') as arquivo:
+        leitor = pa.ipc.open_file(arquivo)
+        metadados = leitor.schema.metadata or {}
+        if b'fontes' not in metadados or b'arquivos' not in metadados:
+            return None
+        if _hashes(fontes, json.loads(metadados[b'arquivos'])) != json.loads(metadados[b'fontes']):
+            return None
+        return leitor.read_all().to_pandas()
+
+
+def salvar_snapshot(df, df_mult, consolidado=CONSOLIDADO_CSV, multiplas=MULTIPLAS_CSV):
+    """Grava o snapshot tipado das duas tabelas consolidadas (chamado pela consolidação, depois de
+    gravar consolidado/multiplas: os hashes registrados são os dessas tabelas no disco)."""
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    stat_cache = {}
+    hashes = _hashes(_fontes(consolidado, multiplas), stat_cache)
+    _gravar_arrow(tipar_consolidado(df), SNAPSHOT_CONSOLIDADO, hashes, stat_cache)
+    _gravar_arrow(tipar_multiplas(df_mult).reset_index(drop=True), SNAPSHOT_MULTIPLAS, hashes, stat_cache)
+    return SNAPSHOT_CONSOLIDADO, SNAPSHOT_MULTIPLAS
+
+
+def ler_snapshot(consolidado=CONSOLIDADO_CSV, multiplas=MULTIPLAS_CSV):
+    """(df, df_mult) tipados do snapshot; None se faltar ou se não foi gerado destas tabelas
+    (outros caminhos, ou conteúdo alterado desde a gravação)."""
+    try:
+        if not (SNAPSHOT_CONSOLIDADO.exists() and SNAPSHOT_MULTIPLAS.exists()):
+            return None
+        fontes = _fontes(consolidado, multiplas)
+        df = _ler_arrow(SNAPSHOT_CONSOLIDADO, fontes)
+        df_mult = _ler_arrow(SNAPSHOT_MULTIPLAS, fontes) if df is not None else None
+        if df_mult is None:
+            return None
+        return (df if _tipado(df) else tipar_consolidado(df)), df_mult
+    except Exception as e:
+        print(f"⚠️  Falha ao ler o snapshot ({e}); usando as tabelas consolidadas")
+        return None
+
+
+def carregar(consolidado=CONSOLIDADO_CSV, multiplas=MULTIPLAS_CSV):
+    """Devolve (df, df_espec, df_mult) tipados: do snapshot se atualizado, senão do Parquet/CSV."""
+    snapshot = ler_snapshot(consolidado, multiplas)
+    if snapshot is not None:
+        df, df_mult = snapshot
+        return df, especificas(df), df_mult
+    df = ler_tabela(consolidado, dtype={'Voltagem': str})
+    df_mult = ler_tabela(multiplas)
+    return preparar(df, df_mult)
+
+
+def voltagens(df_espec):
+    """Voltagens presentes, em ordem numérica crescente (rótulos em texto)."""
+    return list(df_espec['Voltagem'].cat.categories)
@@ -0,0 +1,156 @@
+"""
+Modelos HTML dos relatórios - renderização por seções, em fluxo
+Cada relatório é uma sequência de seções cujo texto fica em
+templates/<relatorio>/<secao>.html (string.Template: ${nome}), compilado uma
+vez por processo; arquivos iniciados por '_' são trechos repetidos (linhas de
+tabela, selos).
+
+Cada seção declara de quais colunas das tabelas de entrada ela depende (ex.:
+{'multiplas': ['Municipio', 'Num_Linhas']}). A chave do fragmento é o hash do
+modelo, do código do gerador e apenas dessas colunas: se a seção já existe em
+.cache/fragmentos/, ela é emendada na página sem calcular agregados nem
+gráficos; só as seções cujas entradas mudaram são refeitas (e o log diz qual
+entrada mudou).
+
+A página é escrita seção a seção direto no arquivo de saída, então a memória
+fica limitada à maior seção, não ao relatório inteiro.
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+from typing import Callable
+import json
+import os
+
+import pandas as pd
+
+from cache_artefatos import hash_arquivo, hash_bytes, hash_valor
+
+BASE_DIR = Path(__file__).parent
+TEMPLATES_DIR = BASE_DIR / 'templates'
+FRAGMENTOS_DIR = BASE_DIR / '.cache' / 'fragmentos'
+
+
+def arquivos_modelo(relatorio: str) -> list:
+    """Arquivos de modelo do relatório (para o cache de artefatos)."""
+    return sorted((TEMPLATES_DIR / relatorio).glob('*.html'))
+
+
+@lru_cache(maxsize=None)
+def carregar_modelos(relatorio: str) -> dict:
+    """Compila (uma vez por processo) os modelos de templates/<relatorio>/ ({nome: Template})."""
+    modelos = {}
+    for arquivo in arquivos_modelo(relatorio):
+        modelo = Template(arquivo.read_text(encoding='utf-8'))
+        if not modelo.is_valid():
+            raise ValueError(f"Modelo inválido: {arquivo}")
+        modelos[arquivo.stem] = modelo
+    if not modelos:
+        raise FileNotFoundError(f"Nenhum modelo em {TEMPLATES_DIR / relatorio}")
+    return modelos
+
+
+@dataclass(frozen=True)
+class Secao:
+    nome: str
+    montar: Callable[[], dict] | None = None       # calcula as substituições (agregados, tabelas, gráficos)
+    depende: dict = field(default_factory=dict)    # {tabela: [colunas]} lidas por montar
+    valores: dict = field(default_factory=dict)    # valores simples já conhecidos (ex.: data de geração)
+
+
+class Renderizador:
+    """Escreve um relatório seção a seção, reaproveitando fragmentos cujas entradas não mudaram."""
+
+    def __init__(self, relatorio: str, tabelas: dict | None = None, codigo=(), modelos: dict | None = None):
+        """tabelas: {nome: DataFrame} citadas em Secao.depende.
+        codigo: arquivos que montam as seções (ex.: o gerador dos gráficos); entram na chave.
+        """
+        self.relatorio = relatorio
+        self.tabelas = tabelas or {}
+        self.modelos = modelos or carregar_modelos(relatorio)
+        self.versao = hash_valor([hash_arquivo(p) for p in codigo])
+        self.manifesto_path = FRAGMENTOS_DIR / f"{relatorio}.json"
+        self.manifesto = self._ler_manifesto()
+        self.renderizadas = []   # (seção, motivo)
+        self.reaproveitadas = []
+        self._assinaturas = {}
+
+    def _ler_manifesto(self) -> dict:
+        try:
+            return json.loads(self.manifesto_path.read_text(encoding='utf-8'))
+        except Exception:
+            return {}
+
+    def parcial(self, nome: str, **valores) -> str:
+        """Renderiza um trecho repetido (ex.: '_linha_estado')."""
+        return self.modelos[nome].substitute({k: str(v) for k, v in valores.items()})
+
+    def assinatura(self, tabela: str, colunas) -> str:
+        """Hash do conteúdo das colunas (linha a linha, na ordem da tabela)."""
+        chave = (tabela, tuple(colunas))
+        if chave not in self._assinaturas:
+            dados = self.tabelas[tabela][list(colunas)]
+            self._assinaturas[chave] = hash_bytes(pd.util.hash_pandas_object(dados, index=False).to_numpy().tobytes())
+        return self._assinaturas[chave]
+
+    def entradas(self, secao: Secao) -> dict:
+        """{entrada: assinatura} da seção: colunas declaradas + valores simples."""
+        entradas = {tabela: self.assinatura(tabela, colunas) for tabela, colunas in secao.depende.items()}
+        entradas.update({nome: hash_valor(valor) for nome, valor in secao.valores.items()})
+        return entradas
+
+    def _motivo(self, secao: Secao, entradas: dict) -> str:
+        anterior = self.manifesto.get(secao.nome)
+        if anterior is None:
+            return 'nova'
+        mudaram = sorted(k for k in entradas.keys() | anterior['entradas'].keys()
+                         if entradas.get(k) != anterior['entradas'].get(k))
+        return ', '.join(mudaram) or 'modelo/código'
+
+    def fragmento(self, secao: Secao) -> str:
+        entradas = self.entradas(secao)
+        chave = hash_valor({'modelo': self.modelos[secao.nome].template, 'versao': self.versao,
+                            'entradas': entradas})[:16]
+        arquivo = FRAGMENTOS_DIR / f"{self.relatorio}.{secao.nome}.{chave}.html"
+        if arquivo.exists():
+            self.reaproveitadas.append(secao.nome)
+            self.manifesto[secao.nome] = {'chave': chave, 'entradas': entradas}
+            return arquivo.read_text(encoding='utf-8')
+
+        self.renderizadas.append((secao.nome, self._motivo(secao, entradas)))
+        valores = {**secao.valores, **(secao.montar() if secao.montar else {})}
+        html = self.modelos[secao.nome].substitute({k: str(v) for k, v in valores.items()})
+        FRAGMENTOS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = arquivo.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(html, encoding='utf-8')
+        os.replace(tmp, arquivo)
+        # fragmentos antigos desta seção não serão mais usados
+        for antigo in FRAGMENTOS_DIR.glob(f"{self.relatorio}.{secao.nome}.*.html"):
+            if antigo != arquivo:
+                antigo.unlink(missing_ok=True)
+        self.manifesto[secao.nome] = {'chave': chave, 'entradas': entradas}
+        return html
+
+    def gravar(self, secoes, destino, pos=None):
+        """Escreve as seções em destino (arquivo temporário + troca atômica).
+        pos(html, destino) é aplicado a cada fragmento antes da escrita.
+        """
+        destino = Path(destino)
+        tmp = destino.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as saida:
+            for secao in secoes:
+                html = self.fragmento(secao)
+                saida.write(pos(html, destino) if pos else html)
+        os.replace(tmp, destino)
+
+        FRAGMENTOS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifesto_path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(self.manifesto, indent=1, sort_keys=True), encoding='utf-8')
+        os.replace(tmp, self.manifesto_path)
+
+        if self.reaproveitadas:
+            print(f"  Seções reaproveitadas: {', '.join(self.reaproveitadas)}")
+        if self.renderizadas:
+            print(f"  🔨 Seções refeitas: {', '.join(f'{nome} ({motivo})' for nome, motivo in self.renderizadas)}")
+        return destino
@@ -0,0 +1,114 @@
+"""
+Códigos IBGE de municípios (CD_MUN)
+Tabela de referência CD_MUN/NM_MUN/UF montada a partir das tabelas de atributos
+(.dbf) das malhas municipais do IBGE das UFs do projeto (UFS). O resolvedor nome→código
+deve ser usado apenas na ingestão de fontes que não trazem o código; dali em diante
+os cruzamentos são feitos pelo CD_MUN inteiro (o nome não é único entre UFs).
+"""
+from functools import lru_cache
+from pathlib import Path
+import unicodedata
+
+import geopandas as gpd
+import pandas as pd
+
+import ingestao_epe
+
+BASE_DIR = Path(__file__).parent
+ESTADOS_DIR = BASE_DIR / 'Shapefile_Estados'
+RS_DIR = BASE_DIR / 'RS'
+
+UFS = ingestao_epe.UFS_PADRAO  # malhas de outras UFs em Shapefile_Estados/ são ignoradas
+
+# Tabelas de atributos das malhas municipais (uma por UF)
+FONTES_MALHA = ('{uf}_Municipios_*/{uf}_Municipios_*.dbf',)
+
+
+def _fontes():
+    fontes = []
+    for uf in UFS:
+        for base in (ESTADOS_DIR, RS_DIR):
+            for padrao in FONTES_MALHA:
+                fontes.extend(sorted(base.glob(padrao.format(uf=uf))))
+    return fontes
+
+
+def normalizar_nome(nome) -> str:
+    """Chave de comparação de nomes: NFC, sem espaços nas pontas, sem diferença de caixa."""
+    return unicodedata.normalize('NFC', str(nome)).strip().casefold()
+
+
+@lru_cache(maxsize=1)
+def tabela_municipios() -> pd.DataFrame:
+    """CD_MUN (int32), NM_MUN e UF de todos os municípios das malhas das UFS."""
+    partes = []
+    for dbf in _fontes():
+        try:
+            tab = gpd.read_file(dbf, ignore_geometry=True, columns=['CD_MUN', 'NM_MUN', 'SIGLA_UF'])
+        except Exception:
+            continue
+        if not {'CD_MUN', 'NM_MUN', 'SIGLA_UF'}.issubset(tab.columns):
+            continue
+        partes.append(tab[['CD_MUN', 'NM_MUN', 'SIGLA_UF']].rename(columns={'SIGLA_UF': 'UF'}))
+    if not partes:
+        return pd.DataFrame({'CD_MUN': pd.Series(dtype='int32'), 'NM_MUN': pd.Series(dtype=str),
+                             'UF': pd.Series(dtype=str)})
+    tab = pd.concat(partes, ignore_index=True)
+    tab['CD_MUN'] = pd.to_numeric(tab['CD_MUN'], errors='coerce')
+    tab = tab.dropna(subset=['CD_MUN']).drop_duplicates(subset=['CD_MUN'])
+    tab['CD_MUN'] = tab['CD_MUN'].astype('int32')
+    tab['UF'] = tab['UF'].astype(str).str.upper()
+    return tab[tab['UF'].isin(UFS)].reset_index(drop=True)
+
+
+def resolver_codigos(nomes, ufs) -> pd.Series:
+    """Resolve (nome, UF) → CD_MUN (Int32; nulo quando não encontrado).
+    Usado apenas na ingestão de fontes sem código.
+    """
+    nomes = pd.Series(nomes).reset_index(drop=True)
+    ufs = pd.Series(ufs).reset_index(drop=True) if not isinstance(ufs, str) else pd.Series([ufs] * len(nomes))
+    ref = tabela_municipios()
+    chave_ref = pd.Series(ref['CD_MUN'].to_numpy(),
+                          index=pd.MultiIndex.from_arrays([ref['UF'], ref['NM_MUN'].map(normalizar_nome)]))
+    chave_ref = chave_ref[~chave_ref.index.duplicated(keep=False)]  # homônimos na mesma UF: ambíguo
+    chave = pd.MultiIndex.from_arrays([ufs.astype(str).str.upper(), nomes.map(normalizar_nome)])
+    return pd.Series(chave_ref.reindex(chave).to_numpy(), dtype='Int32')
+
+
+def como_codigo(serie) -> pd.Series:
+    """Converte uma coluna CD_MUN de qualquer fonte (texto '4317558', float, int) para Int32."""
+    return pd.to_numeric(pd.Series(serie), errors='coerce').astype('Int32')
+
+
+@lru_cache(maxsize=1)
+def geometrias_municipios() -> gpd.GeoDataFrame:
+    """CD_MUN e polígono (EPSG:4326) dos municípios das malhas das UFS (o .shp ao lado de cada .dbf).
+    Vazio se nenhuma malha com geometria estiver presente; ver ufs_sem_geometria().
+    """
+    partes = []
+    for dbf in _fontes():
+        shp = dbf.with_suffix('.shp')
+        if not shp.exists():
+            continue
+        try:
+            gdf = gpd.read_file(shp, columns=['CD_MUN'])
+        except Exception:
+            continue
+        if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+            gdf = gdf.to_crs(epsg=4326)
+        partes.append(gdf[['CD_MUN', 'geometry']])
+    if not partes:
+        return gpd.GeoDataFrame({'CD_MUN': pd.Series(dtype='int32')}, geometry=gpd.GeoSeries([], crs='EPSG:4326'))
+    gdf = pd.concat(partes, ignore_index=True)
+    gdf['CD_MUN'] = pd.to_numeric(gdf['CD_MUN'], errors='coerce')
+    gdf = gdf.dropna(subset=['CD_MUN']).drop_duplicates(subset=['CD_MUN'])
+    gdf['CD_MUN'] = gdf['CD_MUN'].astype('int32')
+    return gpd.GeoDataFrame(gdf.reset_index(drop=True), geometry='geometry', crs='EPSG:4326')
+
+
+@lru_cache(maxsize=1)
+def ufs_sem_geometria() -> tuple:
+    """UFs da tabela de municípios sem nenhum polígono em geometrias_municipios() (ex.: malha só com .dbf/.shx)."""
+    tab = tabela_municipios()
+    com_geometria = set(tab.loc[tab['CD_MUN'].isin(geometrias_municipios()['CD_MUN']), 'UF'])
+    return tuple(uf for uf in UFS if uf in set(tab['UF']) and uf not in com_geometria)
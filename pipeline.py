@@ -0,0 +1,262 @@
+"""
+Pipeline completo - Linhas de Transmissão de Foz do Iguaçu
+Declara o grafo de etapas e executa em paralelo (threads, um único processo) as
+ramificações independentes, passando os DataFrames em memória entre as etapas:
+
+    ingestao → consolidacao → estatisticas → {figura, relatorio_html, relatorio_tecnico,
+                                              relatorio_acessivel}
+               consolidacao → mapas → indice
+    ativos (outputs/static/) → relatórios e mapas
+    todas → publicar
+
+Uso:
+    python pipeline.py                 # executa tudo
+    python pipeline.py --force         # ignora o cache de artefatos
+    python pipeline.py -e relatorio_tecnico,mapas   # só essas etapas (e dependências)
+    python pipeline.py --listar        # mostra o grafo de etapas
+"""
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Callable
+import argparse
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')  # sem janelas: o pipeline roda sem interação
+
+from cache_artefatos import CacheArtefatos, adicionar_argumento_force
+
+BASE_DIR = Path(__file__).parent
+PUBLICAVEIS = 'outputs'  # pasta publicada no GitHub Pages
+
+
+@dataclass(frozen=True)
+class Etapa:
+    nome: str
+    depende: tuple
+    funcao: Callable  # funcao(cache, resultados) -> resultado
+    descricao: str = ''
+
+
+# ============================================================================
+# ETAPAS
+# ============================================================================
+
+def _ingestao(cache, r):
+    import analise_consolidada as ac
+    csv_files = ac.listar_camadas()
+    print(f"📁 Arquivos encontrados: {len(csv_files)}")
+    return {'csv_files': csv_files, 'camadas': ac.ler_camadas(ac.montar_manifesto(csv_files))}
+
+
+def _consolidacao(cache, r):
+    import analise_consolidada as ac
+    df_completo = ac.consolidar(r['ingestao']['camadas'])
+    ac.salvar_consolidado(df_completo, cache, r['ingestao']['csv_files'])
+    return df_completo
+
+
+def _estatisticas(cache, r):
+    import analise_consolidada as ac
+    df_completo = r['consolidacao']
+    stats = ac.calcular_estatisticas(df_completo)
+    df_multiplas = ac.montar_relatorio_multiplas(stats)
+    ac.salvar_multiplas(df_multiplas, cache, r['ingestao']['csv_files'])
+    ac.salvar_snapshot(df_completo, df_multiplas)
+    ac.salvar_cubo(stats['cubo'], cache, r['ingestao']['csv_files'])
+    return {'stats': stats, 'df_multiplas': df_multiplas}
+
+
+def _figura(cache, r):
+    import analise_consolidada as ac
+    return ac.salvar_visualizacao(r['estatisticas']['stats'], cache, fechar=True)
+
+
+def _ativos(cache, r):
+    import ativos_estaticos
+    paginas = sorted((BASE_DIR / 'outputs').glob('*.html')) + sorted((BASE_DIR / 'outputs' / 'mapas').glob('*.html'))
+    urls = ativos_estaticos.urls_em_uso(paginas)
+    return ativos_estaticos.vendorizar_todos(urls)
+
+
+def _relatorio_html(cache, r):
+    import gerar_relatorio_html
+    return gerar_relatorio_html.gerar(cache, r['consolidacao'], r['estatisticas']['df_multiplas'],
+                                      r['estatisticas']['stats']['cubo'])
+
+
+def _relatorio_tecnico(cache, r):
+    import gerar_relatorio_tecnico
+    return gerar_relatorio_tecnico.gerar(cache, r['consolidacao'], r['estatisticas']['df_multiplas'],
+                                      r['estatisticas']['stats']['cubo'])
+
+
+def _relatorio_acessivel(cache, r):
+    import gerar_relatorio_acessivel
+    return gerar_relatorio_acessivel.gerar(cache, r['consolidacao'], r['estatisticas']['df_multiplas'],
+                                      r['estatisticas']['stats']['cubo'])
+
+
+def _limites(cache, r):
+    import limites_estaduais
+    return limites_estaduais.atualizar(cache)
+
+
+def _linhas(cache, r):
+    import repositorio_linhas
+    try:
+        return repositorio_linhas.construir_faixa_servidao(cache)
+    except Exception as e:
+        print(f"⚠️  Repositório de linhas indisponível: {e}")
+        return None
+
+
+def _mapas(cache, r):
+    import gerar_mapas_por_linha
+    return gerar_mapas_por_linha.gerar_mapas(cache, r['consolidacao'])
+
+
+def _indice(cache, r):
+    import gerar_mapas_por_linha
+    if not r['mapas']:
+        return None
+    return gerar_mapas_por_linha.gerar_indice(cache, r['mapas'])
+
+
+def _publicar(cache, r):
+    """Lista as saídas publicadas que mudaram (candidatas a commit/deploy no GitHub Pages).
+    Só entram arquivos de outputs/ efetivamente regenerados: artefatos internos (.cache/, Parquet
+    intermediários) e saídas cuja geração falhou depois do verificar() ficam de fora.
+    """
+    alteradas = [saida for saida in cache.registrados
+                 if saida.startswith(f'{PUBLICAVEIS}/') and (BASE_DIR / saida).exists()]
+    if alteradas:
+        print("\n📤 Saídas alteradas para publicar:")
+        print("  git add " + ' '.join(f'"{s}"' for s in alteradas))
+    else:
+        print("\n📤 Nenhuma saída alterada: nada a publicar.")
+    return alteradas
+
+
+ETAPAS = {e.nome: e for e in [
+    Etapa('ingestao', (), _ingestao, 'Lê os CSVs de per_layer/'),
+    Etapa('consolidacao', ('ingestao',), _consolidacao, 'dados_consolidados.csv'),
+    Etapa('estatisticas', ('consolidacao',), _estatisticas, 'Cubo de agregados + municipios_multiplas_linhas.csv'),
+    Etapa('figura', ('estatisticas',), _figura, 'analise_consolidada_visualizacao.png'),
+    Etapa('ativos', (), _ativos, 'outputs/static/ (JS/CSS das CDNs, uso offline)'),
+    Etapa('relatorio_html', ('estatisticas', 'ativos'), _relatorio_html, 'outputs/dashboard.html'),
+    Etapa('relatorio_tecnico', ('estatisticas', 'ativos'), _relatorio_tecnico, 'outputs/relatorio_tecnico.html'),
+    Etapa('relatorio_acessivel', ('estatisticas', 'ativos'), _relatorio_acessivel, 'outputs/relatorio_acessivel.html'),
+    Etapa('limites', (), _limites, '.cache/limites/ (contorno de cada UF, simplificado)'),
+    Etapa('linhas', ('limites',), _linhas, '.cache/linhas/faixa_servidao/ (linhas recortadas por tensão/UF)'),
+    Etapa('mapas', ('consolidacao', 'ativos', 'limites', 'linhas'), _mapas, 'outputs/mapas/mapa_*.html'),
+    Etapa('indice', ('mapas',), _indice, 'outputs/mapas/index.html'),
+    Etapa('publicar', ('figura', 'relatorio_html', 'relatorio_tecnico', 'relatorio_acessivel', 'indice'),
+          _publicar, 'Resumo das saídas alteradas'),
+]}
+
+
+# ============================================================================
+# AGENDADOR
+# ============================================================================
+
+def selecionar(alvos, etapas=ETAPAS):
+    """Fecha a seleção com todas as dependências (transitivas) dos alvos."""
+    if not alvos:
+        return list(etapas)
+    selecionadas = set()
+    pilha = list(alvos)
+    while pilha:
+        nome = pilha.pop()
+        if nome not in etapas:
+            raise SystemExit(f"Etapa desconhecida: {nome}. Use --listar para ver as etapas.")
+        if nome in selecionadas:
+            continue
+        selecionadas.add(nome)
+        pilha.extend(etapas[nome].depende)
+    return [n for n in etapas if n in selecionadas]
+
+
+def executar(cache, alvos=None, jobs=None, etapas=ETAPAS):
+    """Executa as etapas selecionadas respeitando dependências; etapas prontas rodam em paralelo.
+    Retorna (resultados, falhas).
+    """
+    pendentes = selecionar(alvos, etapas)
+    resultados, falhas, ignoradas = {}, {}, []
+    jobs = jobs or min(8, (os.cpu_count() or 2))
+    inicio_total = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='etapa') as pool:
+        em_execucao = {}
+        while pendentes or em_execucao:
+            # etapas cujas dependências falharam não são executadas
+            for nome in list(pendentes):
+                deps = [d for d in etapas[nome].depende if d in etapas]
+                if any(d in falhas or d in ignoradas for d in deps):
+                    pendentes.remove(nome)
+                    ignoradas.append(nome)
+            # dispara todas as etapas prontas
+            for nome in list(pendentes):
+                deps = [d for d in etapas[nome].depende if d in pendentes or d in em_execucao.values()]
+                if deps:
+                    continue
+                pendentes.remove(nome)
+                print(f"▶ {nome}")
+                fut = pool.submit(_executar_etapa, etapas[nome], cache, resultados)
+                em_execucao[fut] = nome
+            if not em_execucao:
+                break
+            feitos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for fut in feitos:
+                nome = em_execucao.pop(fut)
+                try:
+                    resultados[nome], dur = fut.result()
+                    print(f"✓ {nome} ({dur:.2f}s)")
+                except Exception as e:
+                    falhas[nome] = e
+                    print(f"✗ {nome}: {type(e).__name__}: {e}")
+
+    cache.imprimir_resumo()
+    print("\n" + "=" * 60)
+    if ignoradas:
+        print(f"⏭️  Etapas não executadas (dependência falhou): {', '.join(ignoradas)}")
+    status = '❌ PIPELINE COM FALHAS' if falhas else '✅ PIPELINE CONCLUÍDO'
+    print(f"{status} em {time.perf_counter() - inicio_total:.2f}s")
+    print("=" * 60)
+    return resultados, falhas
+
+
+def _executar_etapa(etapa, cache, resultados):
+    t0 = time.perf_counter()
+    res = etapa.funcao(cache, resultados)
+    return res, time.perf_counter() - t0
+
+
+def listar(etapas=ETAPAS):
+    print("Etapas do pipeline (nome ← dependências):")
+    for e in etapas.values():
+        deps = ', '.join(e.depende) or '—'
+        print(f"  • {e.nome:<20} ← {deps:<40} {e.descricao}")
+
+
+def main(argv=None):
+    parser = adicionar_argumento_force(argparse.ArgumentParser(description='Executa o pipeline completo em paralelo'))
+    parser.add_argument('-e', '--etapas', default='',
+                        help='Etapas-alvo separadas por vírgula (dependências são incluídas)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Número máximo de etapas simultâneas')
+    parser.add_argument('--listar', action='store_true', help='Lista as etapas e sai')
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        listar()
+        return 0
+    alvos = [a.strip() for a in args.etapas.split(',') if a.strip()]
+    _, falhas = executar(CacheArtefatos(force=args.force), alvos, args.jobs)
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
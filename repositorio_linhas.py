@@ -0,0 +1,264 @@
+"""
+Repositório particionado de linhas de transmissão - .cache/linhas/<fonte>/
+Cada fonte de linhas ('epe', a base nacional da EPE; 'faixa_servidao', os eixos
+de faixa_servidao.gpkg usados nos mapas) é gravada uma única vez em GeoParquet
+particionado por tensão e UF, já recortado pelo limite de cada UF:
+
+    .cache/linhas/epe/tensao=230/uf=RS/linhas.parquet
+    .cache/linhas/epe/indice.json      (partições, feições e retângulo de cada uma)
+
+Dentro de cada partição as feições ficam em ordem de Hilbert, com a coluna
+bbox (GeoParquet 1.1, write_covering_bbox): leituras por retângulo pulam os
+grupos de linhas fora dele. Ler uma combinação (tensão, UF) é abrir um arquivo,
+sem recorte nem filtro em tempo de execução.
+
+O recorte usa o contorno exato da UF (limites_estaduais) e uma STRtree das
+linhas para só intersectar com ele as que tocam o polígono.
+
+Uso:
+    python repositorio_linhas.py                        # monta/atualiza todas as fontes (PR, SC, RS)
+    python repositorio_linhas.py --fonte faixa_servidao
+    python repositorio_linhas.py --listar               # partições disponíveis
+"""
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import warnings
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyogrio
+import shapely
+from shapely import STRtree
+
+from cache_artefatos import CacheArtefatos, adicionar_argumento_force
+import ingestao_epe
+import limites_estaduais
+
+BASE_DIR = Path(__file__).parent
+LINHAS_DIR = BASE_DIR / '.cache' / 'linhas'
+FAIXA_SERVIDAO_GPKG = BASE_DIR / 'faixa_servidao.gpkg'
+CRS_LINHAS = 'EPSG:4326'
+
+
+def _dir_fonte(fonte) -> Path:
+    return LINHAS_DIR / fonte
+
+
+def rotulo_tensao(valor) -> str:
+    """230.0 / '230' / '230 kV' -> '230'."""
+    texto = str(valor).lower().replace('kv', '').strip()
+    try:
+        return str(int(round(float(texto))))
+    except ValueError:
+        return texto
+
+
+def _somente_linhas(geometrias):
+    """Resultado de intersection -> só as partes lineares (descarta pontos de toque na borda)."""
+    partes, origem = shapely.get_parts(geometrias, return_index=True)
+    lineares = shapely.get_type_id(partes) == 1  # LineString
+    return shapely.multilinestrings(partes[lineares], indices=origem[lineares],
+                                    out=np.empty(len(geometrias), dtype=object))  # sem partes lineares -> None
+
+
+def recortar_por_uf(gdf, uf, contorno=None) -> gpd.GeoDataFrame:
+    """Linhas de gdf (EPSG:4326) recortadas pelo limite da UF.
+    A STRtree escolhe as linhas que tocam o polígono; só elas são intersectadas.
+    """
+    contorno = contorno if contorno is not None else limites_estaduais.geometria(uf)
+    if contorno is None:
+        raise FileNotFoundError(f"Limite da UF {uf} não encontrado ({ingestao_epe.ESTADOS_DIR})")
+    candidatas = STRtree(gdf.geometry.values).query(contorno, predicate='intersects')
+    recorte = gdf.iloc[candidatas].copy()
+    shapely.prepare(contorno)
+    recorte['geometry'] = _somente_linhas(shapely.intersection(recorte.geometry.values, contorno))
+    recorte = recorte[recorte.geometry.notna() & ~recorte.geometry.is_empty]
+    return recorte.reset_index(drop=True)
+
+
+def gravar(fonte, gdf, ufs, coluna_tensao='Tensao', contornos=None) -> dict:
+    """Grava gdf particionado por tensão e UF (recortado por UF) em .cache/linhas/<fonte>/.
+    A fonte inteira é trocada de uma vez: leitores nunca veem partições de versões misturadas.
+    Retorna o índice {'particoes': {'<tensao>/<UF>': {...}}}.
+    """
+    gdf = gdf.to_crs(CRS_LINHAS) if gdf.crs is not None else gdf.set_crs(CRS_LINHAS)
+    gdf = gdf[gdf.geometry.notna() & ~gdf.geometry.is_empty].copy()
+    gdf['tensao'] = gdf[coluna_tensao].map(rotulo_tensao)
+    destino = _dir_fonte(fonte)
+    tmp = destino.with_name(f".{fonte}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    indice = {'fonte': fonte, 'crs': CRS_LINHAS, 'ufs': sorted(ufs), 'particoes': {}}
+    for uf in ufs:
+        contorno = (contornos or {}).get(uf)
+        recorte = recortar_por_uf(gdf, uf, contorno)
+        for tensao, parte in recorte.groupby('tensao', sort=True):
+            parte = parte.drop(columns='tensao')
+            parte = parte.iloc[parte.geometry.hilbert_distance().argsort()]  # vizinhas no espaço, vizinhas no arquivo
+            arquivo = Path(f'tensao={tensao}') / f'uf={uf}' / 'linhas.parquet'
+            (tmp / arquivo).parent.mkdir(parents=True, exist_ok=True)
+            parte.to_parquet(tmp / arquivo, index=False, compression='zstd', write_covering_bbox=True)
+            indice['particoes'][f'{tensao}/{uf}'] = {
+                'arquivo': arquivo.as_posix(),
+                'feicoes': len(parte),
+                'bbox': [round(float(v), 6) for v in parte.total_bounds],
+            }
+    (tmp / 'indice.json').write_text(json.dumps(indice, ensure_ascii=False, indent=1, sort_keys=True),
+                                     encoding='utf-8')
+    antigo = destino.with_name(f".{fonte}.{os.getpid()}.old")
+    if destino.exists():
+        os.replace(destino, antigo)
+    os.replace(tmp, destino)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return indice
+
+
+def ler_indice(fonte) -> dict:
+    try:
+        return json.loads((_dir_fonte(fonte) / 'indice.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {'particoes': {}}
+
+
+def cobre(fonte, uf) -> bool:
+    """True se a fonte já foi gravada para a UF (ausência de partição significa: nenhuma linha ali)."""
+    return uf.upper() in ler_indice(fonte).get('ufs', [])
+
+
+def particao(fonte, voltagem, uf) -> Path | None:
+    """Arquivo da partição (tensão, UF) da fonte; None se a combinação não tiver linhas."""
+    info = ler_indice(fonte)['particoes'].get(f'{rotulo_tensao(voltagem)}/{uf.upper()}')
+    return _dir_fonte(fonte) / info['arquivo'] if info else None
+
+
+def ler(fonte, voltagem, uf, colunas=None, bbox=None) -> gpd.GeoDataFrame | None:
+    """Linhas de uma combinação (tensão, UF): leitura direta da partição (None se não houver)."""
+    arquivo = particao(fonte, voltagem, uf)
+    if arquivo is None or not arquivo.exists():
+        return None
+    return gpd.read_parquet(arquivo, columns=colunas, bbox=bbox)
+
+
+def ler_varias(fonte, voltagens=None, ufs=None, bbox=None) -> gpd.GeoDataFrame | None:
+    """Várias partições (filtro por tensões, UFs e retângulo, decidido pelo índice sem abrir os arquivos)."""
+    tensoes = {rotulo_tensao(v) for v in voltagens} if voltagens else None
+    ufs = {u.upper() for u in ufs} if ufs else None
+    partes = []
+    for chave, info in sorted(ler_indice(fonte)['particoes'].items()):
+        tensao, uf = chave.split('/')
+        if (tensoes and tensao not in tensoes) or (ufs and uf not in ufs):
+            continue
+        if bbox is not None and not shapely.intersects(shapely.box(*info['bbox']), shapely.box(*bbox)):
+            continue
+        parte = gpd.read_parquet(_dir_fonte(fonte) / info['arquivo'], bbox=bbox)
+        partes.append(parte.assign(tensao=tensao, uf=uf))
+    if not partes:
+        return None
+    return gpd.GeoDataFrame(pd.concat(partes, ignore_index=True), geometry='geometry', crs=CRS_LINHAS)
+
+
+def indice_path(fonte) -> Path:
+    return _dir_fonte(fonte) / 'indice.json'
+
+
+def _entradas_ufs(cache, ufs):
+    """Contornos das UFs (.cache/limites/), atualizados antes de servirem de entrada."""
+    return limites_estaduais.atualizar(cache, ufs)
+
+
+def construir_epe(cache=None, ufs=ingestao_epe.UFS_PADRAO, origem=ingestao_epe.EPE_SHP) -> Path:
+    """Fonte 'epe': lê o shapefile da EPE uma vez (filtro espacial por UF) e grava as partições."""
+    cache = cache or CacheArtefatos()
+    saida = indice_path('epe')
+    entradas = [Path(origem).with_suffix(s) for s in ('.shp', '.shx', '.dbf')] + _entradas_ufs(cache, ufs)
+    if cache.verificar(saida, entradas, parametros={'ufs': sorted(ufs)},
+                       codigo=[Path(__file__), Path(ingestao_epe.__file__)]):
+        gdf, _ = ingestao_epe.carregar_epe(ufs, cache, origem)
+        indice = gravar('epe', gdf.drop(columns=['UFs', 'fid_epe'], errors='ignore'), ufs)
+        cache.registrar(saida)
+        print(f"✓ Repositório de linhas (EPE): {len(indice['particoes'])} partições em {_dir_fonte('epe')}")
+    return saida
+
+
+def _ler_faixa_servidao(origem) -> gpd.GeoDataFrame:
+    """Todas as camadas linha_transmissao_<kV> do GPKG num único GeoDataFrame (Nome, Tensao)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # campos com formato que o GDAL não reconhece
+        camadas = [camada for camada, _ in pyogrio.list_layers(origem)]
+    partes = []
+    for camada in camadas:
+        casamento = re.fullmatch(r'linha_transmissao_(\d+)', camada)
+        if not casamento:
+            continue
+        campos = pyogrio.read_info(origem, layer=camada)['fields']
+        gdf = gpd.read_file(origem, layer=camada, columns=[c for c in ['Nome'] if c in campos], engine='pyogrio')
+        partes.append(gdf.to_crs(CRS_LINHAS).assign(Tensao=casamento.group(1)))
+    if not partes:
+        raise FileNotFoundError(f"Nenhuma camada linha_transmissao_<kV> em {origem}")
+    gdf = pd.concat(partes, ignore_index=True)
+    return gpd.GeoDataFrame(gdf[[c for c in ['Nome', 'Tensao'] if c in gdf.columns] + ['geometry']],
+                            geometry='geometry', crs=CRS_LINHAS)
+
+
+def construir_faixa_servidao(cache=None, ufs=ingestao_epe.UFS_PADRAO, origem=FAIXA_SERVIDAO_GPKG) -> Path:
+    """Fonte 'faixa_servidao': eixos de faixa_servidao.gpkg recortados uma vez por (tensão, UF)."""
+    cache = cache or CacheArtefatos()
+    saida = indice_path('faixa_servidao')
+    if cache.verificar(saida, [Path(origem)] + _entradas_ufs(cache, ufs), parametros={'ufs': sorted(ufs)},
+                       codigo=[Path(__file__)]):
+        indice = gravar('faixa_servidao', _ler_faixa_servidao(origem), ufs)
+        cache.registrar(saida)
+        print(f"✓ Repositório de linhas (faixa de servidão): {len(indice['particoes'])} partições "
+              f"em {_dir_fonte('faixa_servidao')}")
+    return saida
+
+
+FONTES = {'epe': construir_epe, 'faixa_servidao': construir_faixa_servidao}
+
+
+def listar(fonte):
+    particoes = ler_indice(fonte)['particoes']
+    if not particoes:
+        print(f"  (fonte '{fonte}' vazia; execute python repositorio_linhas.py)")
+    for chave, info in sorted(particoes.items(), key=lambda kv: (int(kv[0].split('/')[0]) if kv[0].split('/')[0].isdigit()
+                                                                 else 0, kv[0])):
+        print(f"  • {chave:<10} {info['feicoes']:>5} feições  {info['arquivo']}")
+
+
+def main(argv=None):
+    parser = adicionar_argumento_force(argparse.ArgumentParser(
+        description='Repositório de linhas particionado por tensão e UF (.cache/linhas/)'))
+    parser.add_argument('--ufs', default=','.join(ingestao_epe.UFS_PADRAO), help='UFs (padrão: PR,SC,RS)')
+    parser.add_argument('--fonte', choices=list(FONTES), help='Fonte a montar (padrão: todas)')
+    parser.add_argument('--listar', action='store_true', help='Lista as partições e sai')
+    args = parser.parse_args(argv)
+
+    fontes = [args.fonte] if args.fonte else list(FONTES)
+    if args.listar:
+        for fonte in fontes:
+            print(f"📂 {fonte}")
+            listar(fonte)
+        return 0
+    ufs = [uf.strip().upper() for uf in args.ufs.split(',') if uf.strip()]
+    cache = CacheArtefatos(force=args.force)
+    falhas = 0
+    for fonte in fontes:
+        try:
+            FONTES[fonte](cache, ufs)
+        except (FileNotFoundError, pyogrio.errors.DataSourceError) as e:
+            print(f"⚠️  {fonte}: {e}")
+            falhas += 1
+            continue
+        print(f"📂 {fonte}")
+        listar(fonte)
+    cache.imprimir_resumo()
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
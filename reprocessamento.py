@@ -0,0 +1,175 @@
+"""
+Reprocessamento dos dados em segundo plano (botão "Atualizar dados" do dashboard)
+A consolidação (analise_consolidada.executar) roda numa thread de trabalho:
+a sessão que pediu continua respondendo e acompanha o progresso.
+
+  - Um pedido feito enquanto outro está em andamento devolve a mesma tarefa
+    (várias sessões clicando ao mesmo tempo disparam um único reprocessamento).
+  - Uma trava em arquivo (.cache/reprocessamento.lock) impede que dois
+    processos (ex.: dois servidores Streamlit) reescrevam os CSVs ao mesmo
+    tempo; quem chega depois espera e reaproveita o resultado.
+  - Cada arquivo é gravado num temporário e trocado de uma vez; a versão dos
+    dados vista pelo dashboard (versao_dados) fica congelada enquanto a tarefa
+    roda e só avança quando ela termina, então as sessões trocam para o
+    snapshot novo de uma vez só.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+
+BASE_DIR = Path(__file__).parent
+TRAVA = BASE_DIR / '.cache' / 'reprocessamento.lock'
+ESTADO = BASE_DIR / '.cache' / 'reprocessamento.json'
+
+TRAVA_EXPIRA = 30 * 60   # s; trava mais antiga que isso é de um processo que morreu
+ESPERA_INTERVALO = 0.5   # s entre tentativas de obter a trava
+
+
+class TravaArquivo:
+    """Trava entre processos: criação exclusiva de um arquivo (funciona em Windows e Linux)."""
+
+    def __init__(self, caminho=TRAVA, expira=TRAVA_EXPIRA):
+        self.caminho = Path(caminho)
+        self.expira = expira
+
+    def ocupada(self) -> bool:
+        try:
+            return time.time() - self.caminho.stat().st_mtime < self.expira
+        except OSError:
+            return False
+
+    def tentar(self) -> bool:
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        if self.caminho.exists() and not self.ocupada():
+            print(f"⚠️  Trava expirada removida: {self.caminho}")
+            self.caminho.unlink(missing_ok=True)
+        try:
+            fd = os.open(self.caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(json.dumps({'pid': os.getpid(), 'inicio': time.time()}))
+        return True
+
+    def liberar(self):
+        self.caminho.unlink(missing_ok=True)
+
+
+@dataclass
+class Tarefa:
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    estado: str = 'na fila'     # na fila | aguardando | executando | concluida | falhou
+    progresso: float = 0.0
+    etapa: str = 'Na fila'
+    erro: str | None = None
+    inicio: float = field(default_factory=time.time)
+    fim: float | None = None
+
+    @property
+    def em_andamento(self) -> bool:
+        return self.estado in ('na fila', 'aguardando', 'executando')
+
+    def atualizar(self, fracao, etapa):
+        self.progresso = min(max(float(fracao), 0.0), 1.0)
+        self.etapa = etapa
+
+
+def _ler_estado() -> dict:
+    try:
+        return json.loads(ESTADO.read_text(encoding='utf-8'))
+    except Exception:
+        return {}
+
+
+def _publicar(tarefa: Tarefa, versao: float):
+    """Registra a versão dos dados que os leitores devem usar (gravação atômica)."""
+    ESTADO.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ESTADO.with_suffix(f'.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps({'versao': versao, 'tarefa': tarefa.id, 'em': time.time()}), encoding='utf-8')
+    os.replace(tmp, ESTADO)
+
+
+def versao_arquivos(arquivos) -> float:
+    return max((Path(a).stat().st_mtime for a in arquivos if Path(a).exists()), default=0.0)
+
+
+def versao_dados(arquivos) -> float:
+    """Chave de cache dos dados: a modificação mais recente dos arquivos.
+    Durante um reprocessamento, devolve a última versão publicada: ninguém
+    troca para dados ainda sendo gravados.
+    """
+    if TravaArquivo().ocupada():
+        publicada = _ler_estado().get('versao')
+        if publicada is not None:
+            return publicada
+    return versao_arquivos(arquivos)
+
+
+class Gerenciador:
+    """Uma tarefa de reprocessamento por processo; pedidos repetidos são agrupados."""
+
+    def __init__(self, executar=None, arquivos=()):
+        self._executar = executar
+        self.arquivos = list(arquivos)
+        self._lock = threading.Lock()
+        self.atual: Tarefa | None = None
+
+    def solicitar(self) -> tuple[Tarefa, bool]:
+        """Inicia o reprocessamento (ou devolve o que já está em andamento).
+        Retorna (tarefa, nova).
+        """
+        with self._lock:
+            if self.atual is not None and self.atual.em_andamento:
+                return self.atual, False
+            tarefa = Tarefa()
+            self.atual = tarefa
+            threading.Thread(target=self._rodar, args=(tarefa,), name=f'reprocessamento-{tarefa.id}',
+                             daemon=True).start()
+            return tarefa, True
+
+    def _rodar(self, tarefa: Tarefa):
+        trava = TravaArquivo()
+        try:
+            esperou = False
+            while not trava.tentar():
+                esperou = True
+                tarefa.estado = 'aguardando'
+                tarefa.etapa = 'Aguardando outro reprocessamento em andamento'
+                time.sleep(ESPERA_INTERVALO)
+            try:
+                if esperou:
+                    # outro processo acabou de reprocessar: os dados já estão atualizados
+                    tarefa.atualizar(1.0, 'Dados atualizados por outro reprocessamento')
+                else:
+                    tarefa.estado = 'executando'
+                    _publicar(tarefa, versao_arquivos(self.arquivos))  # leitores ficam na versão atual
+                    self._executar(progresso=tarefa.atualizar)
+                    _publicar(tarefa, versao_arquivos(self.arquivos))
+            finally:
+                trava.liberar()
+            tarefa.estado = 'concluida'
+        except Exception:
+            tarefa.erro = traceback.format_exc()
+            tarefa.estado = 'falhou'
+            tarefa.etapa = 'Falha ao reprocessar'
+            print(f"⚠️  Reprocessamento {tarefa.id} falhou:\n{tarefa.erro}")
+        finally:
+            tarefa.fim = time.time()
+
+
+def _executar_analise(progresso):
+    import matplotlib
+    matplotlib.use('Agg')  # figura gerada fora da thread principal: backend sem janela
+    import analise_consolidada
+    analise_consolidada.executar(mostrar=False, progresso=progresso)
+
+
+ARQUIVOS_DADOS = [BASE_DIR / 'dados_consolidados.csv', BASE_DIR / 'municipios_multiplas_linhas.csv']
+
+# Instância do processo (o Streamlit importa o módulo uma vez e o compartilha entre as sessões)
+gerenciador = Gerenciador(_executar_analise, ARQUIVOS_DADOS)
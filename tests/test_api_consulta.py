@@ -0,0 +1,35 @@
+"""GET /linhas?geometria=1: município sem polígono na malha não volta com geometria nula."""
+import json
+
+import geopandas as gpd
+import pandas as pd
+from shapely.geometry import box
+
+import api_consulta
+import municipios_ibge
+
+
+def _responder(consulta):
+    api_consulta._responder.cache_clear()
+    status, _, corpo, _ = api_consulta.Servico().responder('/linhas', consulta)
+    return status, json.loads(corpo)
+
+
+def test_linhas_sem_poligono_responde_409(monkeypatch):
+    vazio = gpd.GeoDataFrame({'CD_MUN': pd.Series(dtype='int32')}, geometry=gpd.GeoSeries([], crs='EPSG:4326'))
+    monkeypatch.setattr(municipios_ibge, 'geometrias_municipios', lambda: vazio)
+    status, dados = _responder('municipio=Cascavel&estado=PR&geometria=1')
+    assert status == 409
+    assert 'PR' in dados['erro']
+
+    status, dados = _responder('municipio=Cascavel&estado=PR')
+    assert status == 200
+    assert 'geometria' not in dados['municipios'][0]
+
+
+def test_linhas_com_poligono(monkeypatch):
+    malha = gpd.GeoDataFrame({'CD_MUN': [4104808]}, geometry=[box(-53.6, -25.1, -53.3, -24.8)], crs='EPSG:4326')
+    monkeypatch.setattr(municipios_ibge, 'geometrias_municipios', lambda: malha)
+    status, dados = _responder('municipio=Cascavel&estado=PR&geometria=1')
+    assert status == 200
+    assert dados['municipios'][0]['geometria']['type'] == 'Polygon'
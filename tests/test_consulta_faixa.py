@@ -0,0 +1,65 @@
+"""Consulta ponto-em-faixa em lote: pontos sem coordenada válida não derrubam o lote."""
+import io
+import threading
+from http.client import HTTPConnection
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import LineString, box
+
+import api_consulta
+import consulta_faixa
+
+CSV_PONTOS = b'lat,lon\n-25.5,-49.1\n,\nabc,-50\n-25.5,-49.0\n'
+
+
+@pytest.fixture(scope='module')
+def indice():
+    corredores = gpd.GeoDataFrame({'Nome': ['LT Teste'], 'Voltagem': ['230'], 'Largura_m': [40.0]},
+                                  geometry=[LineString([(-49.2, -25.5), (-49.05, -25.5)])],
+                                  crs='EPSG:4326').to_crs(consulta_faixa.CRS_METRICO)
+    municipios = gpd.GeoDataFrame({'CD_MUN': [4106902]}, geometry=[box(-49.4, -25.7, -48.9, -25.3)],
+                                  crs='EPSG:4326')
+    return consulta_faixa.IndiceFaixa(corredores, municipios)
+
+
+def test_lote_com_coordenadas_invalidas(indice):
+    res = indice.consultar_lote([-25.5, np.nan, -25.5, np.inf, -25.4], [-49.1, -49.1, np.nan, -49.0, -49.0])
+    assert res['ponto'].tolist() == [0, 1, 2, 3, 4]
+    assert res['Dentro'].tolist() == [True, False, False, False, False]
+    assert res.loc[0, 'Nome'] == 'LT Teste'
+    assert res.loc[1:3, ['Nome', 'Distancia_m', 'CD_MUN']].isna().all().all()
+    assert res.loc[4, 'CD_MUN'] == 4106902  # fora da faixa, mas dentro do município
+
+    assert indice.consultar_lote([np.nan], [np.nan], somente_dentro=True).empty
+    assert indice.consultar(float('nan'), -49.1) == []
+
+
+def test_ufs_sem_malha(indice):
+    assert indice.ufs_sem_malha == ('SC', 'RS')  # a malha do teste só tem um município do PR
+
+
+def test_lote_csv_com_linhas_vazias(indice):
+    pontos = consulta_faixa.ler_pontos_csv(io.BytesIO(CSV_PONTOS))
+    res = indice.consultar_lote(pontos['lat'], pontos['lon'])
+    assert res['Dentro'].tolist() == [True, False, False, False]
+
+
+def test_api_lote_com_coordenadas_invalidas(indice, monkeypatch):
+    monkeypatch.setattr(api_consulta, 'indice_faixa', lambda: indice)
+    servidor = api_consulta.criar_servidor('127.0.0.1', 0)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conexao = HTTPConnection('127.0.0.1', servidor.server_address[1], timeout=10)
+        conexao.request('POST', '/faixa/lote', body=CSV_PONTOS, headers={'Content-Type': 'text/csv'})
+        resposta = conexao.getresponse()
+        corpo = resposta.read()
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+    assert resposta.status == 200
+    res = pd.read_csv(io.BytesIO(corpo))
+    assert res['Dentro'].tolist() == [True, False, False, False]